@@ -0,0 +1,220 @@
+"""Headless batch analysis: best move, score, nodes and time for a stream of positions.
+
+Input, one position per line from files or stdin ("-"); blank lines and lines
+starting with ";" are skipped:
+    4455667            moves in the game_record column format ("1"-"9", "A"-"Z"), played
+                       alternately from an empty board of --rows x --columns
+    6x7x4 - 4455667    a full game record line (its own board size is used)
+
+Output, one line per position in input order, tab-separated (or JSON lines with
+--json): input line number, moves, side to move ("1"/"2"), best column (same format
+as the moves), score, nodes, milliseconds, error. The score is the engine's: alpha-beta
+value for "alphabeta", exact solver score for "solve" (positive: the side to move
+wins, larger is faster) and empty for engines that only return a move.
+
+Positions are analysed by a process pool. At most `workers * 4` positions are read
+ahead of the output, so memory stays flat however long the input is:
+    python analyze.py archive.txt --engine solve --workers 4 > results.tsv
+    zcat positions.gz | python analyze.py - --engine alphabeta --depth 6 --json
+"""
+
+import argparse
+import inspect
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from board import Board, board_side, check_size
+from game_record import COLUMN_CHARS, GameRecord
+from new_try import ENGINES, alphabeta_search, last_search
+from solver import SolveAborted, get_solver
+
+
+FIELDS = ("line", "moves", "to_move", "best", "score", "nodes", "ms", "error")
+SYMBOLS = ("#", "O")
+
+
+# Objective: Stream the positions of one or more inputs as (line number, text).
+# Explanation: Reads each file (or stdin for "-") lazily, skipping blank and comment lines; line numbers run on across inputs.
+# Complexity: O(total input). Extra space O(one line).
+def read_positions(sources: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    number = 0
+    for source in sources:
+        stream = sys.stdin if source == "-" else open(source, "r", encoding="ascii")
+        try:
+            for line in stream:
+                number += 1
+                line = line.strip()
+                if line and not line.startswith(";"):
+                    yield number, line
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+# Objective: Parse one input line into (0-based moves, rows, columns, connect).
+# Explanation: A line with spaces is a game record line and brings its own size; otherwise it is a bare move string on the default size.
+# Complexity: Best/Average/Worst O(moves). Extra space O(moves).
+def parse_position(text: str, rows: int, columns: int, connect: int) -> Tuple[List[int], int, int, int]:
+    if " " in text or "\t" in text:
+        record = GameRecord.from_text(text)
+        return record.moves, record.rows, record.columns, record.connect
+    moves = []
+    for char in text.upper():
+        col = COLUMN_CHARS.find(char)
+        if col < 0:
+            raise ValueError("bad move character {0!r}".format(char))
+        moves.append(col)
+    return moves, rows, columns, connect
+
+
+# Objective: Analyse one position with the chosen engine.
+# Explanation: Replays the moves on a Board (rejecting illegal moves and finished games), then asks the engine for the side to move: alpha-beta and the solver also give a score (the solver falls back to alpha-beta past its node budget or off the 4-in-a-row boards it supports); other engines give the move only. Errors are reported in the result, not raised, so one bad line does not stop a batch. Module-level so the pool can pickle it.
+# Complexity: O(moves) replay plus that of the engine. Extra space O(rows*columns).
+def analyze_position(task: Tuple[int, str, int, int, int, str, Dict[str, Any]]) -> Dict[str, Any]:
+    number, text, rows, columns, connect, engine, options = task
+    result: Dict[str, Any] = {"line": number, "moves": text.split()[-1] if " " in text else text}
+    for field in FIELDS[2:]:
+        result[field] = None
+    started = time.perf_counter()
+    try:
+        moves, rows, columns, connect = parse_position(text, rows, columns, connect)
+        board = Board(rows, columns, connect, SYMBOLS)
+        for ply, col in enumerate(moves):
+            if not board.can_play(col):
+                raise ValueError("illegal move {0} at ply {1}".format(COLUMN_CHARS[col], ply + 1))
+            r, c = board.play(col, SYMBOLS[ply % 2])
+            if board.wins_at(r, c):
+                raise ValueError("game already won at ply {0}".format(ply + 1))
+        if board.is_full():
+            raise ValueError("board is full")
+        player, opponent = SYMBOLS[len(moves) % 2], SYMBOLS[1 - len(moves) % 2]
+        result["to_move"] = str(len(moves) % 2 + 1)
+        heights, grid = list(board.heights), board.to_grid()
+        search_fn, defaults = ENGINES[engine]
+        accepted = inspect.signature(search_fn).parameters
+        settings = dict(defaults)
+        # options the engine has no parameter for (e.g. --depth with mcts) are ignored
+        settings.update((name, value) for name, value in options.items() if name in accepted)
+        last_search["nodes"] = 0
+        best = score = nodes = None
+        if engine == "solve" and connect == 4 and (rows + 1) * columns <= 64:
+            solver = get_solver(rows, columns)
+            try:
+                solution = solver.solve(player, opponent, heights, grid, settings.get("max_nodes"))
+                best, score, nodes = solution.best_move, solution.score, solution.nodes
+            except SolveAborted:
+                pass
+        if best is None and engine in ("alphabeta", "solve"):
+            best, score = alphabeta_search(player, opponent, heights, grid, rows, columns, settings.get("depth", 5), connect=connect)
+            nodes = last_search["nodes"]
+        elif best is None:
+            settings["connect"] = connect
+            best = search_fn(player, opponent, heights, grid, rows, columns, **settings)
+            nodes = last_search["nodes"]
+        result.update(best=COLUMN_CHARS[best] if best is not None else None, score=score, nodes=nodes)
+    except ValueError as exc:
+        result["error"] = str(exc)
+    result["ms"] = round((time.perf_counter() - started) * 1000.0, 1)
+    return result
+
+
+# Objective: Analyse a stream of positions, yielding results in input order.
+# Explanation: With one worker runs inline; otherwise keeps at most `window` tasks in flight on a process pool, submitting the next input line only as the oldest result is yielded, so memory is bounded by the window rather than the input.
+# Complexity: O(positions * engine search / workers) wall time. Extra space O(window) tasks and results.
+def analyze_stream(
+    positions: Iterable[Tuple[int, str]],
+    engine: str = "alphabeta",
+    options: Optional[Dict[str, Any]] = None,
+    workers: int = 1,
+    rows: int = 6,
+    columns: int = 7,
+    connect: int = 4,
+    window: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    options = options or {}
+    tasks = ((number, text, rows, columns, connect, engine, options) for number, text in positions)
+    if workers <= 1:
+        for task in tasks:
+            yield analyze_position(task)
+        return
+    window = window or 4 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(analyze_position, task))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def format_result(result: Dict[str, Any], as_json: bool) -> str:
+    if as_json:
+        return json.dumps(result)
+    return "\t".join("" if result[field] is None else str(result[field]) for field in FIELDS)
+
+
+# Objective: Write every result as it arrives and report totals on stderr.
+# Explanation: Flushes after each line so downstream consumers and partial runs see finished work.
+# Complexity: O(positions). Extra space O(1) beyond analyze_stream's window.
+def write_results(results: Iterable[Dict[str, Any]], out: TextIO, as_json: bool = False, header: bool = True) -> Tuple[int, int]:
+    count = errors = 0
+    if header and not as_json:
+        out.write("\t".join(FIELDS) + "\n")
+    for result in results:
+        out.write(format_result(result, as_json) + "\n")
+        out.flush()
+        count += 1
+        if result["error"] is not None:
+            errors += 1
+    return count, errors
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Analyse Connect N positions in batch.")
+    parser.add_argument("inputs", nargs="*", default=["-"], help="position files ('-' or none for stdin)")
+    parser.add_argument("--engine", default="alphabeta", choices=sorted(ENGINES))
+    parser.add_argument("--depth", type=int, help="search depth (beam, alphabeta, solve fallback)")
+    parser.add_argument("--max-nodes", type=int, help="solver node budget per position")
+    parser.add_argument("--time-limit", type=float, help="seconds per position (mcts)")
+    parser.add_argument("--workers", type=int, default=1, help="analysis processes")
+    parser.add_argument("--rows", type=board_side, default=6)
+    parser.add_argument("--columns", type=board_side, default=7)
+    parser.add_argument("--connect", type=int, default=4)
+    parser.add_argument("--json", action="store_true", help="write JSON lines instead of tab-separated values")
+    parser.add_argument("--no-header", action="store_true", help="omit the tab-separated header line")
+    parser.add_argument("--out", help="write results to this file instead of stdout")
+    args = parser.parse_args(argv)
+    try:
+        check_size(args.rows, args.columns, args.connect)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    options = {}
+    for name in ("depth", "max_nodes", "time_limit"):
+        if getattr(args, name) is not None:
+            options[name] = getattr(args, name)
+    started = time.perf_counter()
+    out = open(args.out, "w", encoding="ascii") if args.out else sys.stdout
+    try:
+        results = analyze_stream(
+            read_positions(args.inputs), args.engine, options, args.workers, args.rows, args.columns, args.connect
+        )
+        count, errors = write_results(results, out, args.json, not args.no_header)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - started
+    print(
+        "{0} positions ({1} errors) in {2:.1f}s, {3:.1f}/s".format(count, errors, elapsed, count / elapsed if elapsed else 0.0),
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,186 @@
+"""Vectorized (NumPy) piece-heuristic evaluation for many positions at once.
+
+`batch_piece_scores` returns, for each board in a stacked (B, rows, columns) array, the
+same value as summing `greedy.score_move` over every piece (positive for the player,
+negative for the opponent), i.e. `IncrementalEvaluator.total`. `batched_bot_move` is a
+separate, piece-only engine: it collects every leaf of a full-width minimax tree and
+scores all of them in one call, without the threat term of `new_try.evaluate_position`.
+
+NumPy is optional for the rest of the project; these functions raise ImportError
+when it is missing.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+from bitboard import BitBoard
+from evaluation import DISPLACEMENTS
+from hfunctions import SearchAborted
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+
+WIN_SCORE = 100000
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError(
+            "numpy is required for batched evaluation. Install via conda: "
+            "`conda env update -f environment.yml` or `conda install -c conda-forge numpy`"
+        )
+
+
+# Objective: Stack grids into an int8 array (1 = player, -1 = opponent, 0 = empty).
+# Explanation: Compares every cell with the two symbols and stacks the results.
+# Complexity: Best/Average/Worst O(B*rows*columns). Extra space O(B*rows*columns).
+def encode_grids(grids: Sequence[List[List[str]]], player: str, opponent: str):
+    _require_numpy()
+    cells = np.array(grids)
+    return (cells == player).astype(np.int8) - (cells == opponent).astype(np.int8)
+
+
+# Objective: Turn pairs of bitboard masks into the stacked int8 board format.
+# Explanation: Serializes each mask to bytes, unpacks all bits with one np.unpackbits call and gathers the cell bits into (row, column) order.
+# Complexity: Best/Average/Worst O(B*(rows+1)*columns). Extra space O(B*(rows+1)*columns).
+def encode_masks(player_masks: Sequence[int], opponent_masks: Sequence[int], rows: int, columns: int):
+    _require_numpy()
+    stride = rows + 1
+    nbytes = (stride * columns + 7) // 8
+    cell_bits = np.array([[c * stride + (rows - 1 - r) for c in range(columns)] for r in range(rows)])
+
+    def unpack(masks: Sequence[int]):
+        raw = b"".join(mask.to_bytes(nbytes, "little") for mask in masks)
+        bits = np.unpackbits(np.frombuffer(raw, dtype=np.uint8).reshape(len(masks), nbytes), axis=1, bitorder="little")
+        return bits[:, cell_bits].astype(np.int8)
+
+    return unpack(player_masks) - unpack(opponent_masks)
+
+
+# Objective: Score a batch of boards with the score_move piece heuristic.
+# Explanation: For each of the 8 directions, counts each side's pieces in the (up to) connect-1 cells ahead of every cell by summing zero-padded shifted copies of the board; the window terms 125*2^mine - 100*2^theirs are then summed over occupied cells together with the center bonus.
+# Complexity: Best/Average/Worst O(B*rows*columns*8*(connect-1)) vectorized. Extra space O(B*rows*columns).
+def batch_piece_scores(boards, connect: int = 4):
+    _require_numpy()
+    steps = connect - 1
+    pad = steps
+    boards = np.asarray(boards)
+    count, rows, columns = boards.shape
+    mine = (boards == 1).astype(np.int32)
+    theirs = (boards == -1).astype(np.int32)
+    mine_padded = np.pad(mine.astype(np.int8), ((0, 0), (pad, pad), (pad, pad)))
+    theirs_padded = np.pad(theirs.astype(np.int8), ((0, 0), (pad, pad), (pad, pad)))
+    powers = np.array([1 << k for k in range(steps + 1)], dtype=np.int32)
+
+    # per-cell sum of the 8 window terms, from the owner's point of view
+    mine_terms = np.zeros((count, rows, columns), dtype=np.int32)
+    theirs_terms = np.zeros((count, rows, columns), dtype=np.int32)
+    for dx, dy in DISPLACEMENTS:
+        mine_count = np.zeros((count, rows, columns), dtype=np.int8)
+        theirs_count = np.zeros((count, rows, columns), dtype=np.int8)
+        for step in range(1, steps + 1):
+            r0, c0 = pad + step * dx, pad + step * dy
+            mine_count += mine_padded[:, r0:r0 + rows, c0:c0 + columns]
+            theirs_count += theirs_padded[:, r0:r0 + rows, c0:c0 + columns]
+        mine_pow = powers[mine_count]
+        theirs_pow = powers[theirs_count]
+        mine_terms += 125 * mine_pow - 100 * theirs_pow
+        theirs_terms += 125 * theirs_pow - 100 * mine_pow
+    total = (mine * mine_terms - theirs * theirs_terms).sum(axis=(1, 2), dtype=np.int64)
+
+    center = (columns // 2) - np.abs(np.arange(columns) - (columns // 2))
+    total += ((mine - theirs) * center).sum(axis=(1, 2))
+    return total
+
+
+# Objective: Pick a move with full-width minimax whose leaves are scored in one batch by the piece heuristic alone.
+# Explanation: One negamax walk over the bitboard records the tree: exact values for wins and full boards, leaf indices for quiet leaves (whose masks are collected) and child lists for interior nodes. The leaves are scored with batch_piece_scores, then the values are backed up through the recorded lists without replaying moves. Win detection is exact on the bitboard, so only quiet leaves need the heuristic. A SearchStats passed as `stats` records the leaf count and the batch scoring time. Setting the `stop` event raises SearchAborted at the next node.
+# Complexity: O(columns^depth) nodes walked once in Python plus one vectorized evaluation of O(columns^depth) leaves. Extra space O(columns^depth) for the recorded tree and the leaf batch.
+def batched_bot_move(
+    player: str,
+    opponent: str,
+    heights: List[int],
+    grid: List[List[str]],
+    rows: int,
+    columns: int,
+    depth: int = 4,
+    stats=None,
+    connect: int = 4,
+    stop=None,
+) -> Optional[int]:
+    """Full-width minimax scored by the piece heuristic only, as a separate engine.
+
+    Leaves get `IncrementalEvaluator.total` (the piece-window and center terms), not
+    `evaluate_position`: the threat term needs a BFS per leaf and cannot be batched.
+    Without it and without pruning this engine plays weaker than "beam" or "alphabeta"
+    at the same depth; it is the vectorized-evaluation alternative, not a faster
+    version of those engines.
+    """
+    _require_numpy()
+    if stats is not None and not stats.in_move:
+        return stats.run_move("batched", batched_bot_move, player, opponent, heights, grid, rows, columns, depth, stats, connect, stop)
+    depth = max(1, depth)
+    board = BitBoard.from_grid(grid, heights, rows, columns, (player, opponent), connect)
+    root_cols = board.available_moves()
+    if not root_cols:
+        return None
+
+    leaf_player: List[int] = []
+    leaf_opponent: List[int] = []
+
+    # a recorded node is an int (exact value for the side to move), a (leaf index,
+    # player to move) tuple, or the list of its children
+    def record(side: str, other: str, remaining: int, ply: int):
+        if stop is not None and stop.is_set():
+            raise SearchAborted()
+        cols = board.available_moves()
+        if not cols:
+            return 0
+        for col in cols:
+            if board.wins_after(col, side):
+                return WIN_SCORE - (ply + 1)
+        if remaining == 0:
+            leaf_player.append(board.masks[player])
+            leaf_opponent.append(board.masks[opponent])
+            return len(leaf_player) - 1, side == player
+        children = []
+        for col in cols:
+            board.play(col, side)
+            children.append(record(other, side, remaining - 1, ply + 1))
+            board.undo()
+        return children
+
+    root = []
+    for col in root_cols:
+        if board.wins_after(col, player):
+            root.append((col, None))  # immediate win
+            continue
+        board.play(col, player)
+        root.append((col, record(opponent, player, depth - 1, 1)))
+        board.undo()
+
+    leaf_scores: List[int] = []
+    if leaf_player:
+        if stats is not None:
+            stats.count("leaves", len(leaf_player))
+            stats.set_depth(depth)
+            stats.enter("batch_piece_scores")
+        boards = encode_masks(leaf_player, leaf_opponent, rows, columns)
+        leaf_scores = [int(score) for score in batch_piece_scores(boards, connect)]
+        if stats is not None:
+            stats.leave()
+
+    def value(node) -> int:
+        if isinstance(node, int):
+            return node
+        if isinstance(node, tuple):
+            score = leaf_scores[node[0]]
+            return score if node[1] else -score
+        return max(-value(child) for child in node)
+
+    scored = [(WIN_SCORE if node is None else -value(node), col) for col, node in root]
+    # highest score wins; ties go to the column closest to the center
+    center = columns // 2
+    return max(scored, key=lambda item: (item[0], -abs(item[1] - center)))[1]
@@ -0,0 +1,400 @@
+"""Micro-benchmarks for the engine hot paths.
+
+Times the board primitives, the heuristics, the threat solver and the beam bot at
+several depth/beam settings on a fixed corpus of positions, reports ops/sec (and
+nodes/sec for searches) and writes the results as JSON so runs can be compared:
+
+    python benchmarks.py --out bench_before.json
+    python benchmarks.py --out bench_after.json --compare bench_before.json
+
+`--workers N` also times the deepest search setting with root-parallel scoring on N
+processes, next to the sequential run; the JSON records the machine's CPU count, since
+the speedup is only meaningful with N cores to spare.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import hfunctions
+import new_try
+from bitboard import BitBoard
+from cache import reset_caches
+from evaluation import IncrementalEvaluator
+from greedy import score_move
+
+
+ROWS = 6
+COLUMNS = 7
+PLAYER_1 = "#"
+PLAYER_2 = "O"
+
+# Fixed corpus: move sequences (1-based columns) from the empty board, from the opening
+# to crowded late positions. None of them is already won or has a win in one for either
+# side (a threat to block would settle the root move without a search), so every search
+# really searches; corpus_positions checks this. Do not edit casually; results are only
+# comparable between runs on the same corpus.
+CORPUS = [
+    "",
+    "6",
+    "35",
+    "4553",
+    "613535",
+    "4563343",
+    "51244654",
+    "3227221345",
+    "2662136643",
+    "2666243176",
+    "42653264767",
+    "173644167273",
+    "7246673421362",
+    "21627173753757",
+    "645137657224322",
+    "6245234425166631",
+    "67723256112124623",
+    "25631131211675656252",
+    "6266546236333125576334",
+    "113634776413324451255551",
+]
+
+SEARCH_SETTINGS = [(2, 2), (3, 3), (4, 3), (4, 4), (5, 3)]
+
+# Board sizes for the scaling run: (rows, columns, connect), from the standard board up.
+SCALING_SIZES = [(6, 7, 4), (9, 10, 5), (12, 12, 5), (15, 15, 5)]
+SCALING_CORPUS_SIZE = 8
+
+
+# Objective: Replay a corpus entry into grid/heights form.
+# Explanation: Alternates symbols starting with player 1 and applies make_move_on_grid.
+# Complexity: O(moves + rows*columns). Extra space O(rows*columns).
+def build_position(moves: str) -> Tuple[List[List[str]], List[int], str, str]:
+    grid = [["*" for _ in range(COLUMNS)] for _ in range(ROWS)]
+    heights = [0 for _ in range(COLUMNS)]
+    symbols = (PLAYER_1, PLAYER_2)
+    for ply, char in enumerate(moves):
+        hfunctions.make_move_on_grid(int(char) - 1, symbols[ply % 2], grid, heights, ROWS)
+    to_move = symbols[len(moves) % 2]
+    other = symbols[(len(moves) + 1) % 2]
+    return grid, heights, to_move, other
+
+
+# Objective: Replay the corpus, checking that every position is quiet.
+# Explanation: Asserts that neither the side to move nor its opponent has already won or has a column that wins at once.
+# Complexity: O(corpus * (moves + columns)). Extra space O(corpus * rows*columns).
+def corpus_positions():
+    positions = [build_position(moves) for moves in CORPUS]
+    for moves, (grid, heights, to_move, other) in zip(CORPUS, positions):
+        board = BitBoard.from_grid(grid, heights, ROWS, COLUMNS, (PLAYER_1, PLAYER_2))
+        for symbol in (to_move, other):
+            assert not board.is_win(symbol) and not any(board.wins_after(col, symbol) for col in board.available_moves()), (
+                "corpus position {0!r} is won or has a win in one for {1}".format(moves, symbol)
+            )
+    return positions
+
+
+# Objective: Time a callable that performs a known number of operations.
+# Explanation: Runs it `repeat` times and keeps the fastest run to reduce noise.
+# Complexity: O(repeat * cost of fn). Extra space O(1).
+def best_of(fn: Callable[[], int], repeat: int) -> Tuple[float, int]:
+    best = None
+    ops = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        ops = fn()
+        elapsed = time.perf_counter() - started
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, ops
+
+
+def bench_check_game_over(positions, loops: int) -> int:
+    ops = 0
+    for _ in range(loops):
+        for grid, heights, _, _ in positions:
+            for c in range(COLUMNS):
+                if heights[c]:
+                    hfunctions.check_game_over((ROWS - heights[c], c), grid, ROWS, COLUMNS)
+                    ops += 1
+    return ops
+
+
+def bench_make_undo(positions, loops: int) -> int:
+    ops = 0
+    for _ in range(loops):
+        for grid, heights, to_move, _ in positions:
+            history = []
+            for col in hfunctions.available_moves(heights, ROWS):
+                r, c = hfunctions.make_move_on_grid(col, to_move, grid, heights, ROWS)
+                history.append((r, c, to_move))
+                hfunctions.undo_move(heights, grid, history)
+                ops += 1
+    return ops
+
+
+def bench_try_move_wins(positions, loops: int) -> int:
+    ops = 0
+    for _ in range(loops):
+        for grid, heights, to_move, _ in positions:
+            for col in range(COLUMNS):
+                hfunctions.try_move_wins(col, to_move, heights, grid, ROWS, COLUMNS)
+                ops += 1
+    return ops
+
+
+def bench_score_move(positions, loops: int) -> int:
+    ops = 0
+    for _ in range(loops):
+        for grid, heights, to_move, other in positions:
+            for c in range(COLUMNS):
+                if heights[c]:
+                    score_move(to_move, other, grid, (ROWS - heights[c], c), ROWS, COLUMNS)
+                    ops += 1
+    return ops
+
+
+def bench_bfs(positions, max_depth: int) -> int:
+    reset_caches()
+    for grid, heights, to_move, other in positions:
+        hfunctions.bfs_threat_solver(to_move, other, heights, grid, ROWS, COLUMNS, max_depth=max_depth)
+    return len(positions)
+
+
+def bench_search(positions, depth: int, beam_width: int, nodes: List[int], workers: int = 1) -> int:
+    reset_caches()
+    nodes[0] = 0
+    for grid, heights, to_move, other in positions:
+        new_try.dfs_beam_bot_move(
+            to_move, other, heights, grid, ROWS, COLUMNS, depth=depth, beam_width=beam_width, use_book=False, workers=workers
+        )
+        nodes[0] += new_try.last_search["nodes"]
+    return len(positions)
+
+
+# Objective: Build a fixed corpus of quiet positions for one board size.
+# Explanation: Plays seeded random games to about a quarter of the area and keeps positions where nobody has won and the side to move has no immediate win, so searches cannot stop at the root.
+# Complexity: O(count * rows*columns) expected. Extra space O(count * rows*columns).
+def scaling_positions(rows: int, columns: int, connect: int, count: int = SCALING_CORPUS_SIZE):
+    rng = random.Random("scaling:{0}x{1}:{2}".format(rows, columns, connect))
+    symbols = (PLAYER_1, PLAYER_2)
+    positions = []
+    while len(positions) < count:
+        board = BitBoard(rows, columns, symbols, connect)
+        grid = [["*" for _ in range(columns)] for _ in range(rows)]
+        plies = rng.randint(rows * columns // 8, rows * columns // 4)
+        for ply in range(plies):
+            r, c = board.play(rng.choice(board.available_moves()), symbols[ply % 2])
+            grid[r][c] = symbols[ply % 2]
+        to_move, other = symbols[plies % 2], symbols[(plies + 1) % 2]
+        if board.is_win(PLAYER_1) or board.is_win(PLAYER_2) or board.winning_moves(to_move):
+            continue
+        positions.append((grid, board, to_move, other))
+    return positions
+
+
+# Objective: Measure how the hot paths scale with board area and run length.
+# Explanation: For each size in SCALING_SIZES, times bitboard win tests, grid win checks, score_move, incremental evaluator updates and a shallow beam search on that size's own corpus; names carry the size so --compare tracks each one.
+# Complexity: Dominated by the beam searches on the largest board. Extra space O(corpus).
+def run_scaling(repeat: int, loops: int) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    for rows, columns, connect in SCALING_SIZES:
+        positions = scaling_positions(rows, columns, connect)
+        label = "scaling[{0}x{1},connect={2}]".format(rows, columns, connect)
+
+        def wins_after() -> int:
+            ops = 0
+            for _ in range(loops):
+                for _, board, to_move, _ in positions:
+                    for col in range(columns):
+                        board.wins_after(col, to_move)
+                        ops += 1
+            return ops
+
+        def check_game_over() -> int:
+            ops = 0
+            for _ in range(loops):
+                for grid, board, _, _ in positions:
+                    for c in range(columns):
+                        if board.heights[c]:
+                            hfunctions.check_game_over((rows - board.heights[c], c), grid, rows, columns, connect)
+                            ops += 1
+            return ops
+
+        def score_moves() -> int:
+            ops = 0
+            for _ in range(loops):
+                for grid, board, to_move, other in positions:
+                    for c in range(columns):
+                        if board.heights[c]:
+                            score_move(to_move, other, grid, (rows - board.heights[c], c), rows, columns, connect)
+                            ops += 1
+            return ops
+
+        evaluators = [IncrementalEvaluator.from_grid(grid, to_move, other, rows, columns, connect) for grid, _, to_move, other in positions]
+
+        def evaluator_updates() -> int:
+            ops = 0
+            for _ in range(loops):
+                for evaluator, (_, board, to_move, _) in zip(evaluators, positions):
+                    for col in board.available_moves():
+                        r = rows - board.heights[col] - 1
+                        evaluator.place(r, col, to_move)
+                        evaluator.remove(r, col)
+                        ops += 1
+            return ops
+
+        nodes = [0]
+
+        def search() -> int:
+            reset_caches()
+            nodes[0] = 0
+            for grid, board, to_move, other in positions:
+                new_try.dfs_beam_bot_move(
+                    to_move, other, board.heights[:], [row[:] for row in grid], rows, columns,
+                    depth=3, beam_width=3, use_book=False, connect=connect,
+                )
+                nodes[0] += new_try.last_search["nodes"]
+            return len(positions)
+
+        for name, fn in [
+            ("BitBoard.wins_after", wins_after),
+            ("check_game_over", check_game_over),
+            ("greedy.score_move", score_moves),
+            ("IncrementalEvaluator.place+remove", evaluator_updates),
+            ("dfs_beam_bot_move[depth=3,beam=3]", search),
+        ]:
+            seconds, ops = best_of(fn, repeat)
+            row = {"ops": ops, "seconds": seconds, "ops_per_sec": ops / seconds, "area": rows * columns}
+            if fn is search:
+                row["nodes"] = nodes[0]
+                row["nodes_per_sec"] = nodes[0] / seconds
+            results["{0} {1}".format(label, name)] = row
+    return results
+
+
+# Objective: Run every benchmark and collect results keyed by name.
+# Explanation: Primitives run many loops over the corpus; searches run once per position with cold caches so runs are comparable. With workers > 1 the deepest setting is also run root-parallel (worker caches are cleared too, by restarting the pool before each run).
+# Complexity: Dominated by the deepest search setting. Extra space O(corpus).
+def run_benchmarks(repeat: int = 3, quick: bool = False, scaling: bool = True, workers: int = 1) -> Dict[str, Dict[str, float]]:
+    positions = corpus_positions()
+    loops = 20 if quick else 200
+    results: Dict[str, Dict[str, float]] = {}
+
+    primitives = [
+        ("check_game_over", lambda: bench_check_game_over(positions, loops)),
+        ("make_move_on_grid+undo", lambda: bench_make_undo(positions, loops)),
+        ("try_move_wins", lambda: bench_try_move_wins(positions, loops)),
+        ("greedy.score_move", lambda: bench_score_move(positions, loops)),
+        ("bfs_threat_solver[depth=4]", lambda: bench_bfs(positions, 4)),
+        ("bfs_threat_solver[depth=6]", lambda: bench_bfs(positions, 6)),
+    ]
+    for name, fn in primitives:
+        seconds, ops = best_of(fn, repeat)
+        results[name] = {"ops": ops, "seconds": seconds, "ops_per_sec": ops / seconds}
+
+    settings = SEARCH_SETTINGS[:3] if quick else SEARCH_SETTINGS
+    runs = [(depth, beam_width, 1) for depth, beam_width in settings]
+    if workers > 1:
+        runs.append(settings[-1] + (workers,))
+    for depth, beam_width, run_workers in runs:
+        nodes = [0]
+
+        def search() -> int:
+            if run_workers > 1:
+                # fresh worker processes, so their caches start cold like this one's
+                new_try.shutdown_pool()
+                new_try._get_pool(run_workers)
+            return bench_search(positions, depth, beam_width, nodes, run_workers)
+
+        seconds, ops = best_of(search, repeat)
+        name = "dfs_beam_bot_move[depth={0},beam={1}]".format(depth, beam_width)
+        if run_workers > 1:
+            name = "dfs_beam_bot_move[depth={0},beam={1},workers={2}]".format(depth, beam_width, run_workers)
+        results[name] = {
+            "ops": ops,
+            "seconds": seconds,
+            "ops_per_sec": ops / seconds,
+            "nodes": nodes[0],
+            "nodes_per_sec": nodes[0] / seconds,
+        }
+    new_try.shutdown_pool()
+    if scaling:
+        results.update(run_scaling(repeat, loops // 10))
+    return results
+
+
+# Objective: Compare a run against a saved baseline.
+# Explanation: Prints the ops/sec ratio per benchmark and returns the names that slowed down by more than `threshold`.
+# Complexity: O(benchmarks). Extra space O(benchmarks).
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    regressions = []
+    width = max(len(name) for name in results)
+    for name, current in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print("{0:<{1}} (new)".format(name, width))
+            continue
+        ratio = current["ops_per_sec"] / before["ops_per_sec"]
+        flag = ""
+        if ratio < 1 - threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print("{0:<{1}} {2:>8.2f}x{3}".format(name, width, ratio, flag))
+    return regressions
+
+
+def print_results(results: Dict[str, Dict[str, float]]) -> None:
+    width = max(len(name) for name in results)
+    for name, row in results.items():
+        line = "{0:<{1}} {2:>14,.0f} ops/s".format(name, width, row["ops_per_sec"])
+        if "nodes_per_sec" in row:
+            line += " {0:>12,.0f} nodes/s".format(row["nodes_per_sec"])
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Connect 4 engine hot paths.")
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown ratio reported as a regression")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark (fastest is kept)")
+    parser.add_argument("--quick", action="store_true", help="fewer loops and search settings")
+    parser.add_argument("--no-scaling", action="store_true", help="skip the board-size scaling runs")
+    parser.add_argument("--workers", type=int, default=1, help="also time the deepest search root-parallel on this many processes")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.repeat, args.quick, not args.no_scaling, args.workers)
+    print_results(results)
+
+    if args.out:
+        payload = {
+            "meta": {
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "corpus_size": len(CORPUS),
+                "quick": args.quick,
+                "cpu_count": os.cpu_count(),
+                "workers": args.workers,
+                "scaling_sizes": SCALING_SIZES,
+            },
+            "results": results,
+        }
+        with open(args.out, "w") as handle:
+            json.dump(payload, handle, indent=2)
+
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)["results"]
+        print()
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
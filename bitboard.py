@@ -0,0 +1,270 @@
+import random
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+_zobrist_tables: Dict[tuple, List[int]] = {}
+
+
+# Objective: Fetch the Zobrist random table for one symbol on a given board size.
+# Explanation: Seeds a PRNG from the board size and symbol so keys are stable across processes; tables are built once and shared.
+# Complexity: Best O(1) when cached; Worst O(rows*columns) on first use. Extra space O(rows*columns) per table.
+def zobrist_table(rows: int, columns: int, symbol: str) -> List[int]:
+    table_key = (rows, columns, symbol)
+    table = _zobrist_tables.get(table_key)
+    if table is None:
+        rng = random.Random("zobrist:{0}x{1}:{2}".format(rows, columns, symbol))
+        table = [rng.getrandbits(64) for _ in range((rows + 1) * columns)]
+        _zobrist_tables[table_key] = table
+    return table
+
+
+# Objective: Fetch the Zobrist table of a symbol read through a left-right mirror of the board.
+# Explanation: Entry c*stride + h holds the random number of the mirrored cell (columns-1-c)*stride + h, so XORing it in as a piece is played keeps the key of the mirrored position; built once per size and symbol.
+# Complexity: Best O(1) when cached; Worst O(rows*columns) on first use. Extra space O(rows*columns) per table.
+def zobrist_mirror_table(rows: int, columns: int, symbol: str) -> List[int]:
+    table_key = (rows, columns, symbol, "mirror")
+    table = _zobrist_tables.get(table_key)
+    if table is None:
+        stride = rows + 1
+        plain = zobrist_table(rows, columns, symbol)
+        table = [plain[(columns - 1 - index // stride) * stride + index % stride] for index in range(stride * columns)]
+        _zobrist_tables[table_key] = table
+    return table
+
+
+# Objective: Plan the shifts that turn a mask into "start of a run of n" bits along one direction.
+# Explanation: Doubles the run length with mask &= mask >> (length*step) while it fits, then tops it up with one overlapping shift (n - length <= length), so any n needs O(log n) shifts.
+# Complexity: Best/Average/Worst O(log n). Extra space O(log n).
+def run_shifts(step: int, n: int) -> Tuple[int, ...]:
+    shifts = []
+    length = 1
+    while length * 2 <= n:
+        shifts.append(length * step)
+        length *= 2
+    if length < n:
+        shifts.append((n - length) * step)
+    return tuple(shifts)
+
+
+class BitBoard:
+    """Bitboard-backed connect-N position (default 6x7, connect 4).
+
+    Each column owns ``rows + 1`` bits (one sentinel bit on top) so that shifting a
+    mask never carries pieces from one column into the next. Bit ``c * stride + h``
+    is the cell at column ``c`` and height ``h`` from the bottom, i.e. grid row
+    ``rows - 1 - h``.
+
+    - ``masks`` holds one integer mask per player symbol.
+    - ``occupied`` is the union of both masks.
+    - ``heights`` mirrors the list used by the grid API (pieces per column).
+    - ``zobrist`` is a 64-bit hash of the position, updated incrementally by play/undo.
+    - ``zobrist_mirror`` is the hash of the left-right mirror of the position, kept the
+      same way; ``canonical_zobrist`` picks one of the two so a position and its mirror
+      share cache entries.
+    - ``connect`` is the run length that wins. Python integers are unbounded, so large
+      boards (e.g. 15x15 connect 5) use the same shift tests on wider masks.
+    """
+
+    __slots__ = (
+        "rows",
+        "columns",
+        "stride",
+        "masks",
+        "occupied",
+        "heights",
+        "history",
+        "zobrist",
+        "_zobrist",
+        "zobrist_mirror",
+        "_zobrist_mirror",
+        "bottom_mask",
+        "board_mask",
+        "_shifts",
+        "connect",
+        "_line_shifts",
+    )
+
+    def __init__(self, rows: int = 6, columns: int = 7, symbols: Sequence[str] = ("#", "O"), connect: int = 4):
+        self.rows = rows
+        self.columns = columns
+        self.stride = rows + 1
+        self.masks: Dict[str, int] = {symbol: 0 for symbol in symbols}
+        self.occupied = 0
+        self.heights: List[int] = [0] * columns
+        self.history: List[Tuple[int, str]] = []
+        self.zobrist = 0
+        self._zobrist: Dict[str, List[int]] = {symbol: zobrist_table(rows, columns, symbol) for symbol in symbols}
+        self.zobrist_mirror = 0
+        self._zobrist_mirror: Dict[str, List[int]] = {symbol: zobrist_mirror_table(rows, columns, symbol) for symbol in symbols}
+        self.bottom_mask = sum(1 << (c * self.stride) for c in range(columns))
+        self.board_mask = self.bottom_mask * ((1 << rows) - 1)
+        # vertical, horizontal, diagonal (/), anti-diagonal (\)
+        self._shifts = (1, self.stride, self.stride + 1, self.stride - 1)
+        self.connect = connect
+        self._line_shifts = tuple(run_shifts(step, connect) for step in self._shifts)
+
+    # Objective: Build a bitboard from the list-of-lists grid used by the game loop.
+    # Explanation: Walks every column bottom-up and sets the bit of each occupied cell in its owner's mask.
+    # Complexity: Best O(rows*columns); Average O(rows*columns); Worst O(rows*columns). Extra space O(1) beyond the masks.
+    @classmethod
+    def from_grid(
+        cls, game_grid, heights, rows: int, columns: int, symbols: Sequence[str] = ("#", "O"), connect: int = 4
+    ) -> "BitBoard":
+        board = cls(rows, columns, symbols, connect)
+        for c in range(columns):
+            for h in range(heights[c]):
+                symbol = game_grid[rows - 1 - h][c]
+                index = c * board.stride + h
+                bit = 1 << index
+                board.masks[symbol] = board.masks.get(symbol, 0) | bit
+                board.occupied |= bit
+                board.zobrist ^= board._table(symbol)[index]
+                board.zobrist_mirror ^= board._zobrist_mirror[symbol][index]
+            board.heights[c] = heights[c]
+        return board
+
+    # Objective: Produce an independent copy of the position.
+    # Explanation: Copies the integer masks and the heights list; history is not carried over.
+    # Complexity: Best O(columns); Average O(columns); Worst O(columns). Extra space O(columns).
+    def copy(self) -> "BitBoard":
+        other = BitBoard(self.rows, self.columns, (), self.connect)
+        other.masks = dict(self.masks)
+        other.occupied = self.occupied
+        other.heights = self.heights[:]
+        other.zobrist = self.zobrist
+        other._zobrist = dict(self._zobrist)
+        other.zobrist_mirror = self.zobrist_mirror
+        other._zobrist_mirror = dict(self._zobrist_mirror)
+        return other
+
+    def _table(self, symbol: str) -> List[int]:
+        table = self._zobrist.get(symbol)
+        if table is None:
+            table = self._zobrist[symbol] = zobrist_table(self.rows, self.columns, symbol)
+            self._zobrist_mirror[symbol] = zobrist_mirror_table(self.rows, self.columns, symbol)
+        return table
+
+    # Objective: Render the position back into the '*'/symbol grid format.
+    # Explanation: Tests every cell bit against each player's mask.
+    # Complexity: Best O(rows*columns); Average O(rows*columns); Worst O(rows*columns). Extra space O(rows*columns).
+    def to_grid(self) -> List[List[str]]:
+        grid = [["*" for _ in range(self.columns)] for _ in range(self.rows)]
+        for symbol, mask in self.masks.items():
+            for c in range(self.columns):
+                for h in range(self.heights[c]):
+                    if mask >> (c * self.stride + h) & 1:
+                        grid[self.rows - 1 - h][c] = symbol
+        return grid
+
+    def can_play(self, col: int) -> bool:
+        return 0 <= col < self.columns and self.heights[col] < self.rows
+
+    # Objective: Return a mask with the next free cell of every non-full column set.
+    # Explanation: Adding the bottom row to the occupied mask carries each column up to its first empty bit.
+    # Complexity: Best O(1); Average O(1); Worst O(1) (big-int ops on rows*columns bits). Extra space O(1).
+    def legal_moves_mask(self) -> int:
+        return (self.occupied + self.bottom_mask) & self.board_mask
+
+    def available_moves(self) -> List[int]:
+        return [idx for idx, height in enumerate(self.heights) if height < self.rows]
+
+    def is_full(self) -> bool:
+        return self.occupied == self.board_mask
+
+    # Objective: Drop a piece for symbol into col.
+    # Explanation: Sets the column's next bit in the player's mask and the occupied mask, folds the cell into both Zobrist keys, bumps the height and logs the move for undo.
+    # Complexity: Best O(1); Average O(1); Worst O(1). Extra space O(1) per history entry.
+    def play(self, col: int, symbol: str) -> Tuple[int, int]:
+        h = self.heights[col]
+        index = col * self.stride + h
+        bit = 1 << index
+        self.masks[symbol] = self.masks.get(symbol, 0) | bit
+        self.occupied |= bit
+        self.zobrist ^= self._table(symbol)[index]
+        self.zobrist_mirror ^= self._zobrist_mirror[symbol][index]
+        self.heights[col] = h + 1
+        self.history.append((col, symbol))
+        return self.rows - 1 - h, col
+
+    # Objective: Revert the most recent play().
+    # Explanation: Pops the history entry, lowers the column height, clears the top bit from both masks and XORs the cell back out of both Zobrist keys.
+    # Complexity: Best O(1); Average O(1); Worst O(1). Extra space O(1).
+    def undo(self) -> Optional[Tuple[int, int, str]]:
+        if not self.history:
+            return None
+        col, symbol = self.history.pop()
+        h = self.heights[col] - 1
+        index = col * self.stride + h
+        bit = 1 << index
+        self.masks[symbol] ^= bit
+        self.occupied ^= bit
+        self.zobrist ^= self._zobrist[symbol][index]
+        self.zobrist_mirror ^= self._zobrist_mirror[symbol][index]
+        self.heights[col] = h
+        return self.rows - 1 - h, col, symbol
+
+    # Objective: Detect `connect` in a row anywhere in a mask.
+    # Explanation: For connect 4, ANDs the mask with itself shifted by one step, then by two steps, per direction. Other lengths apply the precomputed run_shifts plan. Any surviving bit starts a winning run.
+    # Complexity: Best O(1); Average O(log connect); Worst O(log connect) shifts per direction on (rows+1)*columns-bit integers. Extra space O(1).
+    def has_line(self, mask: int) -> bool:
+        if self.connect == 4:
+            for shift in self._shifts:
+                pairs = mask & (mask >> shift)
+                if pairs & (pairs >> (2 * shift)):
+                    return True
+            return False
+        for shifts in self._line_shifts:
+            run = mask
+            for shift in shifts:
+                run &= run >> shift
+            if run:
+                return True
+        return False
+
+    # historical name; callers on connect-N boards get the board's own run length
+    has_four = has_line
+
+    def is_win(self, symbol: str) -> bool:
+        return self.has_line(self.masks.get(symbol, 0))
+
+    # Objective: Test whether playing col would win for symbol without mutating the board.
+    # Explanation: ORs the column's next bit into a copy of the player's mask and runs the shift test.
+    # Complexity: Best O(1); Average O(1); Worst O(1). Extra space O(1).
+    def wins_after(self, col: int, symbol: str) -> bool:
+        h = self.heights[col]
+        if h >= self.rows:
+            return False
+        return self.has_line(self.masks.get(symbol, 0) | (1 << (col * self.stride + h)))
+
+    # Objective: List every column where symbol wins immediately.
+    # Explanation: Applies wins_after to each playable column.
+    # Complexity: Best O(columns); Average O(columns); Worst O(columns). Extra space O(columns) for the result.
+    def winning_moves(self, symbol: str) -> List[int]:
+        return [col for col in range(self.columns) if self.wins_after(col, symbol)]
+
+    # Objective: Reflect a mask left-right (column c moves to columns-1-c).
+    # Explanation: Moves each column's stride-bit slice to its mirrored column.
+    # Complexity: Best/Average/Worst O(columns) big-int ops. Extra space O(1).
+    def mirror(self, mask: int) -> int:
+        stride = self.stride
+        column_bits = (1 << stride) - 1
+        last = self.columns - 1
+        mirrored = 0
+        for c in range(self.columns):
+            mirrored |= ((mask >> (c * stride)) & column_bits) << ((last - c) * stride)
+        return mirrored
+
+    def is_symmetric(self) -> bool:
+        return all(self.mirror(mask) == mask for mask in self.masks.values())
+
+    # Objective: Hash shared by a position and its mirror image, and whether the mirror was the one picked.
+    # Explanation: Takes the smaller of the two incremental keys; when `flipped` is True, moves stored under the key are in mirrored columns (col <-> columns-1-col).
+    # Complexity: Best/Average/Worst O(1). Extra space O(1).
+    def canonical_zobrist(self) -> Tuple[int, bool]:
+        if self.zobrist_mirror < self.zobrist:
+            return self.zobrist_mirror, True
+        return self.zobrist, False
+
+    def key(self) -> Tuple[int, ...]:
+        """Hashable position key: occupied mask plus each player's mask in symbol order."""
+        return (self.occupied,) + tuple(self.masks[symbol] for symbol in sorted(self.masks))
@@ -0,0 +1,273 @@
+import argparse
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from bitboard import BitBoard
+
+
+EMPTY = "*"
+# heights and game record headers hold a side length in one byte
+MAX_SIDE = 255
+
+_layouts: Dict[Tuple[int, int, int], Tuple[list, list, List[int]]] = {}
+
+# Same direction order as greedy.score_move; the four win-check axes use the first of each pair.
+_DISPLACEMENTS = [(1, 0), (0, 1), (-1, 0), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+_AXES = [(1, 0), (0, 1), (1, 1), (1, -1)]
+
+
+# Objective: Precompute per-cell index tables for one board size and run length.
+# Explanation: For every cell: the 8 scoring windows (the in-bounds cells score_direction would read, up to connect-1 steps), the 4 win-check axes as (forward ray, backward ray) of flat indices, and the center bonus of its column.
+# Complexity: Best O(1) when cached; Worst O(rows*columns*8*connect) on first use. Extra space O(rows*columns*8*connect).
+def board_layout(rows: int, columns: int, connect: int) -> Tuple[list, list, List[int]]:
+    layout = _layouts.get((rows, columns, connect))
+    if layout is None:
+
+        def ray(r: int, c: int, dx: int, dy: int) -> Tuple[int, ...]:
+            cells = []
+            for step in range(1, connect):
+                nx, ny = r + step * dx, c + step * dy
+                if not (0 <= nx < rows and 0 <= ny < columns):
+                    break
+                cells.append(nx * columns + ny)
+            return tuple(cells)
+
+        windows = []
+        axes = []
+        for r in range(rows):
+            for c in range(columns):
+                windows.append(tuple(ray(r, c, dx, dy) for dx, dy in _DISPLACEMENTS))
+                axes.append(tuple((ray(r, c, dx, dy), ray(r, c, -dx, -dy)) for dx, dy in _AXES))
+        center = [(columns // 2) - abs(c - (columns // 2)) for c in range(columns)]
+        layout = _layouts[(rows, columns, connect)] = (windows, axes, center)
+    return layout
+
+
+# Objective: Reject board sizes the engines and file formats cannot hold.
+# Explanation: Each side must be 1..MAX_SIDE and the run length 2..the longer side; raises ValueError with a message fit for the user.
+# Complexity: Best/Average/Worst O(1). Extra space O(1).
+def check_size(rows: int, columns: int, connect: int) -> None:
+    for name, value in (("rows", rows), ("columns", columns)):
+        if not 1 <= value <= MAX_SIDE:
+            raise ValueError("{0} must be between 1 and {1}, got {2}".format(name, MAX_SIDE, value))
+    if not 2 <= connect <= max(rows, columns):
+        raise ValueError("connect must be between 2 and {0} on a {1}x{2} board, got {3}".format(max(rows, columns), rows, columns, connect))
+
+
+# Objective: argparse type for --rows and --columns.
+# Explanation: Parses an int in 1..MAX_SIDE; the run length is checked against both sides with check_size after parsing.
+# Complexity: Best/Average/Worst O(len(text)). Extra space O(1).
+def board_side(text: str) -> int:
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError("not an integer: {0!r}".format(text))
+    if not 1 <= value <= MAX_SIDE:
+        raise argparse.ArgumentTypeError("must be between 1 and {0}, got {1}".format(MAX_SIDE, value))
+    return value
+
+
+class Board:
+    """Compact game position: one flat bytearray of cells plus column heights.
+
+    Cell ``r * columns + c`` holds 0 for empty or ``i + 1`` for ``symbols[i]``; row 0 is
+    the top row, as in the list-of-lists grid. ``history`` and ``redo_stack`` hold
+    ``(row, col, symbol)`` tuples in the same format as the grid API's move_history.
+
+    - `play`/`undo`/`redo` are the game-level moves (with history); `drop`/`lift` are
+      the history-free make/unmake used inside searches.
+    - `wins_at` and `score_move` read precomputed per-cell index tables, so they do no
+      bounds checks; `score_move` returns exactly greedy.score_move.
+    - `key()` is a hashable bytes key of the cells and `snapshot`/`restore` copy the
+      whole position in a few bytes-object copies.
+    """
+
+    __slots__ = ("rows", "columns", "connect", "symbols", "cells", "heights", "history", "redo_stack", "_codes", "_windows", "_axes", "_center")
+
+    def __init__(self, rows: int = 6, columns: int = 7, connect: int = 4, symbols: Sequence[str] = ("#", "O")):
+        check_size(rows, columns, connect)
+        self.rows = rows
+        self.columns = columns
+        self.connect = connect
+        self.symbols: List[str] = list(symbols)
+        self._codes: Dict[str, int] = {symbol: idx + 1 for idx, symbol in enumerate(self.symbols)}
+        self.cells = bytearray(rows * columns)
+        self.heights = bytearray(columns)
+        self.history: List[Tuple[int, int, str]] = []
+        self.redo_stack: List[Tuple[int, int, str]] = []
+        self._windows, self._axes, self._center = board_layout(rows, columns, connect)
+
+    # Objective: Build a Board from the list-of-lists grid and heights.
+    # Explanation: Encodes every non-empty cell (registering unseen symbols) and copies the heights; history is optional.
+    # Complexity: Best/Average/Worst O(rows*columns). Extra space O(rows*columns) bytes.
+    @classmethod
+    def from_grid(
+        cls,
+        grid: List[List[str]],
+        heights: Sequence[int],
+        rows: int,
+        columns: int,
+        connect: int = 4,
+        symbols: Sequence[str] = ("#", "O"),
+        history: Optional[List[Tuple[int, int, str]]] = None,
+        redo_stack: Optional[List[Tuple[int, int, str]]] = None,
+    ) -> "Board":
+        board = cls(rows, columns, connect, symbols)
+        cells = board.cells
+        for r in range(rows):
+            for c in range(columns):
+                symbol = grid[r][c]
+                if symbol != EMPTY:
+                    cells[r * columns + c] = board.code(symbol)
+        board.heights[:] = bytes(heights)
+        if history:
+            board.history = list(history)
+        if redo_stack:
+            board.redo_stack = list(redo_stack)
+        return board
+
+    def code(self, symbol: str) -> int:
+        code = self._codes.get(symbol)
+        if code is None:
+            self.symbols.append(symbol)
+            code = self._codes[symbol] = len(self.symbols)
+        return code
+
+    def cell(self, r: int, c: int) -> str:
+        code = self.cells[r * self.columns + c]
+        return self.symbols[code - 1] if code else EMPTY
+
+    # Objective: Render the cells back into the grid format used by print_grid and the grid API.
+    # Explanation: Decodes each row of the flat cell store.
+    # Complexity: Best/Average/Worst O(rows*columns). Extra space O(rows*columns).
+    def to_grid(self) -> List[List[str]]:
+        names = [EMPTY] + self.symbols
+        columns = self.columns
+        return [[names[code] for code in self.cells[r * columns:(r + 1) * columns]] for r in range(self.rows)]
+
+    def can_play(self, col: int) -> bool:
+        return 0 <= col < self.columns and self.heights[col] < self.rows
+
+    def available_moves(self) -> List[int]:
+        return [idx for idx, height in enumerate(self.heights) if height < self.rows]
+
+    def is_full(self) -> bool:
+        return all(height == self.rows for height in self.heights)
+
+    # Objective: History-free make for searches.
+    # Explanation: Writes the code into the column's next free cell and bumps the height.
+    # Complexity: Best/Average/Worst O(1). Extra space O(1).
+    def drop(self, col: int, code: int) -> int:
+        r = self.rows - self.heights[col] - 1
+        self.cells[r * self.columns + col] = code
+        self.heights[col] += 1
+        return r
+
+    def lift(self, col: int) -> None:
+        self.heights[col] -= 1
+        self.cells[(self.rows - self.heights[col] - 1) * self.columns + col] = 0
+
+    # Objective: Play a game move for symbol in col.
+    # Explanation: Drops the piece, records it in history and clears the redo stack (a new move invalidates redo).
+    # Complexity: Best/Average/Worst O(1). Extra space O(1) per history entry.
+    def play(self, col: int, symbol: str) -> Tuple[int, int]:
+        r = self.drop(col, self.code(symbol))
+        self.history.append((r, col, symbol))
+        self.redo_stack.clear()
+        return r, col
+
+    # Objective: Undo the latest game move, keeping it for redo.
+    # Explanation: Pops history, clears the cell and height and pushes the move to the redo stack.
+    # Complexity: Best/Average/Worst O(1). Extra space O(1).
+    def undo(self) -> Optional[Tuple[int, int, str]]:
+        if not self.history:
+            return None
+        move = self.history.pop()
+        self.lift(move[1])
+        self.redo_stack.append(move)
+        return move
+
+    # Objective: Reapply the most recently undone move.
+    # Explanation: Pops the redo stack and drops the piece into the column's next free row, like redo_move.
+    # Complexity: Best/Average/Worst O(1). Extra space O(1).
+    def redo(self) -> Optional[Tuple[int, int]]:
+        if not self.redo_stack:
+            return None
+        _, col, symbol = self.redo_stack.pop()
+        r = self.drop(col, self.code(symbol))
+        self.history.append((r, col, symbol))
+        return r, col
+
+    # Objective: Check whether the piece at (r, c) completes a run of `connect`.
+    # Explanation: For each of the 4 axes, counts matching codes along the precomputed forward and backward rays.
+    # Complexity: Best O(1); Average O(connect); Worst O(connect). Extra space O(1).
+    def wins_at(self, r: int, c: int) -> bool:
+        cells = self.cells
+        index = r * self.columns + c
+        code = cells[index]
+        if not code:
+            return False
+        need = self.connect - 1
+        for forward, backward in self._axes[index]:
+            count = 0
+            for other in forward:
+                if cells[other] != code:
+                    break
+                count += 1
+            for other in backward:
+                if cells[other] != code:
+                    break
+                count += 1
+            if count >= need:
+                return True
+        return False
+
+    def wins_after(self, col: int, symbol: str) -> bool:
+        if not self.can_play(col):
+            return False
+        r = self.drop(col, self.code(symbol))
+        win = self.wins_at(r, col)
+        self.lift(col)
+        return win
+
+    # Objective: greedy.score_move for the piece at (r, c) without touching the grid format.
+    # Explanation: Counts each side's codes in the 8 precomputed windows (up to connect-1 cells each) and applies the same 125*2^mine - 100*2^theirs terms plus the center bonus.
+    # Complexity: Best/Average/Worst O(8*(connect-1)). Extra space O(1).
+    def score_move(self, r: int, c: int, player_code: int, opponent_code: int) -> int:
+        cells = self.cells
+        total = self._center[c]
+        for window in self._windows[r * self.columns + c]:
+            mine = 0
+            theirs = 0
+            for other in window:
+                code = cells[other]
+                if code == player_code:
+                    mine += 1
+                elif code == opponent_code:
+                    theirs += 1
+            total += 125 * (1 << mine) - 100 * (1 << theirs)
+        return total
+
+    def key(self) -> bytes:
+        """Hashable position key: the cell bytes (heights follow from the cells)."""
+        return bytes(self.cells)
+
+    def snapshot(self) -> Tuple[bytes, bytes, Tuple, Tuple]:
+        return bytes(self.cells), bytes(self.heights), tuple(self.history), tuple(self.redo_stack)
+
+    def restore(self, snapshot: Tuple[bytes, bytes, Tuple, Tuple]) -> None:
+        cells, heights, history, redo_stack = snapshot
+        self.cells[:] = cells
+        self.heights[:] = heights
+        self.history = list(history)
+        self.redo_stack = list(redo_stack)
+
+    def copy(self) -> "Board":
+        other = Board(self.rows, self.columns, self.connect, self.symbols)
+        other.restore(self.snapshot())
+        return other
+
+    # Objective: Build the BitBoard view used by the win checks and Zobrist keys in the searches.
+    # Explanation: Same as BitBoard.from_grid, reading the flat cells column by column.
+    # Complexity: Best/Average/Worst O(rows*columns). Extra space O(columns).
+    def bitboard(self, symbols: Optional[Sequence[str]] = None) -> BitBoard:
+        return BitBoard.from_grid(self.to_grid(), list(self.heights), self.rows, self.columns, symbols or self.symbols, self.connect)
@@ -0,0 +1,215 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+LRU = "lru"
+DEPTH_PREFERRED = "depth"
+
+# Rough per-entry footprint (key tuple + value + OrderedDict node) used to turn a
+# byte budget into an entry budget without measuring every insert.
+APPROX_ENTRY_BYTES = 200
+
+_registry: Dict[str, "BoundedCache"] = {}
+
+# Returned by a store lookup that finds nothing (None is a valid cached value).
+MISSING = object()
+
+
+class BoundedCache:
+    """Size-bounded memo cache with hit/miss/eviction counters.
+
+    - `max_entries` caps the number of stored entries (`max_bytes` is converted using
+      APPROX_ENTRY_BYTES when given instead).
+    - `policy` is LRU (evict least recently used) or DEPTH_PREFERRED (among the
+      `sample` least recently used entries, evict the one computed at the lowest depth).
+      DEPTH_PREFERRED needs `has_depth`: only caches whose puts pass the search depth
+      (the threat cache) accept it; for the others every entry would tie and it would
+      just be LRU.
+    - `scope` tags the cache for `reset_caches`: "game" caches are cleared between games,
+      "search" caches before every bot search.
+    - `store` (see cache_store.py, set with `set_store`) backs the cache with a file:
+      misses are answered from the entries the store loaded into memory at startup and
+      puts are written through, so entries outlive the process and `clear`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 100_000,
+        max_bytes: Optional[int] = None,
+        policy: str = LRU,
+        scope: str = "game",
+        sample: int = 8,
+        has_depth: bool = False,
+    ):
+        self.has_depth = has_depth
+        _check_policy(self, policy)
+        self.name = name
+        self.policy = policy
+        self.scope = scope
+        self.sample = sample
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._depths: Dict[Hashable, int] = {}
+        self.max_entries = 1
+        self.set_budget(max_entries, max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.store_hits = 0
+        self.store = None
+        self._journal: Optional[List[Tuple[Hashable, Any, int]]] = None
+        _registry[name] = self
+
+    # Objective: Change the entry budget, evicting down to it immediately.
+    # Explanation: Converts a byte budget to entries when given, then trims the oldest entries.
+    # Complexity: Best O(1); Average O(evicted); Worst O(size). Extra space O(1).
+    def set_budget(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None) -> None:
+        if max_bytes is not None:
+            max_entries = max_bytes // APPROX_ENTRY_BYTES
+        if max_entries is not None:
+            self.max_entries = max(1, int(max_entries))
+        while len(self._data) > self.max_entries:
+            self._evict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    # Objective: Fetch a cached value and record a hit or miss.
+    # Explanation: On hit the entry moves to the most-recently-used end. A miss with a store attached falls through to its in-memory entries; a stored value is kept here too (without writing it back) and counts as a hit.
+    # Complexity: Best O(1); Average O(1); Worst O(1), the store lookup included. Extra space O(1).
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        data = self._data
+        if key in data:
+            self.hits += 1
+            data.move_to_end(key)
+            return data[key]
+        if self.store is not None:
+            value = self.store.get(self.name, key)
+            if value is not MISSING:
+                self.hits += 1
+                self.store_hits += 1
+                data[key] = value
+                if len(data) > self.max_entries:
+                    self._evict()
+                return value
+        self.misses += 1
+        return default
+
+    # Objective: Insert or refresh an entry, evicting when over budget.
+    # Explanation: Stores the value at the most-recently-used end (with its depth for the depth-preferred policy) and evicts one entry if the budget is exceeded.
+    # Complexity: Best O(1); Average O(1); Worst O(sample) for depth-preferred eviction. Extra space O(1) per entry.
+    def put(self, key: Hashable, value: Any, depth: int = 0) -> None:
+        data = self._data
+        data[key] = value
+        data.move_to_end(key)
+        if self._journal is not None:
+            self._journal.append((key, value, depth))
+        if self.store is not None:
+            self.store.put(self.name, key, value)
+        if self.policy == DEPTH_PREFERRED:
+            self._depths[key] = depth
+        if len(data) > self.max_entries:
+            self._evict()
+
+    def _evict(self) -> None:
+        data = self._data
+        if self.policy == LRU:
+            data.popitem(last=False)
+        else:
+            victim = None
+            victim_depth = None
+            for idx, key in enumerate(data):
+                if idx >= self.sample:
+                    break
+                key_depth = self._depths.get(key, 0)
+                if victim is None or key_depth < victim_depth:
+                    victim, victim_depth = key, key_depth
+            del data[victim]
+            self._depths.pop(victim, None)
+        self.evictions += 1
+
+    # Objective: Record every put from now on so another process can merge them.
+    # Explanation: Starts a fresh journal list of (key, value, depth); take_journal returns and stops it, and `merge` replays one.
+    # Complexity: Best O(1); Average O(1); Worst O(1). Extra space O(puts while recording).
+    def start_journal(self) -> None:
+        self._journal = []
+
+    def take_journal(self) -> List[Tuple[Hashable, Any, int]]:
+        journal = self._journal or []
+        self._journal = None
+        return journal
+
+    def merge(self, journal: List[Tuple[Hashable, Any, int]]) -> None:
+        for key, value, depth in journal:
+            self.put(key, value, depth)
+
+    # Objective: Drop all entries (per-game or per-search reset).
+    # Explanation: Clears storage; counters survive unless reset_stats is requested.
+    # Complexity: Best O(1); Average O(size); Worst O(size). Extra space O(1).
+    def clear(self, reset_stats: bool = False) -> None:
+        self._data.clear()
+        self._depths.clear()
+        if reset_stats:
+            self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.store_hits = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "policy": self.policy,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "store_hits": self.store_hits,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def _check_policy(cache: BoundedCache, policy: str) -> None:
+    if policy not in (LRU, DEPTH_PREFERRED):
+        raise ValueError("Unknown cache policy: {0}".format(policy))
+    if policy == DEPTH_PREFERRED and not cache.has_depth:
+        raise ValueError("Depth-preferred eviction needs a cache whose entries carry a depth")
+
+
+# Objective: Clear registered caches at a game or search boundary.
+# Explanation: Clears every cache whose scope matches (all caches when scope is None).
+# Complexity: Best O(caches); Average O(total entries); Worst O(total entries). Extra space O(1).
+def reset_caches(scope: Optional[str] = None, reset_stats: bool = False) -> None:
+    for cache in _registry.values():
+        if scope is None or cache.scope == scope:
+            cache.clear(reset_stats)
+
+
+# Objective: Adjust the budget or policy of a registered cache by name.
+# Explanation: Looks the cache up in the registry and applies the new limits; DEPTH_PREFERRED is rejected for caches without depths (the evaluation cache).
+# Complexity: Best O(1); Average O(evicted); Worst O(size). Extra space O(1).
+def configure_cache(name: str, max_entries: Optional[int] = None, max_bytes: Optional[int] = None, policy: Optional[str] = None) -> None:
+    cache = _registry[name]
+    if policy is not None:
+        _check_policy(cache, policy)
+        cache.policy = policy
+    cache.set_budget(max_entries, max_bytes)
+
+
+# Objective: Attach a persistent store to a registered cache by name (None detaches it).
+# Explanation: Looks the cache up in the registry and sets its store; see cache_store.attach_store.
+# Complexity: Best O(1); Average O(1); Worst O(1). Extra space O(1).
+def set_store(name: str, store) -> None:
+    _registry[name].store = store
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Counters for every registered cache, keyed by cache name."""
+    return {name: cache.stats() for name, cache in _registry.items()}
@@ -0,0 +1,273 @@
+"""Persistent store behind the in-memory evaluation and threat caches.
+
+A fresh process starts with empty `_eval_cache` (new_try) and `_bfs_cache`
+(hfunctions), so the first games after a restart recompute every leaf. Attaching a
+CacheStore keeps their entries in an SQLite file across runs:
+
+    - the file is read once, when the store is attached: up to each cache's
+      max_entries are loaded into a dict, and a BoundedCache miss (also after the
+      per-game clear) is answered from it without touching the disk;
+    - new entries are added to that dict and queued for a background thread, which
+      writes them in batches, one transaction per batch, so searches never wait on
+      the disk;
+    - the file is opened in WAL mode, so pool workers and several servers can read and
+      write it concurrently.
+
+Keys and values are stored as JSON (lists read back as tuples), which covers the
+int/str/None tuples the caches hold. The file is tagged with evaluation_fingerprint(),
+a hash of the code that computes the cached values and keys (evaluation.py, greedy.py,
+hfunctions.py, bitboard.py, new_try.evaluate_position and _canonical_key) with STORE_VERSION,
+the storage format. A file written by other code is emptied on open instead of serving
+stale values.
+
+Enable it with:
+    python main_game.py --cache-db evals.sqlite
+    python game_server.py --cache-db evals.sqlite
+"""
+
+import atexit
+import hashlib
+import inspect
+import json
+import os
+import queue
+import sqlite3
+import threading
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from cache import MISSING, cache_stats, set_store
+
+
+STORE_VERSION = 2  # storage format; evaluation changes are caught by evaluation_fingerprint
+DEFAULT_BATCH_SIZE = 512
+DEFAULT_CACHES = ("eval", "bfs")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS entries (cache TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+    "PRIMARY KEY (cache, key)) WITHOUT ROWID",
+)
+
+
+# Objective: Tag identifying the code behind the cached values.
+# Explanation: Hashes STORE_VERSION and the source of the modules and function that compute the evaluation and threat entries and their Zobrist keys, so any edit to them (even a comment) retires old files.
+# Complexity: O(size of the hashed source). Extra space O(1).
+def evaluation_fingerprint() -> str:
+    import bitboard
+    import evaluation
+    import greedy
+    import hfunctions
+    import new_try
+
+    digest = hashlib.sha1(str(STORE_VERSION).encode("ascii"))
+    for source in (bitboard, evaluation, greedy, hfunctions, new_try.evaluate_position, new_try._canonical_key):
+        digest.update(inspect.getsource(source).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _decode(text: str) -> Any:
+    return _tuples(json.loads(text))
+
+
+def _tuples(value: Any) -> Any:
+    return tuple(_tuples(item) for item in value) if isinstance(value, list) else value
+
+
+class CacheStore:
+    """SQLite-backed key/value store shared by named caches, with batched background writes.
+
+    Lookups only read the entries loaded into memory by `load`. Connections and the
+    writer thread belong to the process that opened them; a forked pool worker that
+    inherits the store keeps the loaded entries and opens its own connections on first
+    use.
+    """
+
+    def __init__(self, path: str, batch_size: int = DEFAULT_BATCH_SIZE, version: Optional[str] = None):
+        self.path = path
+        self.batch_size = batch_size
+        self.version = version if version is not None else evaluation_fingerprint()
+        self.reads = 0
+        self.read_hits = 0
+        self.written = 0
+        self._loaded: Dict[str, Dict[Hashable, Any]] = {}
+        self._limits: Dict[str, int] = {}
+        self._pid = None
+        self._local = threading.local()
+        self._pending: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        self._queue: Optional["queue.Queue"] = None
+        self._writer: Optional[threading.Thread] = None
+        self._closed = False
+        self._prepare()
+
+    # Objective: Create the schema and discard entries written by other code (another fingerprint).
+    # Explanation: Runs once per process on a short-lived connection with a busy timeout, so concurrent openers wait for each other instead of failing.
+    # Complexity: Best O(1); Worst O(entries) when an outdated file is emptied. Extra space O(1).
+    def _prepare(self) -> None:
+        connection = self._connect()
+        try:
+            with connection:
+                for statement in _SCHEMA:
+                    connection.execute(statement)
+                row = connection.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+                if row is None or row[0] != str(self.version):
+                    connection.execute("DELETE FROM entries")
+                    connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(self.version),))
+        finally:
+            connection.close()
+        self._pid = os.getpid()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    # Objective: Reset per-process state after a fork.
+    # Explanation: A child inherits the parent's pending batch and thread handles but not its thread, so it starts with its own empty queue and connections.
+    # Complexity: Best/Average/Worst O(1). Extra space O(1).
+    def _check_process(self) -> None:
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._local = threading.local()
+            self._pending = {}
+            self._lock = threading.Lock()
+            self._queue = None
+            self._writer = None
+
+    def _reader(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    # Objective: Read a cache's entries from the file into memory, once.
+    # Explanation: Decodes up to `limit` rows into the dict that get answers from; later puts are added to it until it holds `limit` entries. Returns the number loaded.
+    # Complexity: O(min(entries, limit)) rows read and decoded. Extra space O(limit).
+    def load(self, cache: str, limit: int) -> int:
+        rows = self._reader().execute("SELECT key, value FROM entries WHERE cache = ? LIMIT ?", (cache, limit))
+        loaded = self._loaded.setdefault(cache, {})
+        for key, value in rows:
+            loaded[_decode(key)] = _decode(value)
+        self._limits[cache] = limit
+        return len(loaded)
+
+    # Objective: Look a cache key up among the loaded entries.
+    # Explanation: A dict lookup, never a disk read; returns MISSING when absent or when the cache was never loaded.
+    # Complexity: Best/Average/Worst O(1). Extra space O(1).
+    def get(self, cache: str, key: Hashable) -> Any:
+        self.reads += 1
+        loaded = self._loaded.get(cache)
+        value = loaded.get(key, MISSING) if loaded is not None else MISSING
+        if value is not MISSING:
+            self.read_hits += 1
+        return value
+
+    # Objective: Keep an entry in memory and queue it for writing.
+    # Explanation: Adds it to the loaded dict while that is under its limit and to the pending batch, which is handed to the writer thread once it holds batch_size entries.
+    # Complexity: Best/Average O(1); Worst O(batch_size) to hand a batch over. Extra space O(batch_size).
+    def put(self, cache: str, key: Hashable, value: Any) -> None:
+        self._check_process()
+        if self._closed:
+            return
+        loaded = self._loaded.get(cache)
+        if loaded is not None and len(loaded) < self._limits[cache]:
+            loaded[key] = value
+        self._pending[(cache, json.dumps(key))] = json.dumps(value)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    # Objective: Hand the pending batch to the writer thread without waiting for the disk.
+    # Explanation: Starts the writer on first use.
+    # Complexity: Best/Average/Worst O(pending). Extra space O(pending).
+    def flush(self) -> None:
+        self._check_process()
+        if not self._pending:
+            return
+        with self._lock:
+            batch = [(cache, key, value) for (cache, key), value in self._pending.items()]
+            self._pending = {}
+            if self._writer is None:
+                self._queue = queue.Queue()
+                self._writer = threading.Thread(target=self._write_loop, args=(self._queue,), name="cache-store-writer", daemon=True)
+                self._writer.start()
+            self._queue.put(batch)
+
+    # Objective: Write queued batches until told to stop.
+    # Explanation: Each batch is one INSERT OR REPLACE transaction on the thread's own connection; None ends the loop.
+    # Complexity: O(entries written * log entries). Extra space O(batch_size).
+    def _write_loop(self, batches: "queue.Queue") -> None:
+        connection = self._connect()
+        try:
+            while True:
+                batch = batches.get()
+                if batch is None:
+                    break
+                with connection:
+                    connection.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", batch)
+                self.written += len(batch)
+        finally:
+            connection.close()
+
+    # Objective: Write everything still pending and stop the writer.
+    # Explanation: Flushes, sends the stop marker and waits for the thread, so entries are on disk when close returns.
+    # Complexity: O(pending writes). Extra space O(1).
+    def close(self) -> None:
+        self._check_process()
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def __len__(self) -> int:
+        return self._reader().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": self.path, "reads": self.reads, "read_hits": self.read_hits, "written": self.written}
+
+
+_attached: List[CacheStore] = []
+
+
+# Objective: Back the named in-memory caches with a store file.
+# Explanation: Opens the store, loads each cache's entries (up to its max_entries) and sets the store on the BoundedCache (their modules must already be imported), and closes it at interpreter exit so the last batch is written. Module-level so it can serve as a process-pool initializer.
+# Complexity: O(entries loaded). Extra space O(entries loaded + batch_size).
+def attach_store(path: str, caches: Sequence[str] = DEFAULT_CACHES, batch_size: int = DEFAULT_BATCH_SIZE) -> CacheStore:
+    # importing the search modules registers their caches ("eval", "bfs")
+    import hfunctions
+    import new_try
+
+    store = CacheStore(path, batch_size)
+    limits = cache_stats()
+    for name in caches:
+        store.load(name, limits[name]["max_entries"])
+        set_store(name, store)
+    _attached.append(store)
+    atexit.register(store.close)
+    return store
+
+
+# Objective: Hand every attached store's pending entries to its writer.
+# Explanation: Pool workers call this after each search; their processes exit without running atexit handlers.
+# Complexity: O(pending). Extra space O(pending).
+def flush_stores() -> None:
+    for store in _attached:
+        store.flush()
+
+
+# Objective: Disconnect the caches from their store and write what is pending.
+# Explanation: Clears the store from each named cache, then closes every store attached by this process.
+# Complexity: O(pending writes). Extra space O(1).
+def detach_store(caches: Sequence[str] = DEFAULT_CACHES) -> None:
+    for name in caches:
+        set_store(name, None)
+    while _attached:
+        _attached.pop().close()
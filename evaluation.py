@@ -0,0 +1,133 @@
+from typing import Dict, List, Tuple
+
+
+# Same eight directions and (connect 4) step count as greedy.score_move / score_direction;
+# connect-N boards use connect - 1 steps.
+DISPLACEMENTS = [
+    (1, 0),
+    (0, 1),
+    (-1, 0),
+    (0, -1),
+    (1, 1),
+    (1, -1),
+    (-1, 1),
+    (-1, -1),
+]
+STEPS = 3
+
+_layouts: Dict[Tuple[int, int, int], Tuple[List[List[int]], List[int]]] = {}
+
+
+# Objective: Precompute which scoring windows pass through each cell.
+# Explanation: Window `cell * 8 + d` is the run of up to `steps` in-bounds cells that score_direction reads from `cell` along displacement d. For each cell we list the windows that contain it, plus each cell's center bonus. This is the board's precomputed line index, built once per (rows, columns, steps).
+# Complexity: Best O(1) when cached; Worst O(rows*columns*8*steps) on first use. Extra space O(rows*columns*8*steps).
+def window_layout(rows: int, columns: int, steps: int = STEPS) -> Tuple[List[List[int]], List[int]]:
+    layout = _layouts.get((rows, columns, steps))
+    if layout is None:
+        through: List[List[int]] = [[] for _ in range(rows * columns)]
+        for r in range(rows):
+            for c in range(columns):
+                origin = r * columns + c
+                for d, (dx, dy) in enumerate(DISPLACEMENTS):
+                    for step in range(1, steps + 1):
+                        nx, ny = r + step * dx, c + step * dy
+                        if not (0 <= nx < rows and 0 <= ny < columns):
+                            break
+                        through[nx * columns + ny].append(origin * 8 + d)
+        center = [(columns // 2) - abs(c - (columns // 2)) for _ in range(rows) for c in range(columns)]
+        layout = _layouts[(rows, columns, steps)] = (through, center)
+    return layout
+
+
+class IncrementalEvaluator:
+    """Running value of the piece heuristic used by `evaluate_position`.
+
+    The score is the sum of `score_move` over every occupied cell (positive for
+    `player`, negative for `opponent`). `score_move` is built from one term per
+    (cell, direction) window that depends only on how many of each side's pieces sit
+    in that window, so the evaluator keeps those counts and adjusts the total when a
+    piece enters or leaves a window. `place`/`remove` cost O(windows touching the cell)
+    (at most 8 * (connect - 1), i.e. 24 for connect 4) and `total` is read in O(1).
+    """
+
+    __slots__ = ("rows", "columns", "connect", "player", "opponent", "total", "_owner", "_counts", "_through", "_center")
+
+    def __init__(self, player: str, opponent: str, rows: int = 6, columns: int = 7, connect: int = 4):
+        self.rows = rows
+        self.columns = columns
+        self.connect = connect
+        self.player = player
+        self.opponent = opponent
+        self.total = 0
+        self._through, self._center = window_layout(rows, columns, connect - 1)
+        # owner per cell: 0 = player, 1 = opponent, -1 = empty
+        self._owner = [-1] * (rows * columns)
+        # per-window piece counts for player and opponent
+        self._counts = ([0] * (rows * columns * 8), [0] * (rows * columns * 8))
+
+    # Objective: Build an evaluator for an existing grid.
+    # Explanation: Places every occupied cell in turn, which leaves the same total as scanning with score_move.
+    # Complexity: Best O(rows*columns); Average O(rows*columns*8*(connect-1)); Worst O(rows*columns*8*(connect-1)). Extra space O(rows*columns*8).
+    @classmethod
+    def from_grid(
+        cls, grid: List[List[str]], player: str, opponent: str, rows: int, columns: int, connect: int = 4
+    ) -> "IncrementalEvaluator":
+        evaluator = cls(player, opponent, rows, columns, connect)
+        for r in range(rows):
+            for c in range(columns):
+                if grid[r][c] == player or grid[r][c] == opponent:
+                    evaluator.place(r, c, grid[r][c])
+        return evaluator
+
+    def _cell_score(self, cell: int, side: int) -> int:
+        mine = self._counts[side]
+        theirs = self._counts[1 - side]
+        base = cell * 8
+        score = self._center[cell]
+        for w in range(base, base + 8):
+            score += 125 * (1 << mine[w]) - 100 * (1 << theirs[w])
+        return score
+
+    # Objective: Account for a piece dropped at (r, c).
+    # Explanation: Bumps the count of every window through the cell, re-scoring that window for its occupied origin, then adds the new piece's own score.
+    # Complexity: Best O(1); Average O(8*(connect-1)); Worst O(8*(connect-1)). Extra space O(1).
+    def place(self, r: int, c: int, symbol: str) -> None:
+        cell = r * self.columns + c
+        side = 0 if symbol == self.player else 1
+        owner = self._owner
+        counts = self._counts[side]
+        delta = 0
+        for w in self._through[cell]:
+            origin_side = owner[w >> 3]
+            if origin_side == -1:
+                counts[w] += 1
+                continue
+            # only the window's own term changes: 125*2^mine - 100*2^theirs
+            before = 1 << counts[w]
+            counts[w] += 1
+            change = 125 * before if origin_side == side else -100 * before
+            delta += change if origin_side == 0 else -change
+        owner[cell] = side
+        own = self._cell_score(cell, side)
+        self.total += delta + (own if side == 0 else -own)
+
+    # Objective: Account for the piece at (r, c) being removed.
+    # Explanation: Exact inverse of place: drops the piece's own score, then decrements every window through the cell.
+    # Complexity: Best O(1); Average O(8*(connect-1)); Worst O(8*(connect-1)). Extra space O(1).
+    def remove(self, r: int, c: int) -> None:
+        cell = r * self.columns + c
+        owner = self._owner
+        side = owner[cell]
+        own = self._cell_score(cell, side)
+        owner[cell] = -1
+        counts = self._counts[side]
+        delta = 0
+        for w in self._through[cell]:
+            origin_side = owner[w >> 3]
+            counts[w] -= 1
+            if origin_side == -1:
+                continue
+            after = 1 << counts[w]
+            change = 125 * after if origin_side == side else -100 * after
+            delta += change if origin_side == 0 else -change
+        self.total -= delta + (own if side == 0 else -own)
@@ -0,0 +1,214 @@
+"""Game records: save finished games compactly and replay them as a stream.
+
+Two formats hold the same information (board size, run length, result, columns played):
+
+Text, one game per line (blank lines and lines starting with ";" are skipped):
+    6x7x4 1 4455667
+    size rows x columns x connect, result ("1", "2", "d" for a draw, "-" unfinished),
+    then one character per move: the 1-based column as in the game prompt ("1"-"9",
+    then "A"-"Z" for columns 10-35).
+
+Binary (little-endian), for archives:
+    header : magic b"C4GR", version (uint8)
+    games  : rows, columns, connect, result (4 x uint8), move count (uint16), then the
+             0-based columns, two per byte (high nibble first) when the board has at
+             most 16 columns, otherwise one per byte.
+
+`GameWriter` appends one game at a time and flushes it, so a crash loses at most the
+game in progress. `read_games` is a generator that detects the format from the first
+bytes and holds one game in memory at a time. Record games from play with:
+    python main_game.py --record games.txt
+"""
+
+import struct
+from typing import BinaryIO, Iterator, List, Optional, Sequence, Union
+
+from board import Board, check_size
+
+
+MAGIC = b"C4GR"
+VERSION = 1
+HEADER = struct.Struct("<4sB")
+GAME = struct.Struct("<BBBBH")
+
+COLUMN_CHARS = "123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+RESULTS = "-12d"  # result code -> text character
+UNFINISHED, FIRST_WINS, SECOND_WINS, DRAW = range(4)
+
+
+class GameRecord:
+    """One recorded game: board size, run length, result code and 0-based columns played."""
+
+    __slots__ = ("rows", "columns", "connect", "result", "moves")
+
+    def __init__(self, moves: Sequence[int], rows: int = 6, columns: int = 7, connect: int = 4, result: int = UNFINISHED):
+        self.rows = rows
+        self.columns = columns
+        self.connect = connect
+        self.result = result
+        self.moves: List[int] = list(moves)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, GameRecord) and self.to_text() == other.to_text()
+
+    def __repr__(self) -> str:
+        return "GameRecord({0!r})".format(self.to_text())
+
+    # Objective: Record the game held by a Board.
+    # Explanation: Takes the columns from the board's history; the result is the mover of the last move if it completed a line, a draw if the board is full, otherwise unfinished. The first symbol in board.symbols is player 1.
+    # Complexity: Best/Average/Worst O(moves + connect). Extra space O(moves).
+    @classmethod
+    def from_board(cls, board: Board) -> "GameRecord":
+        result = UNFINISHED
+        if board.history:
+            r, c, symbol = board.history[-1]
+            if board.wins_at(r, c):
+                result = FIRST_WINS if symbol == board.symbols[0] else SECOND_WINS
+            elif board.is_full():
+                result = DRAW
+        return cls([c for _, c, _ in board.history], board.rows, board.columns, board.connect, result)
+
+    def to_text(self) -> str:
+        if self.columns > len(COLUMN_CHARS):
+            raise ValueError("The text format holds at most {0} columns".format(len(COLUMN_CHARS)))
+        moves = "".join(COLUMN_CHARS[col] for col in self.moves)
+        return "{0}x{1}x{2} {3} {4}".format(self.rows, self.columns, self.connect, RESULTS[self.result], moves).rstrip()
+
+    # Objective: Parse one text-format line.
+    # Explanation: Splits size, result and move string (rejecting sizes Board does not accept) and maps each move character back to a 0-based column.
+    # Complexity: Best/Average/Worst O(moves). Extra space O(moves).
+    @classmethod
+    def from_text(cls, line: str) -> "GameRecord":
+        fields = line.split()
+        if len(fields) not in (2, 3):
+            raise ValueError("Bad game record line: {0!r}".format(line))
+        rows, columns, connect = (int(part) for part in fields[0].split("x"))
+        check_size(rows, columns, connect)
+        moves = [COLUMN_CHARS.index(char) for char in fields[2].upper()] if len(fields) == 3 else []
+        return cls(moves, rows, columns, connect, RESULTS.index(fields[1]))
+
+    # Objective: Encode the game in the binary format.
+    # Explanation: Checks the size fits the one-byte header fields, packs them with struct, then two 4-bit columns per byte when they fit (an odd count leaves the last low nibble 0).
+    # Complexity: Best/Average/Worst O(moves). Extra space O(moves) bytes.
+    def to_bytes(self) -> bytes:
+        check_size(self.rows, self.columns, self.connect)
+        header = GAME.pack(self.rows, self.columns, self.connect, self.result, len(self.moves))
+        if self.columns > 16:
+            return header + bytes(self.moves)
+        moves = self.moves + [0] if len(self.moves) % 2 else self.moves
+        return header + bytes((moves[i] << 4) | moves[i + 1] for i in range(0, len(moves), 2))
+
+    # Objective: Replay the recorded moves onto a fresh Board.
+    # Explanation: Plays the columns alternately for the two symbols (player 1 first), so the Board's history and win checks are available for analysis.
+    # Complexity: Best/Average/Worst O(moves). Extra space O(rows*columns) bytes.
+    def replay(self, symbols: Sequence[str] = ("#", "O")) -> Board:
+        board = Board(self.rows, self.columns, self.connect, symbols)
+        for ply, col in enumerate(self.moves):
+            board.play(col, symbols[ply % 2])
+        return board
+
+
+def _packed_size(count: int, columns: int) -> int:
+    return count if columns > 16 else (count + 1) // 2
+
+
+# Objective: Decode binary games one at a time from a stream positioned after the header.
+# Explanation: Reads each fixed header, then exactly the packed move bytes it announces, and unpacks the nibbles; a truncated final game (e.g. a crash mid-write) raises ValueError.
+# Complexity: Best/Average/Worst O(total moves). Extra space O(moves of one game).
+def _read_binary(stream: BinaryIO) -> Iterator[GameRecord]:
+    while True:
+        header = stream.read(GAME.size)
+        if not header:
+            return
+        if len(header) < GAME.size:
+            raise ValueError("Truncated game record")
+        rows, columns, connect, result, count = GAME.unpack(header)
+        data = stream.read(_packed_size(count, columns))
+        if len(data) < _packed_size(count, columns):
+            raise ValueError("Truncated game record")
+        if columns > 16:
+            moves = list(data)
+        else:
+            moves = []
+            for byte in data:
+                moves.append(byte >> 4)
+                moves.append(byte & 0x0F)
+            del moves[count:]
+        yield GameRecord(moves, rows, columns, connect, result)
+
+
+# Objective: Stream the games stored in a text or binary record file.
+# Explanation: Opens a path (or uses an already open binary stream such as sys.stdin.buffer), peeks at the first bytes to pick the format, then yields one GameRecord per game without reading ahead. A truncated header or game raises ValueError.
+# Complexity: Best/Average/Worst O(total moves). Extra space O(moves of one game) plus the stream buffer.
+def read_games(source: Union[str, BinaryIO]) -> Iterator[GameRecord]:
+    stream = open(source, "rb") if isinstance(source, str) else source
+    try:
+        if stream.peek(len(MAGIC))[:len(MAGIC)] == MAGIC:
+            header = stream.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError("Truncated game record header")
+            magic, version = HEADER.unpack(header)
+            if version != VERSION:
+                raise ValueError("Unsupported game record version: {0}".format(version))
+            yield from _read_binary(stream)
+            return
+        for line in stream:
+            line = line.decode("ascii").strip()
+            if line and not line.startswith(";"):
+                yield GameRecord.from_text(line)
+    finally:
+        if stream is not source:
+            stream.close()
+
+
+class GameWriter:
+    """Appends games to a record file, one complete game per write, flushed immediately.
+
+    The format follows the file: binary when `binary` is set or the path ends in ".bin",
+    text otherwise. An existing binary file is appended to after checking its header.
+    """
+
+    def __init__(self, path: str, binary: Optional[bool] = None):
+        self.path = path
+        self.binary = path.endswith(".bin") if binary is None else binary
+        self._file = open(path, "ab")
+        if self.binary:
+            if self._file.tell() == 0:
+                self._file.write(HEADER.pack(MAGIC, VERSION))
+            else:
+                with open(path, "rb") as existing:
+                    if existing.read(HEADER.size) != HEADER.pack(MAGIC, VERSION):
+                        self._file.close()
+                        raise ValueError("Not a binary game record file: {0}".format(path))
+        self.count = 0
+
+    def write(self, record: GameRecord) -> None:
+        data = record.to_bytes() if self.binary else (record.to_text() + "\n").encode("ascii")
+        self._file.write(data)
+        self._file.flush()
+        self.count += 1
+
+    def write_board(self, board: Board) -> None:
+        self.write(GameRecord.from_board(board))
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self) -> "GameWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# Objective: Append one game to a record destination given as a path or an open GameWriter.
+# Explanation: Opens (and closes) a writer for a path; an open writer is written to and left open for the next game.
+# Complexity: Best/Average/Worst O(moves). Extra space O(moves).
+def append_game(destination: Union[str, GameWriter], board: Board) -> None:
+    writer = GameWriter(destination) if isinstance(destination, str) else destination
+    try:
+        writer.write_board(board)
+    finally:
+        if writer is not destination:
+            writer.close()
@@ -0,0 +1,321 @@
+"""Local multi-session game server: JSON lines over TCP or a Unix socket.
+
+Each connection is one session holding one game (human vs bot). Every request is one
+JSON object per line and gets exactly one JSON reply line:
+
+    {"op": "new", "engine": "beam", "rows": 6, "columns": 7, "connect": 4, "bot_first": false}
+    {"op": "move", "col": 3}        human move (0-based column); the reply includes the bot's answer
+    {"op": "undo"}                  take back the bot's answer and the human move before it
+    {"op": "state"}
+    {"op": "quit"}
+
+Replies carry "ok" and, on success, the position: "board" (rows of "*"/"#"/"O", top row
+first), "moves" (game_record column string), "to_move", "result" ("-" while playing,
+"1"/"2" for a win, "d" for a draw) and "bot" (the bot's last column, if it just moved).
+Errors are {"ok": false, "error": "..."}; the session stays usable.
+
+Bot searches run in a process pool so they never block the event loop or share the
+per-process search caches. With `cache_db`, every worker backs its evaluation and
+threat caches with that file (cache_store.py), so a restarted server plays at full
+speed from its first search. Load is bounded in three ways:
+    - at most `max_sessions` connections; extra connections get an error and are closed;
+    - at most `max_pending` searches queued or running; a move that cannot get a slot
+      within `queue_timeout` is rejected with "server busy" and not applied;
+    - a search taking longer than `search_timeout` is answered with the greedy move
+      instead, and a session idle for `idle_timeout` seconds is closed.
+Replies are written with `drain()`, and each session handles one request at a time, so
+a client that does not read its replies stops being read from.
+
+Run it with:
+    python game_server.py --port 8765 --workers 4
+    python game_server.py --unix /tmp/connect4.sock
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from board import Board
+from cache_store import attach_store, flush_stores
+from game_record import COLUMN_CHARS, RESULTS, GameRecord, GameWriter, append_game
+from greedy import greedy_on_board
+from new_try import ENGINES, engine_bot_move
+
+
+HUMAN = "#"
+BOT = "O"
+MAX_SIDE = 20
+
+
+# Objective: Run one bot search inside a pool worker.
+# Explanation: Module-level so it can be pickled; the position arrives as plain heights and grid lists and the worker's own caches serve every session it handles. New cache entries are handed to the store's writer afterwards, since workers exit without flushing.
+# Complexity: That of the engine. Extra space that of the engine.
+def _search(engine: str, heights: List[int], grid: List[List[str]], rows: int, columns: int, connect: int) -> Optional[int]:
+    col = engine_bot_move(engine, BOT, HUMAN, heights, grid, rows, columns, connect=connect)
+    flush_stores()
+    return col
+
+
+class Session:
+    """One connection's game: the Board, the engine name and the last bot column.
+
+    The side moving first is the Board's first symbol, so records list it as player 1.
+    """
+
+    __slots__ = ("board", "engine", "bot_col")
+
+    def __init__(self, engine: str = "beam", rows: int = 6, columns: int = 7, connect: int = 4, bot_first: bool = False):
+        self.board = Board(rows, columns, connect, (BOT, HUMAN) if bot_first else (HUMAN, BOT))
+        self.engine = engine
+        self.bot_col: Optional[int] = None
+
+    def result(self) -> str:
+        return RESULTS[GameRecord.from_board(self.board).result]
+
+    def to_move(self) -> str:
+        return self.board.symbols[len(self.board.history) % 2]
+
+    def state(self) -> dict:
+        board = self.board
+        return {
+            "ok": True,
+            "board": ["".join(row) for row in board.to_grid()],
+            "moves": "".join(COLUMN_CHARS[col] for _, col, _ in board.history),
+            "to_move": self.to_move(),
+            "result": self.result(),
+            "bot": self.bot_col,
+        }
+
+
+class GameServer:
+    """Hosts many concurrent sessions and dispatches bot searches to a bounded process pool."""
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_sessions: int = 64,
+        max_pending: Optional[int] = None,
+        queue_timeout: float = 5.0,
+        search_timeout: float = 30.0,
+        idle_timeout: float = 600.0,
+        record: Optional[str] = None,
+        cache_db: Optional[str] = None,
+    ):
+        self.workers = workers
+        self.max_sessions = max_sessions
+        self.max_pending = max_pending if max_pending is not None else 4 * workers
+        self.queue_timeout = queue_timeout
+        self.search_timeout = search_timeout
+        self.idle_timeout = idle_timeout
+        self.recorder = GameWriter(record) if record else None
+        self.cache_db = cache_db
+        self.sessions = 0
+        self.searches = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    # Objective: Start listening on TCP or a Unix socket.
+    # Explanation: Creates the process pool (attaching the cache store in each worker) and the search-slot semaphore on the running loop, then starts the asyncio server.
+    # Complexity: O(workers) to start the pool lazily. Extra space O(workers).
+    async def start(self, host: str = "127.0.0.1", port: int = 8765, unix_path: Optional[str] = None) -> asyncio.AbstractServer:
+        if self.cache_db:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=attach_store, initargs=(self.cache_db,))
+        else:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        self._slots = asyncio.Semaphore(self.max_pending)
+        if unix_path is not None:
+            return await asyncio.start_unix_server(self.handle_client, path=unix_path)
+        return await asyncio.start_server(self.handle_client, host, port)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self.recorder is not None:
+            self.recorder.close()
+
+    # Objective: Serve one connection until it quits, goes idle or disconnects.
+    # Explanation: Reads one line at a time (each with the idle timeout), answers it and drains the writer before reading the next, so a slow reader throttles only its own session.
+    # Complexity: O(requests) plus the bot searches. Extra space O(rows*columns) for the session.
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        if self.sessions >= self.max_sessions:
+            await self._send(writer, {"ok": False, "error": "too many sessions"})
+            writer.close()
+            return
+        self.sessions += 1
+        session = Session()
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    await self._send(writer, {"ok": False, "error": "idle timeout"})
+                    break
+                except ValueError:
+                    await self._send(writer, {"ok": False, "error": "line too long"})
+                    break
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                except ValueError as exc:
+                    await self._send(writer, {"ok": False, "error": "bad request: {0}".format(exc)})
+                    continue
+                if request.get("op") == "quit":
+                    await self._send(writer, {"ok": True})
+                    break
+                try:
+                    session, reply = await self.handle_request(session, request)
+                except Exception as exc:
+                    # one bad request must not drop the connection; the session is kept as it was
+                    reply = {"ok": False, "error": "request failed: {0}".format(exc)}
+                await self._send(writer, reply)
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            self._record(session)
+            writer.close()
+
+    async def _send(self, writer: asyncio.StreamWriter, reply: dict) -> None:
+        writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+        await writer.drain()
+
+    def _record(self, session: Session) -> None:
+        if self.recorder is not None and session.board.history:
+            append_game(self.recorder, session.board)
+
+    # Objective: Apply one request to a session.
+    # Explanation: Dispatches on "op"; "new" replaces the session (recording the old game), "move" plays the human move and then the bot's answer, "undo" takes back one human/bot move pair.
+    # Complexity: O(rows*columns) plus at most one bot search. Extra space O(rows*columns).
+    async def handle_request(self, session: Session, request: dict):
+        op = request.get("op")
+        if op == "new":
+            engine = request.get("engine", "beam")
+            rows, columns, connect = (request.get(name, default) for name, default in (("rows", 6), ("columns", 7), ("connect", 4)))
+            if engine not in ENGINES:
+                return session, {"ok": False, "error": "unknown engine {0!r}; choose from {1}".format(engine, ", ".join(ENGINES))}
+            if not all(isinstance(value, int) and not isinstance(value, bool) for value in (rows, columns, connect)) or not (
+                1 <= rows <= MAX_SIDE and 1 <= columns <= MAX_SIDE and 2 <= connect <= max(rows, columns)
+            ):
+                return session, {"ok": False, "error": "bad board size"}
+            self._record(session)
+            bot_first = bool(request.get("bot_first"))
+            session = Session(engine, rows, columns, connect, bot_first)
+            if bot_first:
+                error = await self._bot_turn(session)
+                if error is not None:
+                    return Session(engine, rows, columns, connect), error
+            return session, session.state()
+        if op == "state":
+            return session, session.state()
+        if op == "undo":
+            board = session.board
+            if len(board.history) < 2 or board.history[-1][2] != BOT:
+                return session, {"ok": False, "error": "nothing to undo"}
+            board.undo()
+            board.undo()
+            session.bot_col = None
+            return session, session.state()
+        if op == "move":
+            board = session.board
+            col = request.get("col")
+            if session.result() != "-":
+                return session, {"ok": False, "error": "game is over"}
+            if not isinstance(col, int) or not board.can_play(col):
+                return session, {"ok": False, "error": "illegal move"}
+            return session, await self._human_move(session, col)
+        return session, {"ok": False, "error": "unknown op {0!r}".format(op)}
+
+    # Objective: Play the human move and, unless it ends the game, the bot's answer.
+    # Explanation: Reserves a search slot before touching the board, so a busy server rejects the move without changing the position.
+    # Complexity: O(1) plus one bot search. Extra space O(rows*columns).
+    async def _human_move(self, session: Session, col: int) -> dict:
+        board = session.board
+        r, c = board.play(col, HUMAN)
+        session.bot_col = None
+        if board.wins_at(r, c) or board.is_full():
+            return session.state()
+        error = await self._bot_turn(session)
+        if error is not None:
+            board.undo()
+            board.redo_stack.pop()
+            return error
+        return session.state()
+
+    # Objective: Search and play the bot's move within the load limits.
+    # Explanation: Waits up to queue_timeout for a search slot (else returns a "server busy" error), runs the engine in the pool with search_timeout (falling back to greedy_on_board), and releases the slot only when the worker finishes, so abandoned searches still count against max_pending.
+    # Complexity: That of the engine, capped by search_timeout. Extra space O(rows*columns) for the copies sent to the worker.
+    async def _bot_turn(self, session: Session) -> Optional[dict]:
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            return {"ok": False, "error": "server busy, try again"}
+        board = session.board
+        loop = asyncio.get_running_loop()
+        self.searches += 1
+        future = loop.run_in_executor(
+            self._pool, _search, session.engine, list(board.heights), board.to_grid(), board.rows, board.columns, board.connect
+        )
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            col = await asyncio.wait_for(asyncio.shield(future), self.search_timeout)
+        except Exception:
+            # timed out (the worker keeps its slot until it finishes) or the search failed
+            col = None
+        if col is None or not board.can_play(col):
+            col = greedy_on_board(BOT, HUMAN, board)
+        board.play(col, BOT)
+        session.bot_col = col
+        return None
+
+
+async def serve(server: GameServer, host: str, port: int, unix_path: Optional[str]) -> None:
+    listener = await server.start(host, port, unix_path)
+    where = unix_path or "{0}:{1}".format(host, port)
+    print("Serving Connect N on {0} ({1} search workers)".format(where, server.workers))
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve concurrent Connect N games as JSON lines.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1), help="search processes")
+    parser.add_argument("--max-sessions", type=int, default=64)
+    parser.add_argument("--max-pending", type=int, help="searches queued or running (default 4 per worker)")
+    parser.add_argument("--queue-timeout", type=float, default=5.0, help="seconds to wait for a search slot")
+    parser.add_argument("--search-timeout", type=float, default=30.0, help="seconds before falling back to greedy")
+    parser.add_argument("--idle-timeout", type=float, default=600.0, help="seconds before closing an idle session")
+    parser.add_argument("--record", help="append finished games to this game record file")
+    parser.add_argument("--cache-db", help="SQLite file backing the workers' evaluation and threat caches")
+    args = parser.parse_args(argv)
+    server = GameServer(
+        args.workers,
+        args.max_sessions,
+        args.max_pending,
+        args.queue_timeout,
+        args.search_timeout,
+        args.idle_timeout,
+        args.record,
+        args.cache_db,
+    )
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
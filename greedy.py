@@ -1,14 +1,14 @@
 from hfunctions import *
-def score_direction(move, dire, player, opponent, grid, rows, columns):
+def score_direction(move, dire, player, opponent, grid, rows, columns, connect=4):
     # Objective: Score a move along one direction considering contiguous bot/opponent pieces.
-    # Explanation: Counts up to three cells forward; uses exponential weighting favoring longer bot chains and penalizing opponent chains.
-    # Complexity: Best O(1); Average O(1); Worst O(1) (fixed 3 steps). Extra space O(1).
+    # Explanation: Counts up to connect-1 cells forward (three for connect 4); uses exponential weighting favoring longer bot chains and penalizing opponent chains.
+    # Complexity: Best O(1); Average O(connect); Worst O(connect). Extra space O(1).
     x, y = move
     dx, dy = dire
     player_count = 0
     opponent_count = 0
     
-    for step in range(1, 4):
+    for step in range(1, connect):
         nx, ny = x + step * dx, y + step * dy
         if 0 <= nx < rows and 0 <= ny < columns:
             if grid[nx][ny] == player:
@@ -24,10 +24,10 @@ def score_direction(move, dire, player, opponent, grid, rows, columns):
    
     return score
 
-def score_move(player, opponent, grid, move, rows, columns):
+def score_move(player, opponent, grid, move, rows, columns, connect=4):
     # Objective: Aggregate directional scores for a move and apply a center bonus.
     # Explanation: Sums score_direction over 8 directions and adds a bonus based on column proximity to center.
-    # Complexity: Best O(1); Average O(1); Worst O(1) (fixed directions/steps). Extra space O(1).
+    # Complexity: Best O(1); Average O(connect); Worst O(connect) (8 directions, connect-1 steps). Extra space O(1).
     sum_score=0
     displacements = [
         (1, 0),
@@ -40,7 +40,7 @@ def score_move(player, opponent, grid, move, rows, columns):
         (-1, -1),
     ]
     for dis in displacements:
-        sum_score += score_direction(move, dis, player, opponent, grid, rows, columns)
+        sum_score += score_direction(move, dis, player, opponent, grid, rows, columns, connect)
     # Favor positions closer to centre of the board
     center_bonus = (columns // 2) - abs(move[1] - (columns // 2))
     sum_score += center_bonus
@@ -52,29 +52,47 @@ def score_move(player, opponent, grid, move, rows, columns):
 
 
 
-def greedy(player, opponent, heights, grid, rows, columns, *_args, **_kwargs):
+def greedy(player, opponent, heights, grid, rows, columns, *_args, board=None, stats=None, connect=4, **_kwargs):
     """Greedy replacement for minimax.
 
     Signature kept compatible with previous minimax calls. Extra arguments are ignored.
+    Pass a `BitBoard` in sync with `grid` as `board` to run the win/block checks on bitmasks
+    (the board's own `connect` then applies); otherwise `connect` sets the winning run length.
+    Pass a `SearchStats` as `stats` to record the call as one move with the number of scored moves.
 
     Returns a column index to play, or None when no valid move exists.
     """
     # Objective: Choose a move using immediate tactics then a heuristic without lookahead.
     # Explanation: Tries instant win, then block, then scores all legal moves with score_move and picks the max via heap.
     # Complexity: Best O(columns) with early win; Average O(columns); Worst O(columns). Extra space O(columns) for heap.
+    if stats is not None and not stats.in_move:
+        return stats.run_move(
+            "greedy", greedy, player, opponent, heights, grid, rows, columns, board=board, stats=stats, connect=connect
+        )
+    if board is not None:
+        connect = board.connect
     cols = available_moves(heights, rows)
     if not cols:
         return None
 
-    # 1) immediate win
-    for col in cols:
-        if try_move_wins(col, player, heights, grid, rows, columns):
-            return col
-
-    # 2) block opponent immediate win
-    for col in cols:
-        if try_move_wins(col, opponent, heights, grid, rows, columns):
-            return col
+    if board is not None:
+        # 1) + 2) immediate win, then block, via shift-based bitboard checks
+        for col in cols:
+            if board.wins_after(col, player):
+                return col
+        for col in cols:
+            if board.wins_after(col, opponent):
+                return col
+    else:
+        # 1) immediate win
+        for col in cols:
+            if try_move_wins(col, player, heights, grid, rows, columns, connect):
+                return col
+
+        # 2) block opponent immediate win
+        for col in cols:
+            if try_move_wins(col, opponent, heights, grid, rows, columns, connect):
+                return col
 
     # 3) score remaining moves and choose best — use a heap (max-heap via negative scores)
     import heapq
@@ -84,11 +102,13 @@ def greedy(player, opponent, heights, grid, rows, columns, *_args, **_kwargs):
             continue
         # simulate move temporarily to score the resulting position
         r, c = make_move_on_grid(col, player, grid, heights, rows)
-        s = score_move(player, opponent, grid, (r, c), rows, columns)
+        s = score_move(player, opponent, grid, (r, c), rows, columns, connect)
         # rollback
         heights[col] -= 1
         grid[r][c] = '*'
         heapq.heappush(scored, (-s, col))
+        if stats is not None:
+            stats.count("scored_moves")
 
     if not scored:
         return None
@@ -98,3 +118,36 @@ def greedy(player, opponent, heights, grid, rows, columns, *_args, **_kwargs):
     return best_col
             
             
+
+
+def greedy_on_board(player, opponent, position, stats=None):
+    """`greedy` on a board.Board: same choice (win, block, then highest score_move, lowest column on ties).
+
+    Moves are made and unmade on `position`'s flat cells, so no grid is built.
+    """
+    # Objective: Choose a greedy move directly on the compact Board.
+    # Explanation: Uses Board.wins_after for the win/block checks and Board.score_move for the heuristic; iterating columns left to right and keeping strictly better scores reproduces the heap's lowest-column tie-break.
+    # Complexity: Best O(connect) with an early win; Average O(columns*connect); Worst O(columns*connect). Extra space O(1).
+    if stats is not None and not stats.in_move:
+        return stats.run_move("greedy", greedy_on_board, player, opponent, position, stats=stats)
+    cols = position.available_moves()
+    if not cols:
+        return None
+    for col in cols:
+        if position.wins_after(col, player):
+            return col
+    for col in cols:
+        if position.wins_after(col, opponent):
+            return col
+
+    player_code, opponent_code = position.code(player), position.code(opponent)
+    best_col, best_score = None, None
+    for col in cols:
+        r = position.drop(col, player_code)
+        s = position.score_move(r, col, player_code, opponent_code)
+        position.lift(col)
+        if best_score is None or s > best_score:
+            best_col, best_score = col, s
+        if stats is not None:
+            stats.count("scored_moves")
+    return best_col
@@ -1,13 +1,30 @@
-from collections import deque
+from bitboard import BitBoard
+from board import Board
+from cache import BoundedCache
+
+
+class SearchAborted(Exception):
+    """Raised inside a bot search once the `stop` event it was given is set (see ponder.py)."""
+
+
+# Objective: Build the column header printed above the grid.
+# Explanation: Numbers columns from 1, right-aligned to the widest label so they line up with print_grid's cells on wide boards.
+# Complexity: Best O(columns); Average O(columns); Worst O(columns). Extra space O(columns).
+def column_header(columns):
+    width = len(str(columns))
+    return ' '.join(str(i + 1).rjust(width) for i in range(columns))
 
 
 # Objective: Display the board state with column headers.
-# Explanation: Prints the header row and each grid row, spaced for readability.
+# Explanation: Prints the header row and each grid row, spaced for readability; cells are padded to the header's label width (no padding up to 9 columns). Accepts a grid or a board.Board.
 # Complexity: Best O(rows*columns); Average O(rows*columns); Worst O(rows*columns). Extra space O(1).
 def print_grid(numbers_row, game_grid):
+    if isinstance(game_grid, Board):
+        game_grid = game_grid.to_grid()
     print(numbers_row)
+    width = len(str(len(game_grid[0]))) if game_grid else 1
     for row in game_grid:
-        print(' '.join(row))
+        print(' '.join(cell.rjust(width) for cell in row))
 
 
 # Objective: Validate that a chosen column is playable.
@@ -36,13 +53,26 @@ def make_move_on_grid(pick, symbol, game_grid, heights, rows):
     return row_to_fill, pick
 
 
+# Objective: Order columns from the center outwards.
+# Explanation: Sorts by distance to the middle column, left before right on ties (7 columns gives 3, 2, 4, 1, 5, 0, 6); cached per width.
+# Complexity: Best O(1) when cached; Worst O(columns log columns) on first use. Extra space O(columns) per width.
+def center_order(columns):
+    order = _center_orders.get(columns)
+    if order is None:
+        order = _center_orders[columns] = sorted(range(columns), key=lambda c: (abs(c - columns // 2), c))
+    return order
+
+
+_center_orders = {}
+
+
 # Objective: Verify a straight-line run of matching pieces from a move.
-# Explanation: Steps up to three cells in a direction to confirm all match the origin; stops on mismatch or bounds.
-# Complexity: Best O(1); Average O(1); Worst O(1) (fixed steps). Extra space O(1).
-def check_direction(move, dire, game_grid, rows, columns):
+# Explanation: Steps up to connect-1 cells in a direction to confirm all match the origin; stops on mismatch or bounds.
+# Complexity: Best O(1); Average O(connect); Worst O(connect). Extra space O(1).
+def check_direction(move, dire, game_grid, rows, columns, connect=4):
     x, y = move
     dx, dy = dire
-    for i in range(1, 4):
+    for i in range(1, connect):
         pos_x = x + dx * i
         pos_y = y + dy * i
         if pos_x < rows and pos_y < columns and pos_x >= 0 and pos_y >= 0:
@@ -53,11 +83,11 @@ def check_direction(move, dire, game_grid, rows, columns):
     return True
 
 
-def check_game_over(move, game_grid, rows, columns):
-    """Objective: Determine if the latest move produced a connect-4.
+def check_game_over(move, game_grid, rows, columns, connect=4):
+    """Objective: Determine if the latest move produced a connect-N (`connect`, default 4).
 
-    Explanation: Counts contiguous matching symbols in four primary directions both forward and backward; win when any count reaches 4+.
-    Complexity: Best O(1); Average O(1); Worst O(1) (constant directions/steps). Extra space O(1).
+    Explanation: Counts contiguous matching symbols in four primary directions both forward and backward; win when any count reaches connect or more.
+    Complexity: Best O(1); Average O(connect); Worst O(connect) (four directions, at most connect-1 steps each way). Extra space O(1).
     """
     x, y = move
     directions = [
@@ -71,7 +101,7 @@ def check_game_over(move, game_grid, rows, columns):
     for dx, dy in directions:
         count = 1
         # forward direction
-        for i in range(1, 4):
+        for i in range(1, connect):
             nx, ny = x + dx * i, y + dy * i
             if 0 <= nx < rows and 0 <= ny < columns and game_grid[nx][ny] == symbol:
                 count += 1
@@ -79,27 +109,25 @@ def check_game_over(move, game_grid, rows, columns):
                 break
 
         # backward direction
-        for i in range(1, 4):
+        for i in range(1, connect):
             nx, ny = x - dx * i, y - dy * i
             if 0 <= nx < rows and 0 <= ny < columns and game_grid[nx][ny] == symbol:
                 count += 1
             else:
                 break
 
-        if count >= 4:
+        if count >= connect:
             return True
 
     return False
 
 
-# Objective: Handle a player's turn including input, undo/redo, and move placement.
-# Explanation: Processes commands, validates moves, updates histories, and returns game-over/quit status.
+# Objective: Handle a player's turn on a Board including input, undo/redo, and move placement.
+# Explanation: Processes commands, validates moves, updates histories, and returns game-over/quit status. Works on a board.Board, whose history and redo stack are the move_history/redo_stack. `on_undo_redo` (optional) is called after every undo or redo so callers can drop state tied to the old position, e.g. pondering.
 # Complexity: Best O(1); Average O(rows*columns) with typical prompt/print cycles; Worst O(rows*columns) with multiple retries. Extra space O(rows*columns) cumulatively for histories.
-def perform_move(player, heights, game_grid, rows, columns, move_history=None, redo_stack=None):
-    if move_history is None:
-        move_history = []
-    if redo_stack is None:
-        redo_stack = []
+def perform_board_move(player, board, on_undo_redo=None):
+    columns = board.columns
+    move_history = board.history
 
     while True:
         prompt = "Pick a number to enter (1-{0}) or 'u' undo, 'r' redo: ".format(columns)
@@ -120,10 +148,12 @@ def perform_move(player, heights, game_grid, rows, columns, move_history=None, r
             last = move_history[-1]
             # If last move belongs to the player, undo a single move as before.
             if last[2] == player:
-                undo_move(heights, game_grid, move_history, redo_stack)
+                board.undo()
+                if on_undo_redo is not None:
+                    on_undo_redo()
                 print("Undid last move")
                 # After undo the human player should pick again (same turn)
-                print_grid(' '.join(str(i + 1) for i in range(columns)), game_grid)
+                print_grid(column_header(columns), board)
                 continue
 
             # If last move is NOT the player's (likely the bot's move when in VS Bot mode),
@@ -140,23 +170,26 @@ def perform_move(player, heights, game_grid, rows, columns, move_history=None, r
                 print("Undo would not revert a player move — aborting undo")
                 continue
 
-            # Undo bot move then undo player's previous move (both push to redo_stack)
-            undo_move(heights, game_grid, move_history, redo_stack)
-            undo_move(heights, game_grid, move_history, redo_stack)
+            # Undo bot move then undo player's previous move (both push to the redo stack)
+            board.undo()
+            board.undo()
+            if on_undo_redo is not None:
+                on_undo_redo()
             print("Undid bot and previous player move — pick a new move")
-            print_grid(' '.join(str(i + 1) for i in range(columns)), game_grid)
+            print_grid(column_header(columns), board)
             continue
 
         # redo
         if entry in ("r", "redo"):
-            if not redo_stack:
+            if not board.redo_stack:
                 print("Nothing to redo")
                 continue
-            redo_move(heights, game_grid, move_history, redo_stack, rows)
+            r, c = board.redo()
+            if on_undo_redo is not None:
+                on_undo_redo()
             print("Redid move")
             # After redo the turn is considered finished, check for game-over
-            last = move_history[-1]
-            return not check_game_over((last[0], last[1]), game_grid, rows, columns)
+            return not board.wins_at(r, c)
 
         # numeric move
         try:
@@ -165,27 +198,48 @@ def perform_move(player, heights, game_grid, rows, columns, move_history=None, r
             print("Invalid input — please enter a number, 'u' (undo) or 'r' (redo)")
             continue
 
-        if not check_legal_move(player_pick, heights, rows, columns):
+        if not board.can_play(player_pick):
             print('Illegal move — column full or out of range. Try again.')
             continue
 
-        r, c = make_move_on_grid(player_pick, player, game_grid, heights, rows)
-        move_history.append((r, c, player))
-        # Any new move invalidates the redo stack
-        redo_stack.clear()
+        # play() records the move and clears the redo stack (a new move invalidates redo)
+        r, c = board.play(player_pick, player)
+        return not board.wins_at(r, c)
 
-        return not check_game_over((r, c), game_grid, rows, columns)
+
+# Objective: Grid-API wrapper around perform_board_move.
+# Explanation: Builds a Board from the grid, heights and histories, runs the turn on it and writes the resulting position and histories back in place.
+# Complexity: That of perform_board_move plus O(rows*columns) for the conversions. Extra space O(rows*columns).
+def perform_move(player, heights, game_grid, rows, columns, move_history=None, redo_stack=None, on_undo_redo=None, connect=4):
+    board = Board.from_grid(game_grid, heights, rows, columns, connect, history=move_history, redo_stack=redo_stack)
+
+    def sync():
+        game_grid[:] = board.to_grid()
+        heights[:] = board.heights
+        if move_history is not None:
+            move_history[:] = board.history
+        if redo_stack is not None:
+            redo_stack[:] = board.redo_stack
+
+    def undo_redo():
+        # callers may read the grid from the callback, so write it back first
+        sync()
+        on_undo_redo()
+
+    result = perform_board_move(player, board, undo_redo if on_undo_redo is not None else None)
+    sync()
+    return result
 
 
 # Objective: Test whether playing in a column yields an immediate win.
 # Explanation: Temporarily place a piece, check for victory, then revert the state.
 # Complexity: Best O(1); Average O(1); Worst O(1). Extra space O(1).
-def try_move_wins(col, symbol, heights, game_grid, rows, columns):
+def try_move_wins(col, symbol, heights, game_grid, rows, columns, connect=4):
     if heights[col] >= rows:
         return False
     r, c = make_move_on_grid(col, symbol, game_grid, heights, rows)
     # after simulating the move, check_game_over returns True when the move produced a win
-    win = check_game_over((r, c), game_grid, rows, columns)
+    win = check_game_over((r, c), game_grid, rows, columns, connect)
     heights[c] -= 1
     game_grid[r][c] = '*'
     return win
@@ -227,83 +281,159 @@ def redo_move(heights, game_grid, move_history, redo_stack, rows):
 # Objective: Provide a quick tactical bot move (win, block, or center preference).
 # Explanation: Checks for immediate wins, then blocks, otherwise favors central columns.
 # Complexity: Best O(1) if early return; Average O(columns); Worst O(columns). Extra space O(1).
-def bot_move(bot_symb, opp_symb, heights, game_grid, rows, columns):
+def bot_move(bot_symb, opp_symb, heights, game_grid, rows, columns, connect=4):
     cols = available_moves(heights, rows)
     if not cols:
         return None
     for col in cols:
-        if try_move_wins(col, bot_symb, heights, game_grid, rows, columns):
+        if try_move_wins(col, bot_symb, heights, game_grid, rows, columns, connect):
             return col
     for col in cols:
-        if try_move_wins(col, opp_symb, heights, game_grid, rows, columns):
+        if try_move_wins(col, opp_symb, heights, game_grid, rows, columns, connect):
             return col
 
-    center = [3, 2, 4, 1, 5, 0, 6]
-    for col in center:
-        if col in cols:
+    for col in center_order(columns):
+        if heights[col] < rows:
             return col
     return cols[0]
 
 
-_bfs_cache = {}
+# Objective: Build a bitboard view of a grid position for the bitboard helpers below.
+# Explanation: Thin wrapper over BitBoard.from_grid so callers only need hfunctions.
+# Complexity: Best O(rows*columns); Average O(rows*columns); Worst O(rows*columns). Extra space O(columns).
+def grid_to_bitboard(game_grid, heights, rows, columns, symbols=("#", "O"), connect=4):
+    return BitBoard.from_grid(game_grid, heights, rows, columns, symbols, connect)
+
+
+# Objective: Bitboard counterpart of make_move_on_grid.
+# Explanation: Drops the piece via BitBoard.play and returns the (row, col) it landed on.
+# Complexity: Best O(1); Average O(1); Worst O(1). Extra space O(1).
+def make_move_on_bitboard(pick, symbol, board):
+    return board.play(pick, symbol)
+
+
+# Objective: Bitboard counterpart of undoing the last simulated move.
+# Explanation: Pops the latest move from the bitboard's own history.
+# Complexity: Best O(1); Average O(1); Worst O(1). Extra space O(1).
+def undo_move_on_bitboard(board):
+    return board.undo()
+
+
+# Objective: Bitboard counterpart of check_game_over.
+# Explanation: Shift-based four-in-a-row test on the mover's mask; no grid walk needed.
+# Complexity: Best O(1); Average O(1); Worst O(1). Extra space O(1).
+def check_game_over_bitboard(symbol, board):
+    return board.is_win(symbol)
+
+
+# Objective: Bitboard counterpart of try_move_wins.
+# Explanation: Tests the column's next bit against the player's mask without touching the board.
+# Complexity: Best O(1); Average O(1); Worst O(1). Extra space O(1).
+def try_move_wins_bitboard(col, symbol, board):
+    return board.wins_after(col, symbol)
+
+
+# Threat-solver nodes per pass allowed by threat_depth: 7 columns at depth 4, as on the standard board.
+THREAT_NODE_BUDGET = 7 ** 4
+THREAT_MAX_DEPTH = 4
+
 
+# Objective: Pick the threat-solver depth for a board width.
+# Explanation: A pass of depth d visits up to columns^d nodes, so the deepest d (at most THREAT_MAX_DEPTH) whose columns^d fits THREAT_NODE_BUDGET keeps the per-evaluation cost flat as boards widen (4 up to 7 columns, 2 on 15); never below 2 so both sides' immediate threats are seen.
+# Complexity: Best/Average/Worst O(log budget). Extra space O(1).
+def threat_depth(columns):
+    depth = 2
+    while depth < THREAT_MAX_DEPTH and columns ** (depth + 1) <= THREAT_NODE_BUDGET:
+        depth += 1
+    return depth
 
-def bfs_threat_solver(current_player, opponent, heights, game_grid, rows, columns, max_depth=6):
-    """Objective: BFS to find minimum plies to a win for current player and opponent.
 
-    Explanation: Explores alternating-turn game states up to max_depth using a queue; memoizes by state to reuse results. Returns (moves_for_current, moves_for_opponent) or None when not reachable.
-    Complexity: Best O(columns) when early win; Average O(columns^depth) within depth; Worst O(columns^depth) within depth. Extra space O(columns^depth) for queue/visited/cache.
+# Bounded memo of threat results; cleared between games via cache.reset_caches("game").
+_bfs_cache = BoundedCache("bfs", max_entries=100_000, has_depth=True)
+
+
+def bfs_threat_solver(current_player, opponent, heights, game_grid, rows, columns, max_depth=6, board=None, stats=None, connect=4):
+    """Objective: Find minimum plies to a win for current player and opponent.
+
+    Explanation: Iterative deepening over alternating-turn game states up to max_depth. Pass L only checks wins on ply L, and only for the side that moves on that ply and has not won earlier. Children that already win are not expanded, which matches the old BFS. The search makes and unmakes moves on integer bitboard masks and one shared heights list, so no grid is copied per node. Positions are deduplicated per pass on their exact masks; a position always sits at the same ply, so each is expanded once. Results are memoized by state, with a position and its left-right mirror sharing an entry. Returns (moves_for_current, moves_for_opponent), with None when a side cannot win within max_depth. Pass `board` to skip the grid conversion (its own `connect` is then used). Pass a `SearchStats` as `stats` to count calls and cache hits and to time cache misses.
+    Complexity: Best O(columns) when a win is one ply away; Average O(columns^depth) within depth; Worst O(columns^depth) within depth. Extra space O(depth) recursion plus the per-pass seen set and cache.
     """
 
-    heights_key = tuple(heights)
-    grid_key = tuple(tuple(row) for row in game_grid)
+    if board is None:
+        board = BitBoard.from_grid(game_grid, heights, rows, columns, (current_player, opponent), connect)
+    start_mine = board.masks.get(current_player, 0)
+    start_theirs = board.masks.get(opponent, 0)
+    # threat distances are the same for the mirror image, so both share one cache entry
+    canonical = min((start_mine, start_theirs), (board.mirror(start_mine), board.mirror(start_theirs)))
     state_key = (
         current_player,
         opponent,
-        heights_key,
-        grid_key,
+        canonical[0],
+        canonical[1],
         rows,
         columns,
+        board.connect,
         max_depth,
     )
-    if state_key in _bfs_cache:
-        return _bfs_cache[state_key]
-
-    start_grid = [row[:] for row in game_grid]
-    start_heights = list(heights_key)
-    queue = deque()
-    queue.append((start_grid, start_heights, current_player, 0))
-    seen = set()
+    cached = _bfs_cache.get(state_key)
+    if stats is not None:
+        stats.count("bfs_calls")
+        if cached is not None:
+            stats.count("bfs_cache_hits")
+    if cached is not None:
+        return cached
+    if stats is not None:
+        stats.enter("bfs_threat_solver")
+
+    stride = board.stride
+    has_line = board.has_line
+    hs = board.heights  # made/unmade in place; every change is reverted before returning
+
+    # Objective: Decide whether the side moving on ply `target` can win exactly then.
+    # Explanation: Depth-first walk to depth target-1 that skips positions already seen in this pass and moves that end the game earlier.
+    # Complexity: O(columns^(target-1)) nodes at worst. Extra space O(target) recursion.
+    def wins_on_ply(to_move, other, depth, target, seen):
+        node_key = (to_move, other)
+        if node_key in seen:
+            return False
+        seen.add(node_key)
+        last_ply = depth == target - 1
+        for col in range(columns):
+            h = hs[col]
+            if h >= rows:
+                continue
+            moved = to_move | (1 << (col * stride + h))
+            if has_line(moved):
+                if last_ply:
+                    return True
+                continue  # an earlier win ends the game; it was found on a previous pass
+            if last_ply:
+                continue
+            hs[col] = h + 1
+            found = wins_on_ply(other, moved, depth + 1, target, seen)
+            hs[col] = h
+            if found:
+                return True
+        return False
+
     current_best = None
     opponent_best = None
-
-    while queue:
-        grid, hs, turn, depth = queue.popleft()
-        if depth >= max_depth:
+    for target in range(1, max_depth + 1):
+        current_moves = target % 2 == 1  # odd plies belong to current_player
+        if current_moves and current_best is not None:
             continue
-
-        node_key = (tuple(hs), turn)
-        if node_key in seen:
+        if not current_moves and opponent_best is not None:
             continue
-        seen.add(node_key)
-
-        cols = available_moves(hs, rows)
-        for col in cols:
-            g2 = [row[:] for row in grid]
-            h2 = hs[:]
-            r, c = make_move_on_grid(col, turn, g2, h2, rows)
-            win = check_game_over((r, c), g2, rows, columns)
-            if win:
-                moves_needed = depth + 1
-                if turn == current_player:
-                    if current_best is None or moves_needed < current_best:
-                        current_best = moves_needed
-                else:
-                    if opponent_best is None or moves_needed < opponent_best:
-                        opponent_best = moves_needed
-                continue
-            queue.append((g2, h2, opponent if turn == current_player else current_player, depth + 1))
+        if wins_on_ply(start_mine, start_theirs, 0, target, set()):
+            if current_moves:
+                current_best = target
+            else:
+                opponent_best = target
+        if current_best is not None and opponent_best is not None:
+            break
 
     result = (current_best, opponent_best)
-    _bfs_cache[state_key] = result
+    _bfs_cache.put(state_key, result, max_depth)
+    if stats is not None:
+        stats.leave()
     return result
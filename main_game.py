@@ -1,16 +1,34 @@
 from hfunctions import *
-from greedy import greedy
-from new_try import dfs_beam_bot_move
+from board import Board, board_side, check_size
+from greedy import greedy_on_board
+from new_try import ENGINES, board_bot_move
+from cache import reset_caches
+from game_record import append_game
+from ponder import Ponderer
+
+# Objective: Ask which search engine the bot should use.
+# Explanation: Lists the ENGINES names and re-prompts until a known one (or blank for the default) is entered.
+# Complexity: O(1) per prompt. Extra space O(1).
+def choose_engine(default="beam"):
+    names = ", ".join(ENGINES)
+    while True:
+        choice = input("Bot engine ({0}) [{1}]: ".format(names, default)).strip().lower()
+        if not choice:
+            return default
+        if choice in ENGINES:
+            return choice
+        print("Please enter one of: {0}".format(names))
+
 
-def main_entry():
+def main_entry(engine=None, stats=None, ponder=True, rows=6, columns=7, connect=4, record=None):
     # Objective: Entry point to run Connect 4 in player-vs-player or player-vs-bot modes.
-    # Explanation: Sets up board state, manages turn loop, handles human input, and routes bot logic (tactics -> DFS beam -> greedy).
-    # Complexity: Per turn O(columns) for move checks; overall O(turns*columns) time; space O(rows*columns) for grid plus histories.
-    rows = 6
-    columns = 7
-    numbers_row = "1 2 3 4 5 6 7"
-    game_grid = [['*' for _ in range(columns)] for _ in range(rows)]
-    heights = [0 for _ in range(columns)]
+    # Explanation: Sets up board state, manages turn loop, handles human input, and routes bot logic (chosen engine -> greedy). Pass a search_stats.SearchStats as `stats` to record every bot move. With `ponder`, the bot searches its answers to likely human replies while the human is choosing; undo/redo discards that work. `rows`, `columns` and `connect` set the board size and winning run length. `record` (a path or an open game_record.GameWriter) appends the finished or aborted game to a game record file.
+    # Complexity: Per turn O(columns) for move checks; overall O(turns*columns) time; space O(rows*columns) bytes for the Board plus histories.
+    numbers_row = column_header(columns)
+    # cells, heights and the undo/redo histories live in one compact Board
+    board = Board(rows, columns, connect)
+    # start each game with empty evaluation/threat caches
+    reset_caches("game")
     user=0
     while True:
         user=input("VS Player: 1 or VS Bot: 2 : ")
@@ -25,101 +43,136 @@ def main_entry():
     player_2 = "O"
     current_player = 1
 
-    # move history stacks for undo/redo
-    move_history = []  # stores tuples (row, col, symbol)
-    redo_stack = []
-
     if game_mode == 1:
         game_going = True
         while game_going:
-            print_grid(numbers_row, game_grid)
+            print_grid(numbers_row, board)
 
             if current_player == 1:
-                result = perform_move(player_1, heights, game_grid, rows, columns, move_history, redo_stack)
+                result = perform_board_move(player_1, board)
                 if result is None:
                     # User chose to quit
                     print("Game aborted by player.")
-                    return
+                    break
                 if result is False:
-                    print_grid(numbers_row, game_grid)
+                    print_grid(numbers_row, board)
                     print("Player 1 Wins!")
                     break
                 game_going = result
                 current_player = 2
 
             else:
-                result = perform_move(player_2, heights, game_grid, rows, columns, move_history, redo_stack)
+                result = perform_board_move(player_2, board)
                 if result is None:
                     print("Game aborted by player.")
-                    return
+                    break
                 if result is False:
-                    print_grid(numbers_row, game_grid)
+                    print_grid(numbers_row, board)
                     print("Player 2 Wins!")
                     break
                 game_going = result
                 current_player = 1
 
-            if all(height == rows for height in heights):
-                print_grid(numbers_row, game_grid)
+            if board.is_full():
+                print_grid(numbers_row, board)
                 print("It's a draw!")
                 break
 
     elif game_mode == 2:
+        if engine is None:
+            engine = choose_engine()
         game_going = True
         current_player = 1
+        ponderer = Ponderer(engine, player_2, player_1, rows, columns, connect) if ponder else None
+
+        # Objective: Keep pondering in step with undo/redo.
+        # Explanation: After an undo the human is to move in a new position, so pondering restarts there; after a redo of the human's move the bot moves next, so the work is dropped.
+        # Complexity: O(rows*columns) plus waiting for at most one in-flight search. Extra space O(rows*columns).
+        def on_undo_redo():
+            if board.history and board.history[-1][2] == player_1:
+                ponderer.discard()
+            else:
+                ponderer.start(list(board.heights), board.to_grid())
 
         while game_going:
-            print_grid(numbers_row, game_grid)
+            print_grid(numbers_row, board)
             if current_player == 1:
-                result = perform_move(player_1, heights, game_grid, rows, columns, move_history, redo_stack)
+                if ponderer is not None:
+                    ponderer.start(list(board.heights), board.to_grid())
+                result = perform_board_move(player_1, board, on_undo_redo if ponderer is not None else None)
                 if result is None:
+                    if ponderer is not None:
+                        ponderer.discard()
                     print("Game aborted by player.")
-                    return
+                    break
                 if result is False:
-                    print_grid(numbers_row, game_grid)
+                    print_grid(numbers_row, board)
                     print("Player 1 Wins!")
                     break
                 game_going = result
                 current_player = 2
             else:
-                av_moves = available_moves(heights, rows)
+                av_moves = board.available_moves()
                 if not av_moves:
-                    print_grid(numbers_row, game_grid)
+                    print_grid(numbers_row, board)
                     print("It's a Draw!")
                     break
 
                 # Try quick tactical rules first
                 #col = bot_move(player_2, player_1, heights, game_grid, rows, columns)
 
-                # If no tactical move, run DFS+beam search bot (non-minimax)
+                # If no tactical move, run the selected search engine (DFS+beam by default)
                 #if col is None:
                     #print("DFS")
-                col = dfs_beam_bot_move(player_2, player_1, heights, game_grid, rows, columns, depth=4, beam_width=3)
+                # A pondered answer for this exact position skips the search
+                col = ponderer.take(list(board.heights), board.to_grid()) if ponderer is not None else None
+                if col is None:
+                    col = board_bot_move(engine, board, player_2, player_1, stats=stats)
 
                 # Fallback to greedy heuristic scoring
                 if col is None:
                     print("Greedy")
-                    col = greedy(player_2, player_1, heights, game_grid, rows, columns)
+                    col = greedy_on_board(player_2, player_1, board, stats=stats)
 
                 if col is None:
-                    print_grid(numbers_row, game_grid)
+                    print_grid(numbers_row, board)
                     print("It's a Draw!")
                     break
 
-                r, c = make_move_on_grid(col, player_2, game_grid, heights, rows)
-                move_history.append((r, c, player_2))
-                # New bot move invalidates redo stack
-                redo_stack.clear()
+                # play() records the move; a new bot move invalidates the redo stack
+                r, c = board.play(col, player_2)
 
-                if check_game_over((r, c), game_grid, rows, columns):
-                    print_grid(numbers_row, game_grid)
+                if board.wins_at(r, c):
+                    print_grid(numbers_row, board)
                     print("Bot Wins!")
                     break
                 current_player = 1
+        if ponderer is not None:
+            ponderer.discard()
     else:
         print("Invalid game mode selected.")
 
+    if record is not None and board.history:
+        append_game(record, board)
+
 
 
 if __name__ == "__main__":
-    main_entry()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Play Connect N in the terminal.")
+    parser.add_argument("--rows", type=board_side, default=6)
+    parser.add_argument("--columns", type=board_side, default=7)
+    parser.add_argument("--connect", type=int, default=4, help="pieces in a row needed to win")
+    parser.add_argument("--record", help="append the game to this record file (.bin for the binary format)")
+    parser.add_argument("--cache-db", help="keep evaluation and threat caches in this SQLite file across runs")
+    args = parser.parse_args()
+    try:
+        check_size(args.rows, args.columns, args.connect)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if args.cache_db:
+        from cache_store import attach_store
+
+        attach_store(args.cache_db)
+    main_entry(rows=args.rows, columns=args.columns, connect=args.connect, record=args.record)
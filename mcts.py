@@ -0,0 +1,283 @@
+"""Monte Carlo tree search (UCT) for connect-N, bounded by time or playouts.
+
+The tree grows by one node per playout. Selection follows UCT (mean result plus
+`exploration * sqrt(ln N / n)`); the expanded node is finished by a random playout
+on the BitBoard with make/unmake. Playouts and expansion use the same tactics as the
+other bots (hfunctions.try_move_wins on bitboards): win at once when possible,
+otherwise block the opponent's immediate win, otherwise play a random column.
+
+An MCTS object keeps its tree between moves. `set_position` looks for the new
+position below the old root (the bot's move and the reply are two plies down) and
+keeps that subtree, so playouts spent on the line actually played are not lost.
+
+Root parallelism: `search_root` runs an independent search in a worker process and
+returns the root children's visit counts, which the caller adds to its own
+(new_try.mcts_bot_move).
+"""
+
+import math
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from bitboard import BitBoard
+
+
+DEFAULT_EXPLORATION = 1.4
+NOT_TERMINAL, WIN, DRAW = range(3)
+
+
+class Node:
+    """One position in the tree, reached by `mover` playing `move`.
+
+    `wins` sums playout results from `mover`'s point of view (1 win, 0.5 draw), so a
+    parent picks the child that is best for the side to move at the parent.
+    """
+
+    __slots__ = ("move", "mover", "parent", "children", "untried", "visits", "wins", "terminal")
+
+    def __init__(self, move: Optional[int], mover: str, parent: Optional["Node"], untried: List[int], terminal: int = NOT_TERMINAL):
+        self.move = move
+        self.mover = mover
+        self.parent = parent
+        self.children: List["Node"] = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+        self.terminal = terminal
+
+    # Objective: Pick the child with the highest UCT value.
+    # Explanation: Mean result plus the exploration bonus; every child has been visited once when this is called.
+    # Complexity: Best/Average/Worst O(children). Extra space O(1).
+    def select(self, exploration: float) -> "Node":
+        log_visits = math.log(self.visits)
+        best = None
+        best_value = -1.0
+        for child in self.children:
+            value = child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits)
+            if value > best_value:
+                best, best_value = child, value
+        return best
+
+
+# Objective: List the moves worth trying for the side to move.
+# Explanation: An immediate win is the only move kept; otherwise the blocks of the opponent's immediate wins if there are any; otherwise every legal column.
+# Complexity: Best O(columns); Average/Worst O(columns) win checks. Extra space O(columns).
+def candidate_moves(board: BitBoard, to_move: str, other: str) -> List[int]:
+    cols = board.available_moves()
+    for col in cols:
+        if board.wins_after(col, to_move):
+            return [col]
+    blocks = [col for col in cols if board.wins_after(col, other)]
+    return blocks or cols
+
+
+# Objective: Finish a game with the win/block playout policy and report the winner.
+# Explanation: Plays on the board and undoes every move before returning; returns the winning symbol or None for a draw.
+# Complexity: O(empty cells * columns) win checks. Extra space O(1) beyond the board's history.
+def rollout(board: BitBoard, to_move: str, other: str, rng: random.Random) -> Optional[str]:
+    plies = 0
+    winner = None
+    heights = board.heights
+    rows = board.rows
+    wins_after = board.wins_after
+    while True:
+        cols = [col for col in range(board.columns) if heights[col] < rows]
+        if not cols:
+            break
+        col = None
+        for candidate in cols:
+            if wins_after(candidate, to_move):
+                col = candidate
+                break
+        if col is not None:
+            winner = to_move
+            break
+        blocks = [candidate for candidate in cols if wins_after(candidate, other)]
+        board.play(rng.choice(blocks or cols), to_move)
+        plies += 1
+        to_move, other = other, to_move
+    for _ in range(plies):
+        board.undo()
+    return winner
+
+
+class MCTS:
+    """UCT search with a tree kept between moves; one instance per board size.
+
+    Searches hold `lock`, so two threads can share an instance; the ponder thread keeps
+    its own, so guessing at replies never replaces the tree of the game being played.
+    """
+
+    def __init__(self, rows: int = 6, columns: int = 7, connect: int = 4, exploration: float = DEFAULT_EXPLORATION, seed: Optional[int] = None):
+        self.rows = rows
+        self.columns = columns
+        self.connect = connect
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.board: Optional[BitBoard] = None
+        self.root: Optional[Node] = None
+        self.to_move = ""
+        self.other = ""
+        self.reused = 0
+        self.lock = threading.Lock()
+
+    # Objective: Make `board` (with `to_move` to play) the root, keeping the matching subtree.
+    # Explanation: When the new position extends the old root by stones alone, walks down the tree playing the added stones in turn order (any order that exists in the tree reaches the same position); a missing step, a removed stone or another side to move starts a fresh tree.
+    # Complexity: O(added stones * columns) to walk; O(columns) win checks for a fresh root. Extra space O(rows*columns) for the copy.
+    def set_position(self, board: BitBoard, to_move: str, other: str) -> None:
+        node = self._descend(board, to_move, other)
+        self.board = board.copy()
+        self.to_move, self.other = to_move, other
+        if node is None:
+            self.root = Node(None, other, None, candidate_moves(self.board, to_move, other))
+            self.reused = 0
+        else:
+            node.parent = None
+            self.root = node
+            self.reused = node.visits
+
+    def _descend(self, board: BitBoard, to_move: str, other: str) -> Optional[Node]:
+        old = self.board
+        if old is None or self.root is None or (board.rows, board.columns, board.connect) != (old.rows, old.columns, old.connect):
+            return None
+        if set(board.masks) - {to_move, other} or {self.to_move, self.other} != {to_move, other}:
+            return None
+        added = {}
+        for symbol in (to_move, other):
+            before = old.masks.get(symbol, 0)
+            after = board.masks.get(symbol, 0)
+            if before & ~after:
+                return None
+            added[symbol] = after ^ before
+        stones = bin(added[to_move] | added[other]).count("1")
+        # the side to move now must be the one that moved `stones` plies after the old root's mover
+        if (self.to_move == to_move) != (stones % 2 == 0):
+            return None
+        walk = old.copy()
+        node = self.root
+        mover = self.to_move
+        for _ in range(stones):
+            step = None
+            for child in node.children:
+                bit = 1 << (child.move * walk.stride + walk.heights[child.move])
+                if added[mover] & bit:
+                    step = child
+                    added[mover] ^= bit
+                    break
+            if step is None:
+                return None
+            walk.play(step.move, mover)
+            node = step
+            mover = other if mover == to_move else to_move
+        return node
+
+    # Objective: Grow the tree until the deadline or the playout budget runs out.
+    # Explanation: Each iteration selects by UCT down to a node with untried moves, expands one (marking wins and full boards terminal), finishes it with a rollout and backs the result up the path; the clock and the `stop` event are read every 16 playouts. At least one playout always runs.
+    # Complexity: O(playouts * (tree depth * columns + rollout)). Extra space O(playouts) nodes.
+    def run(
+        self, time_limit: Optional[float] = None, playouts: Optional[int] = None, deadline: Optional[float] = None, stop: Optional[threading.Event] = None
+    ) -> int:
+        if deadline is None and time_limit is not None:
+            deadline = time.time() + time_limit
+        board = self.board
+        root = self.root
+        rng = self.rng
+        exploration = self.exploration
+        done = 0
+        while True:
+            node = root
+            to_move, other = self.to_move, self.other
+            path = [node]
+            while not node.untried and node.children and node.terminal == NOT_TERMINAL:
+                node = node.select(exploration)
+                board.play(node.move, node.mover)
+                path.append(node)
+                to_move, other = other, to_move
+            played = len(path) - 1
+
+            if node.terminal == NOT_TERMINAL and node.untried:
+                col = node.untried.pop(rng.randrange(len(node.untried)))
+                win = board.wins_after(col, to_move)
+                board.play(col, to_move)
+                played += 1
+                if win:
+                    child = Node(col, to_move, node, [], WIN)
+                elif board.is_full():
+                    child = Node(col, to_move, node, [], DRAW)
+                else:
+                    child = Node(col, to_move, node, candidate_moves(board, other, to_move))
+                node.children.append(child)
+                node = child
+                path.append(node)
+                to_move, other = other, to_move
+
+            if node.terminal == WIN:
+                winner = node.mover
+            elif node.terminal == DRAW:
+                winner = None
+            else:
+                winner = rollout(board, to_move, other, rng)
+
+            for visited in path:
+                visited.visits += 1
+                if winner is None:
+                    visited.wins += 0.5
+                elif winner == visited.mover:
+                    visited.wins += 1.0
+            for _ in range(played):
+                board.undo()
+
+            done += 1
+            if playouts is not None and done >= playouts:
+                break
+            if done % 16 == 0 and ((deadline is not None and time.time() >= deadline) or (stop is not None and stop.is_set())):
+                break
+            if playouts is None and deadline is None:
+                break
+        return done
+
+    # Objective: Visit counts and result sums of the root's children.
+    # Explanation: Keyed by column, for picking the move or merging with other workers.
+    # Complexity: Best/Average/Worst O(columns). Extra space O(columns).
+    def root_stats(self) -> Dict[int, Tuple[int, float]]:
+        return {child.move: (child.visits, child.wins) for child in self.root.children}
+
+
+# Objective: Choose the most visited root move (the robust child), ties to the better mean.
+# Explanation: Visits are what UCT spends on a move it keeps preferring, so they are steadier than the mean alone.
+# Complexity: Best/Average/Worst O(columns). Extra space O(1).
+def best_move(stats: Dict[int, Tuple[int, float]]) -> Optional[int]:
+    best = None
+    best_key = None
+    for col, (visits, wins) in stats.items():
+        key = (visits, wins / visits if visits else 0.0)
+        if best_key is None or key > best_key:
+            best, best_key = col, key
+    return best
+
+
+_trees: Dict[Tuple[int, int, int], MCTS] = {}
+
+
+# Objective: Shared MCTS per board size and run length, so trees are reused between moves.
+# Explanation: Creates the instance on first use.
+# Complexity: Best/Average/Worst O(1). Extra space O(tree) per size.
+def get_tree(rows: int = 6, columns: int = 7, connect: int = 4) -> MCTS:
+    tree = _trees.get((rows, columns, connect))
+    if tree is None:
+        tree = _trees[(rows, columns, connect)] = MCTS(rows, columns, connect)
+    return tree
+
+
+# Objective: Run an independent search from a grid position in a worker process.
+# Explanation: Module-level so a process pool can pickle it; builds a fresh tree with its own seed, searches until the shared wall-clock deadline or its playout share, and returns the root statistics and playout count.
+# Complexity: That of MCTS.run. Extra space O(playouts) nodes, freed on return.
+def search_root(task) -> Tuple[Dict[int, Tuple[int, float]], int]:
+    player, opponent, heights, grid, rows, columns, connect, deadline, playouts, seed = task
+    board = BitBoard.from_grid(grid, heights, rows, columns, (player, opponent), connect)
+    tree = MCTS(rows, columns, connect, seed=seed)
+    tree.set_position(board, player, opponent)
+    done = tree.run(playouts=playouts, deadline=deadline)
+    return tree.root_stats(), done
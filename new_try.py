@@ -1,70 +1,238 @@
 import heapq
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Tuple, Optional
 
-from hfunctions import available_moves, make_move_on_grid, check_game_over, try_move_wins, bfs_threat_solver
+from hfunctions import SearchAborted, _bfs_cache, available_moves, bfs_threat_solver, center_order, grid_to_bitboard, threat_depth
 from greedy import score_move
+from board import Board
+from transposition import EXACT, LOWER, NO_MOVE, UPPER, TranspositionTable
+from cache import BoundedCache
+from evaluation import IncrementalEvaluator
+from opening_book import default_book
+from search_stats import SearchStats
+from solver import SolveAborted, get_solver, score_outcome
+from tablebase import default_tablebase
+import batch_eval
+import mcts
 
 
-_eval_cache = {}
+# Bounded memo of leaf scores; cleared between games via cache.reset_caches("game").
+_eval_cache = BoundedCache("eval", max_entries=200_000)
+_tt = TranspositionTable()
+# Nodes (moves made) by the most recent dfs_beam_bot_move / alphabeta_search call; read by benchmarks.py.
+last_search = {"nodes": 0}
 
 
-# Objective: Choose a bot move via DFS with beam pruning and heuristic evaluation.
-# Explanation: Performs depth-limited adversarial search, using ordered candidate moves and cached board scores/threats to select the best opening column.
-# Complexity: Best O(columns) with immediate win/block; Average O((beam_width)^depth * columns); Worst O((beam_width)^depth * columns). Extra space O((beam_width)^depth) plus caches.
-def dfs_beam_bot_move(
+# Objective: Cache key shared by a position and its mirror image when their evaluations agree.
+# Explanation: The center bonus columns//2 - |c - columns//2| is only symmetric for an odd number of columns, so even widths keep the plain Zobrist key (never flipped); odd widths use BitBoard.canonical_zobrist.
+# Complexity: Best/Average/Worst O(1). Extra space O(1).
+def _canonical_key(board) -> Tuple[int, bool]:
+    if board.columns % 2:
+        return board.canonical_zobrist()
+    return board.zobrist, False
+
+
+# Objective: Read the table's best move for the board, in the board's own columns.
+# Explanation: Table entries are keyed by _canonical_key, so on odd widths a position and its mirror share one entry; a move stored for the mirrored orientation is reflected back.
+# Complexity: Best/Average/Worst O(1). Extra space O(1).
+def _tt_best_move(board) -> int:
+    key, flipped = _canonical_key(board)
+    move = _tt.best_move(key)
+    if flipped and move != NO_MOVE:
+        return board.columns - 1 - move
+    return move
+
+
+# Objective: Store a search result under the key returned by _canonical_key(board).
+# Explanation: Reflects the best move into the canonical orientation when `flipped`, so _tt_best_move maps it back for either mirror image.
+# Complexity: Best/Average/Worst O(1). Extra space O(1).
+def _tt_store(board, key: int, flipped: bool, depth: int, flag: int, score: int, best_col: int) -> None:
+    _tt.store(key, depth, flag, score, board.columns - 1 - best_col if flipped else best_col)
+
+
+# Objective: Drop moves whose mirror image comes earlier in the list.
+# Explanation: In a left-right symmetric position on an odd width, column c and columns-1-c lead to mirrored positions of equal value, so only the first of each pair needs searching.
+# Complexity: Best/Average/Worst O(len(cols)). Extra space O(columns).
+def _collapse_mirrors(cols: List[int], columns: int) -> List[int]:
+    seen = set()
+    kept = []
+    for col in cols:
+        if columns - 1 - col not in seen:
+            kept.append(col)
+        seen.add(col)
+    return kept
+
+
+# Objective: Score a position from `player`'s perspective with threats.
+# Explanation: Caches by the incrementally maintained Zobrist key, shared with the mirrored position on odd widths (_canonical_key); sums piece heuristics and BFS threat distances for both sides, with the run length taken from `board.connect` and the threat depth from threat_depth(columns). `board` and `grid` must describe the same position. When an IncrementalEvaluator for `player` is passed, the piece heuristic is read from it instead of rescanning the grid, and `grid` may be None. A SearchStats passed as `stats` counts evaluations and cache hits.
+# Complexity: Best O(1) on cache hit; Average/Worst O(BFS) per miss with an evaluator, O(rows*columns + BFS) without. Extra space proportional to cache size.
+def evaluate_position(
+    board,
+    grid: Optional[List[List[str]]],
     player: str,
     opponent: str,
-    heights: List[int],
-    grid: List[List[str]],
     rows: int,
     columns: int,
-    depth: int = 5,
-    beam_width: int = 4,
-) -> Optional[int]:
-    """Depth-limited DFS with beam pruning and heuristic leaf scoring.
-
-    - Uses DFS to a fixed depth.
-    - At each ply, orders candidate moves by a heuristic (greedy score) and only explores
-      the top `beam_width` moves (beam search).
-    - Max node = current player, Min node = opponent reply. This is the same adversarial
-      idea as minimax but implemented with covered tools: DFS + heaps + pruning.
-    """
-
-    def undo_move(r: int, c: int) -> None:
-        grid[r][c] = "*"
-        heights[c] -= 1
-
-    # Objective: Score the current board from the bot's perspective with threats.
-    # Explanation: Caches by state; sums piece heuristics and BFS threat distances for both sides.
-    # Complexity: Best/Average/Worst O(rows*columns) per cache miss plus BFS cost; O(1) on cache hit; space for cache proportional to visited states.
-    # Objective: Score the current board from the bot's perspective with threats.
-    # Explanation: Caches by state; sums piece heuristics and BFS threat distances for both sides.
-    # Complexity: Best O(1) on cache hit; Average/Worst O(rows*columns + BFS) per miss (BFS bounded by max_depth). Extra space proportional to cache size.
-    def evaluate_board() -> int:
-        """Heuristic from the bot's perspective: aggregate strength of both sides."""
-        heights_key = tuple(heights)
-        grid_key = tuple(tuple(row) for row in grid)
-        cache_key = (heights_key, grid_key, rows, columns, player, opponent)
-        if cache_key in _eval_cache:
-            return _eval_cache[cache_key]
+    evaluator: Optional[IncrementalEvaluator] = None,
+    stats: Optional[SearchStats] = None,
+) -> int:
+    connect = board.connect
+    cache_key = (_canonical_key(board)[0], rows, columns, connect, player, opponent)
+    cached = _eval_cache.get(cache_key)
+    if stats is not None:
+        stats.count("evals")
+        if cached is not None:
+            stats.count("eval_cache_hits")
+    if cached is not None:
+        return cached
 
+    if evaluator is not None:
+        total = evaluator.total
+    else:
         total = 0
         for r in range(rows):
             for c in range(columns):
                 cell = grid[r][c]
                 if cell == player:
-                    total += score_move(player, opponent, grid, (r, c), rows, columns)
+                    total += score_move(player, opponent, grid, (r, c), rows, columns, connect)
                 elif cell == opponent:
-                    total -= score_move(opponent, player, grid, (r, c), rows, columns)
+                    total -= score_move(opponent, player, grid, (r, c), rows, columns, connect)
+
+    # Threat distances via BFS: closer win for us boosts score; for opponent penalizes.
+    my_dist, opp_dist = bfs_threat_solver(
+        player, opponent, board.heights, grid, rows, columns, max_depth=threat_depth(columns), board=board, stats=stats
+    )
+    if my_dist is not None:
+        total += 50000 // (my_dist + 1)
+    if opp_dist is not None:
+        total -= 50000 // (opp_dist + 1)
+    _eval_cache.put(cache_key, total)
+    return total
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+
+
+# Objective: Return the shared process pool, (re)creating it for a new worker count.
+# Explanation: Worker processes are kept between moves so their own caches stay warm.
+# Complexity: O(1) when reused; O(workers) process start-up otherwise. Extra space O(workers) processes.
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        shutdown_pool()
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+    return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the root-parallel worker processes (they are restarted on demand)."""
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+        _pool_workers = 0
+
+
+# Objective: Worker task that scores one root move of a beam search.
+# Explanation: Rebuilds the position, runs the same closures as the sequential search and returns the score plus the journals of what it added to the worker's evaluation cache, threat cache and transposition table.
+# Complexity: O((beam_width)^(depth-1)) nodes. Extra space O(new entries) in the reply.
+def _score_root_move_task(task) -> Tuple[int, Tuple[list, list, list], int]:
+    player, opponent, heights, grid, rows, columns, connect, depth, beam_width, use_tablebase, col = task
+    board = grid_to_bitboard(grid, heights, rows, columns, (player, opponent), connect)
+    position = Board.from_grid(grid, heights, rows, columns, connect, (player, opponent))
+    evaluator = IncrementalEvaluator.from_grid(grid, player, opponent, rows, columns, connect)
+    _tt.new_search()
+    journaled = (_eval_cache, _bfs_cache, _tt)
+    for table in journaled:
+        table.start_journal()
+    nodes = [0]
+    tablebase = default_tablebase() if use_tablebase else None
+    _, score_root_move = _beam_search_closures(
+        player, opponent, position, board, evaluator, rows, columns, depth, beam_width, nodes, tablebase=tablebase
+    )
+    try:
+        score = score_root_move(col)
+    finally:
+        journals = tuple(table.take_journal() for table in journaled)
+    return score, journals, nodes[0]
+
+
+# Objective: Score root moves across a process pool.
+# Explanation: Submits one task per root move, collects scores in root order and merges every worker's new evaluations, threat distances and table entries into this process, so later moves here find them whichever process computed them.
+# Complexity: O(root moves * per-move search / workers) wall time. Extra space O(merged entries).
+def _parallel_root_scores(
+    cols, workers, player, opponent, heights, grid, rows, columns, connect, depth, beam_width, nodes, use_tablebase=True
+) -> List[int]:
+    snapshot = [row[:] for row in grid]
+    tasks = [(player, opponent, heights[:], snapshot, rows, columns, connect, depth, beam_width, use_tablebase, col) for col in cols]
+    scores = []
+    for score, journals, worker_nodes in _get_pool(workers).map(_score_root_move_task, tasks):
+        scores.append(score)
+        nodes[0] += worker_nodes
+        for table, journal in zip((_eval_cache, _bfs_cache, _tt), journals):
+            table.merge(journal)
+    return scores
+
+
+# Objective: Return the opening-book move for a position, if the book covers it.
+# Explanation: Probes the default mmap-backed book (when one has been generated) and checks the stored column is playable.
+# Complexity: Best O(1) with no book; Average/Worst O(log entries). Extra space O(1).
+def book_move(board, player: str) -> Optional[int]:
+    book = default_book()
+    if book is None:
+        return None
+    hit = book.lookup(board, player)
+    if hit is None or not board.can_play(hit[0]):
+        return None
+    return hit[0]
+
 
-        # Threat distances via BFS: closer win for us boosts score; for opponent penalizes.
-        my_dist, opp_dist = bfs_threat_solver(player, opponent, heights, grid, rows, columns, max_depth=4)
-        if my_dist is not None:
-            total += 50000 // (my_dist + 1)
-        if opp_dist is not None:
-            total -= 50000 // (opp_dist + 1)
-        _eval_cache[cache_key] = total
-        return total
+# Objective: Build the make/unmake, move-ordering and search closures for one beam search.
+# Explanation: Shares `position` (the flat-cell Board read by move scoring), `board` (the BitBoard for win checks and Zobrist keys) and `evaluator` between the closures so dfs_beam_bot_move and root-parallel workers run exactly the same node search. Leaves covered by `tablebase` get their exact value instead of the heuristic. With `stats`, search/ordered_moves/evaluate_board are rebound to traced wrappers; the closures call each other through those names, so untraced searches run the plain functions. Once `stop` is set, the next move made raises SearchAborted.
+# Complexity: O(1) to build; see search for the cost of running it. Extra space O(1).
+def _beam_search_closures(player, opponent, position, board, evaluator, rows, columns, depth, beam_width, nodes, stats=None, tablebase=None, stop=None):
+    heights = board.heights
+    cells_count = rows * columns
+    cells = position.cells
+    codes = {player: position.code(player), opponent: position.code(opponent)}
+    score_cell = position.score_move
+
+    def play(col: int, symbol: str) -> Tuple[int, int]:
+        if stop is not None and stop.is_set():
+            raise SearchAborted()
+        nodes[0] += 1
+        r = rows - heights[col] - 1
+        cells[r * columns + col] = codes[symbol]
+        board.play(col, symbol)
+        evaluator.place(r, col, symbol)
+        return r, col
+
+    def undo_move(r: int, c: int) -> None:
+        cells[r * columns + c] = 0
+        board.undo()
+        evaluator.remove(r, c)
+
+    # Objective: Score the current board from the bot's perspective with threats.
+    # Explanation: Near-full boards found in the tablebase score like a win/loss found by the search (100000 minus the plies to it, counted from the root) or 0 for a draw; everything else delegates to evaluate_position with the running evaluator, which caches by the Zobrist key.
+    # Complexity: Best O(columns + log entries) on a tablebase hit or O(1) on cache hit; Average/Worst O(BFS) per miss (BFS bounded by max_depth). Extra space proportional to cache size.
+    def evaluate_board(to_move: str) -> int:
+        """Heuristic from the bot's perspective: aggregate strength of both sides."""
+        if tablebase is not None:
+            exact = tablebase.probe(board, to_move)
+            if exact is not None:
+                if stats is not None:
+                    stats.count("tablebase_hits")
+                if exact == 0:
+                    return 0
+                plies = score_outcome(exact, sum(heights), cells_count)[1]
+                value = 100000 - (depth + plies)
+                return value if (exact > 0) == (to_move == player) else -value
+        return evaluate_position(board, None, player, opponent, rows, columns, evaluator, stats)
 
     # Objective: Rank candidate moves for a player and keep the best beam_width options.
     # Explanation: Scores simulated moves (threat-aware for bot) and returns them ordered via a heap.
@@ -82,37 +250,35 @@ def dfs_beam_bot_move(
         threat_cols = set()
         if is_max:
             for col in cols:
-                if try_move_wins(col, opponent, heights, grid, rows, columns):
+                if board.wins_after(col, opponent):
                     threat_cols.add(col)
 
-        heap: List[Tuple[int, int, int, int]] = []
+        # ties break on the column as seen in the canonical orientation, so a position and its
+        # mirror keep mirrored beams and can share transposition entries
+        flipped = _canonical_key(board)[1]
+        heap: List[Tuple[int, int, int, int, int]] = []
         for col in cols:
             if heights[col] >= rows:
                 continue
-            r, c = make_move_on_grid(col, for_player, grid, heights, rows)
-            if check_game_over((r, c), grid, rows, columns):
-                undo_move(r, c)
-                return [(col, (r, c))]  # immediate win
-            h_score = score_move(
-                for_player,
-                opponent if for_player == player else player,
-                grid,
-                (r, c),
-                rows,
-                columns,
-            )
+            if board.wins_after(col, for_player):
+                return [(col, (rows - heights[col] - 1, col))]  # immediate win
+            # only score_move reads the simulated drop, so a cell write is enough
+            r, c = rows - heights[col] - 1, col
+            index = r * columns + c
+            cells[index] = codes[for_player]
+            h_score = score_cell(r, c, codes[for_player], codes[opponent if for_player == player else player])
             if is_max and col in threat_cols:
                 h_score += 100000  # prioritize blocking opponent immediate wins
 
             # keep beam_width best-scoring moves
-            heapq.heappush(heap, (h_score, col, r, c))
+            heapq.heappush(heap, (h_score, columns - 1 - col if flipped else col, col, r, c))
             if len(heap) > beam_width:
                 heapq.heappop(heap)
-            undo_move(r, c)
+            cells[index] = 0
 
         # heap currently holds the top-scoring moves (min element is lowest of the kept set)
         best = heapq.nlargest(len(heap), heap)
-        return [(col, (r, c)) for (_, col, r, c) in best]
+        return [(col, (r, c)) for (_, _, col, r, c) in best]
 
     # Objective: Depth-limited adversarial DFS using the ordered move beam.
     # Explanation: Alternates maximizing/minimizing, detects wins, evaluates leaves, and returns heuristic scores.
@@ -121,58 +287,539 @@ def dfs_beam_bot_move(
     # Explanation: Alternates maximizing/minimizing, detects wins, evaluates leaves, and returns heuristic scores.
     # Complexity: Best O(1) on immediate win; Average O((beam_width)^(depth)) nodes; Worst O((beam_width)^(depth)) nodes. Extra space O(depth) recursion.
     def search(is_max: bool, current_depth: int) -> int:
+        key, flipped = _canonical_key(board)
+        hit = _tt.probe(key, current_depth)
+        if hit is not None:
+            if stats is not None:
+                stats.count("tt_hits")
+            return hit[1]
+
         cols = ordered_moves(player if is_max else opponent, is_max)
         if not cols:
             return 0
 
+        # Try the transposition table's best move first (order does not change the value)
+        tt_move = _tt_best_move(board)
+        if stats is not None:
+            stats.count("tt_misses")
+        for idx in range(1, len(cols)):
+            if cols[idx][0] == tt_move:
+                cols.insert(0, cols.pop(idx))
+                break
+
         best = float("-inf") if is_max else float("inf")
+        best_col = cols[0][0]
         for col, (r, c) in cols:
             mover = player if is_max else opponent
-            make_move_on_grid(col, mover, grid, heights, rows)
-            win = check_game_over((r, c), grid, rows, columns)
+            win = board.wins_after(col, mover)
+            play(col, mover)
 
             if win:
                 score = 100000 - (depth - current_depth) if is_max else -100000 + (depth - current_depth)
             elif current_depth == 0:
-                score = evaluate_board()
+                score = evaluate_board(opponent if is_max else player)
             else:
                 score = search(not is_max, current_depth - 1)
 
             undo_move(r, c)
 
-            if is_max:
-                best = max(best, score)
-            else:
-                best = min(best, score)
+            if (is_max and score > best) or (not is_max and score < best):
+                best = score
+                best_col = col
+        # beam search has no alpha/beta window, so every stored value is exact
+        _tt_store(board, key, flipped, current_depth, EXACT, int(best), best_col)
         return int(best)
 
+    # Objective: Score one root move for the bot.
+    # Explanation: Plays it, returns the win score or the minimizing search below it, and undoes it.
+    # Complexity: O((beam_width)^(depth-1)) nodes. Extra space O(depth) recursion.
+    def score_root_move(col: int) -> int:
+        win = board.wins_after(col, player)
+        r, c = play(col, player)
+        if win:
+            score = 100000
+        else:
+            score = search(False, depth - 1)
+        undo_move(r, c)
+        return score
+
+    if stats is not None:
+        search = stats.traced("search", search)
+        ordered_moves = stats.traced("ordered_moves", ordered_moves)
+        evaluate_board = stats.traced("evaluate_board", evaluate_board)
+    return ordered_moves, score_root_move
+
+
+# Objective: Choose a bot move via DFS with beam pruning and heuristic evaluation.
+# Explanation: Consults the opening book first, then performs depth-limited adversarial search, using ordered candidate moves and cached board scores/threats to select the best opening column.
+# Complexity: Best O(columns) with immediate win/block; Average O((beam_width)^depth * columns); Worst O((beam_width)^depth * columns). Extra space O((beam_width)^depth) plus caches.
+def dfs_beam_bot_move(
+    player: str,
+    opponent: str,
+    heights: List[int],
+    grid: List[List[str]],
+    rows: int,
+    columns: int,
+    depth: int = 5,
+    beam_width: int = 4,
+    use_book: bool = True,
+    workers: int = 1,
+    stats: Optional[SearchStats] = None,
+    connect: int = 4,
+    use_tablebase: bool = True,
+    stop: Optional[threading.Event] = None,
+) -> Optional[int]:
+    """Depth-limited DFS with beam pruning and heuristic leaf scoring.
+
+    - Uses DFS to a fixed depth.
+    - At each ply, orders candidate moves by a heuristic (greedy score) and only explores
+      the top `beam_width` moves (beam search).
+    - Max node = current player, Min node = opponent reply. This is the same adversarial
+      idea as minimax but implemented with covered tools: DFS + heaps + pruning.
+    - The search works on its own copies of the position: a bitboard for win detection
+      and Zobrist keys, and a flat-cell `Board` that move scoring reads. `grid` is
+      only read.
+    - Interior nodes are stored in a Zobrist-keyed transposition table, so positions
+      reached through different move orders are searched once; the stored best move is
+      tried first on later visits.
+    - The piece heuristic is kept up to date by an IncrementalEvaluator on every
+      make/unmake, so leaves do not rescan the board.
+    - Early positions covered by the opening book (see opening_book.py) are answered
+      from the book without searching.
+    - Leaves covered by the endgame tablebase (see tablebase.py) are scored with their
+      exact result instead of the heuristic; `use_tablebase=False` turns this off.
+    - With `workers > 1` the root moves are scored in parallel by a process pool; each
+      worker sends back the evaluations, threat distances and transposition entries it
+      computed, which are merged into this process's caches. The chosen move is the
+      same as with `workers=1`.
+    - Pass a `SearchStats` as `stats` to record this move's nodes, cache hits, threat
+      solver calls and section timings (see search_stats.py). Worker processes are not
+      traced; their nodes are still counted.
+    - `connect` is the winning run length; board size comes from `rows`/`columns`. Cost
+      per node grows with the number of columns (move ordering scores each one) and
+      leaf threat checks are capped by `threat_depth(columns)`.
+    - Setting the `stop` event abandons the search: the next node raises SearchAborted
+      (hfunctions.py). Root-parallel workers are not interrupted.
+    """
+
+    if stats is not None and not stats.in_move:
+        return stats.run_move(
+            "beam", dfs_beam_bot_move, player, opponent, heights, grid, rows, columns, depth, beam_width, use_book, workers, stats, connect,
+            use_tablebase, stop,
+        )
+    board = grid_to_bitboard(grid, heights, rows, columns, (player, opponent), connect)
+    last_search["nodes"] = 0
+    if use_book:
+        col = book_move(board, player)
+        if col is not None:
+            if stats is not None:
+                stats.count("book_hits")
+            return col
+    evaluator = IncrementalEvaluator.from_grid(grid, player, opponent, rows, columns, connect)
+    _tt.new_search()
+    if stats is not None:
+        stats.set_depth(depth)
+    # the bitboard owns the heights list while searching; cell writes share it
+    heights = board.heights
+    position = Board.from_grid(grid, heights, rows, columns, connect, (player, opponent))
+    nodes = [0]
+    tablebase = default_tablebase() if use_tablebase else None
+    ordered_moves, score_root_move = _beam_search_closures(
+        player, opponent, position, board, evaluator, rows, columns, depth, beam_width, nodes, stats, tablebase, stop
+    )
+
     # Root: decide the best initial column
     # Quick tactical checks at root: take win, then block opponent win.
     root_cols = available_moves(heights, rows)
     for col in root_cols:
-        if try_move_wins(col, player, heights, grid, rows, columns):
+        if board.wins_after(col, player):
             return col
     for col in root_cols:
-        if try_move_wins(col, opponent, heights, grid, rows, columns):
+        if board.wins_after(col, opponent):
             return col
 
     root_moves = ordered_moves(player, True)
     if not root_moves:
         return None
+    if columns % 2 and board.is_symmetric():
+        kept = set(_collapse_mirrors([col for col, _ in root_moves], columns))
+        root_moves = [move for move in root_moves if move[0] in kept]
+
+    if workers > 1 and len(root_moves) > 1:
+        scores = _parallel_root_scores(
+            [col for col, _ in root_moves], workers, player, opponent, heights, grid, rows, columns, connect, depth, beam_width, nodes,
+            use_tablebase,
+        )
+    else:
+        scores = [score_root_move(col) for col, _ in root_moves]
 
+    # Same tie-breaking as the sequential loop: first root move (in beam order) with the top score
     best_col = root_moves[0][0]
     best_score = float("-inf")
-    for col, (r, c) in root_moves:
-        make_move_on_grid(col, player, grid, heights, rows)
-        win = check_game_over((r, c), grid, rows, columns)
-        if win:
-            score = 100000
-        else:
-            score = search(False, depth - 1)
-        undo_move(r, c)
-
+    for (col, _), score in zip(root_moves, scores):
         if score > best_score:
             best_score = score
             best_col = col
 
+    last_search["nodes"] = nodes[0]
+    if stats is not None:
+        stats.count("nodes", nodes[0])
     return best_col
+
+
+WIN_SCORE = 100000
+
+
+# Objective: Search a position with full-width alpha-beta (negamax + principal variation search).
+# Explanation: Iteratively deepens a negamax search over a private bitboard copy of the position; the first move at each node gets a full window, later moves a null window that is re-searched only when it beats alpha. Moves are ordered dynamically (transposition-table move, killer moves of the ply, history scores, center first) without scoring each drop.
+# Complexity: Best O(columns^(depth/2)) nodes with perfect ordering; Average between that and the worst case; Worst O(columns^depth) nodes. Extra space O(depth) recursion plus the fixed-size table.
+def alphabeta_search(
+    player: str,
+    opponent: str,
+    heights: List[int],
+    grid: List[List[str]],
+    rows: int,
+    columns: int,
+    depth: int = 5,
+    stats: Optional[SearchStats] = None,
+    connect: int = 4,
+    stop: Optional[threading.Event] = None,
+) -> Tuple[Optional[int], int]:
+    """Full-width negamax alpha-beta with PVS null-window re-search.
+
+    Returns (best column, score for `player`); the column is None when the board is full.
+
+    - Scores are from the side to move (negamax); leaves use `evaluate_position`,
+      negated when the opponent is to move.
+    - Every legal move is searched (no beam), so a good move is never cut by the
+      heuristic; alpha-beta cutoffs keep the node count down instead.
+    - Bounds and best moves are stored in the shared transposition table.
+    - Move ordering is learned during the search instead of scored per node: the
+      table's best move, then the two killer moves of the ply (quiet moves that caused
+      a cutoff at the same ply elsewhere), then the history table (cutoffs per side and
+      landing cell, weighted by remaining depth), then center-first column order. Both
+      tables live for one call and carry across iterative-deepening passes. When the
+      opponent threatens an immediate win, only the blocking moves are searched (any
+      other move loses at once, so the value is unchanged).
+    - A `SearchStats` passed as `stats` receives nodes, evaluation counts and the
+      deepest completed iteration.
+    - Setting the `stop` event abandons the search: the next node raises SearchAborted.
+    """
+
+    board = grid_to_bitboard(grid, heights, rows, columns, (player, opponent), connect)
+    evaluator = IncrementalEvaluator.from_grid(grid, player, opponent, rows, columns, connect)
+    _tt.new_search()
+    heights = board.heights
+    # static tie-break: rank of each column in center-first order
+    center_rank = [0] * columns
+    for rank, col in enumerate(center_order(columns)):
+        center_rank[col] = rank
+    # killers[ply] = the last two distinct columns that caused a cutoff at that ply
+    killers = [[-1, -1] for _ in range(depth + 1)]
+    # history[side][height * columns + col]: cutoff credit for dropping into that cell
+    history = {player: [0] * ((rows + 1) * columns), opponent: [0] * ((rows + 1) * columns)}
+    nodes = [0]
+    last_search["nodes"] = 0
+
+    def play(col: int, symbol: str) -> None:
+        if stop is not None and stop.is_set():
+            raise SearchAborted()
+        nodes[0] += 1
+        r = rows - heights[col] - 1
+        board.play(col, symbol)
+        evaluator.place(r, col, symbol)
+
+    def undo(col: int) -> None:
+        r = rows - heights[col]
+        board.undo()
+        evaluator.remove(r, col)
+
+    # Objective: Order the legal moves of a node for alpha-beta without simulating them.
+    # Explanation: Sorts by a key of (table move, first killer, second killer) priority, then history credit for the landing cell, then center rank; only list lookups per move.
+    # Complexity: Best/Average/Worst O(columns log columns) per node. Extra space O(columns).
+    def ordered_moves(side: str, cols: List[int], ply: int) -> List[int]:
+        tt_move = _tt_best_move(board)
+        first, second = killers[ply]
+        credit = history[side]
+
+        def key(col: int):
+            bonus = 3 if col == tt_move else 2 if col == first else 1 if col == second else 0
+            return -bonus, -credit[heights[col] * columns + col], center_rank[col]
+
+        return sorted(cols, key=key)
+
+    # Objective: Credit a move that caused a beta cutoff.
+    # Explanation: Makes it the ply's first killer (demoting the old one) and adds remaining^2 to its history entry, so cutoffs near the root weigh more.
+    # Complexity: Best/Average/Worst O(1). Extra space O(1).
+    def reward(side: str, col: int, ply: int, remaining: int) -> None:
+        slot = killers[ply]
+        if slot[0] != col:
+            slot[1] = slot[0]
+            slot[0] = col
+        history[side][heights[col] * columns + col] += remaining * remaining
+
+    def negamax(remaining: int, alpha: int, beta: int, ply: int, side: str, other: str) -> int:
+        key, flipped = _canonical_key(board)
+        alpha_orig = alpha
+        hit = _tt.probe(key, remaining)
+        if hit is not None:
+            flag, score = hit
+            if flag == EXACT:
+                return score
+            if flag == LOWER:
+                alpha = max(alpha, score)
+            else:
+                beta = min(beta, score)
+            if alpha >= beta:
+                return score
+
+        cols = available_moves(heights, rows)
+        if not cols:
+            return 0
+        for col in cols:
+            if board.wins_after(col, side):
+                return WIN_SCORE - (ply + 1)
+        if remaining == 0:
+            score = evaluate_position(board, None, player, opponent, rows, columns, evaluator, stats)
+            return score if side == player else -score
+        # every move except a block loses at once, so only the blocks need searching
+        blocks = [col for col in cols if board.wins_after(col, other)]
+        if blocks:
+            cols = blocks
+        elif columns % 2 and board.zobrist == board.zobrist_mirror:
+            # symmetric position: a move and its mirror have the same value
+            cols = _collapse_mirrors(cols, columns)
+
+        best = -WIN_SCORE - 1
+        best_col = cols[0]
+        for idx, col in enumerate(ordered_moves(side, cols, ply)):
+            play(col, side)
+            if idx == 0:
+                score = -negamax(remaining - 1, -beta, -alpha, ply + 1, other, side)
+            else:
+                # null window: prove this move is no better than the current best
+                score = -negamax(remaining - 1, -alpha - 1, -alpha, ply + 1, other, side)
+                if alpha < score < beta:
+                    score = -negamax(remaining - 1, -beta, -score, ply + 1, other, side)
+            undo(col)
+
+            if score > best:
+                best = score
+                best_col = col
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                reward(side, col, ply, remaining)
+                break
+
+        if best <= alpha_orig:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        _tt_store(board, key, flipped, remaining, flag, best, best_col)
+        return best
+
+    root_cols = available_moves(heights, rows)
+    if not root_cols:
+        return None, 0
+    for col in root_cols:
+        if board.wins_after(col, player):
+            return col, WIN_SCORE - 1
+
+    # Iterative deepening: each pass seeds the next one's move ordering through the table.
+    best_col = root_cols[0]
+    best_score = 0
+    for iteration_depth in range(1, depth + 1):
+        best_score = negamax(iteration_depth, -WIN_SCORE - 1, WIN_SCORE + 1, 0, player, opponent)
+        tt_move = _tt_best_move(board)
+        if tt_move in root_cols:
+            best_col = tt_move
+        if stats is not None:
+            stats.set_depth(iteration_depth)
+    last_search["nodes"] = nodes[0]
+    if stats is not None:
+        stats.count("nodes", nodes[0])
+    return best_col, best_score
+
+
+# Objective: Choose a bot move via full-width alpha-beta.
+# Explanation: Answers from the opening book when possible, otherwise runs alphabeta_search and keeps only the column. With `stats`, the call is recorded as one move.
+# Complexity: That of alphabeta_search. Extra space O(1) beyond it.
+def alphabeta_bot_move(
+    player: str,
+    opponent: str,
+    heights: List[int],
+    grid: List[List[str]],
+    rows: int,
+    columns: int,
+    depth: int = 5,
+    use_book: bool = True,
+    stats: Optional[SearchStats] = None,
+    connect: int = 4,
+    stop: Optional[threading.Event] = None,
+) -> Optional[int]:
+    if stats is not None and not stats.in_move:
+        return stats.run_move(
+            "alphabeta", alphabeta_bot_move, player, opponent, heights, grid, rows, columns, depth, use_book, stats, connect, stop
+        )
+    if use_book:
+        col = book_move(grid_to_bitboard(grid, heights, rows, columns, (player, opponent), connect), player)
+        if col is not None:
+            if stats is not None:
+                stats.count("book_hits")
+            return col
+    return alphabeta_search(player, opponent, heights, grid, rows, columns, depth, stats, connect, stop)[0]
+
+
+# Objective: Choose a provably best move with the exact solver, falling back to alpha-beta.
+# Explanation: Solves connect-4 positions with at least `min_pieces` stones on boards the solver supports (the solver's table persists between moves); a solve that exceeds `max_nodes`, an earlier position or another run length uses alphabeta_bot_move. With `stats`, counts solved/aborted moves and adds the solver's nodes to `nodes`. Setting `stop` raises SearchAborted from either search.
+# Complexity: Exponential in the empty cells, capped at max_nodes; otherwise that of alphabeta_bot_move. Extra space: the solver's fixed table.
+def solver_bot_move(
+    player: str,
+    opponent: str,
+    heights: List[int],
+    grid: List[List[str]],
+    rows: int,
+    columns: int,
+    min_pieces: int = 12,
+    max_nodes: int = 300_000,
+    depth: int = 5,
+    stats: Optional[SearchStats] = None,
+    connect: int = 4,
+    stop: Optional[threading.Event] = None,
+) -> Optional[int]:
+    if stats is not None and not stats.in_move:
+        return stats.run_move(
+            "solve", solver_bot_move, player, opponent, heights, grid, rows, columns, min_pieces, max_nodes, depth, stats, connect, stop
+        )
+    if connect == 4 and (rows + 1) * columns <= 64 and sum(heights) >= min_pieces and available_moves(heights, rows):
+        solver = get_solver(rows, columns)
+        try:
+            solution = solver.solve(player, opponent, heights, grid, max_nodes, stop)
+        except SolveAborted:
+            if stop is not None and stop.is_set():
+                raise SearchAborted()
+            if stats is not None:
+                stats.count("solver_aborted")
+        else:
+            if stats is not None:
+                stats.count("solved")
+            return solution.best_move
+        finally:
+            if stats is not None and solver.nodes:
+                stats.count("nodes", solver.nodes)
+    return alphabeta_bot_move(player, opponent, heights, grid, rows, columns, depth, stats=stats, connect=connect, stop=stop)
+
+
+# Objective: Choose a bot move by Monte Carlo tree search within a time or playout budget.
+# Explanation: Answers from the opening book or takes/blocks an immediate win when possible; otherwise searches `tree` (by default the shared per-size tree, reusing the subtree of the position reached since the last call) until `time_limit` seconds or `playouts` playouts are spent, or raises SearchAborted once `stop` is set. With `workers > 1`, the pool runs workers - 1 independent searches to the same deadline while this process searches, and the root visit counts are summed before picking the most visited move. With `stats`, counts playouts (also as nodes) and the visits carried over from the previous tree.
+# Complexity: O(time_limit) wall time, or O(playouts * (tree depth * columns + rollout)). Extra space O(playouts) nodes per process.
+def mcts_bot_move(
+    player: str,
+    opponent: str,
+    heights: List[int],
+    grid: List[List[str]],
+    rows: int,
+    columns: int,
+    time_limit: Optional[float] = 1.0,
+    playouts: Optional[int] = None,
+    workers: int = 1,
+    use_book: bool = True,
+    stats: Optional[SearchStats] = None,
+    connect: int = 4,
+    seed: Optional[int] = None,
+    stop: Optional[threading.Event] = None,
+    tree: Optional[mcts.MCTS] = None,
+) -> Optional[int]:
+    if stats is not None and not stats.in_move:
+        return stats.run_move(
+            "mcts", mcts_bot_move, player, opponent, heights, grid, rows, columns, time_limit, playouts, workers, use_book, stats, connect, seed,
+            stop, tree,
+        )
+    board = grid_to_bitboard(grid, heights, rows, columns, (player, opponent), connect)
+    last_search["nodes"] = 0
+    if use_book:
+        col = book_move(board, player)
+        if col is not None:
+            if stats is not None:
+                stats.count("book_hits")
+            return col
+    root_cols = mcts.candidate_moves(board, player, opponent)
+    if len(root_cols) <= 1:
+        return root_cols[0] if root_cols else None
+
+    deadline = time.time() + time_limit if time_limit is not None else None
+    futures = []
+    share = None
+    if workers > 1:
+        share = -(-playouts // workers) if playouts is not None else None
+        base = seed if seed is not None else random.randrange(1 << 30)
+        snapshot = [row[:] for row in grid]
+        pool = _get_pool(workers - 1)
+        futures = [
+            pool.submit(mcts.search_root, (player, opponent, heights[:], snapshot, rows, columns, connect, deadline, share, base + idx + 1))
+            for idx in range(workers - 1)
+        ]
+    if tree is None:
+        tree = mcts.get_tree(rows, columns, connect)
+    with tree.lock:
+        if seed is not None:
+            tree.rng.seed(seed)
+        tree.set_position(board, player, opponent)
+        done = tree.run(playouts=share if share is not None else playouts, deadline=deadline, stop=stop)
+        totals = tree.root_stats()
+        reused = tree.reused
+    if stop is not None and stop.is_set():
+        for future in futures:
+            future.cancel()
+        raise SearchAborted()
+    for future in futures:
+        worker_stats, worker_done = future.result()
+        done += worker_done
+        for col, (visits, wins) in worker_stats.items():
+            old_visits, old_wins = totals.get(col, (0, 0.0))
+            totals[col] = (old_visits + visits, old_wins + wins)
+
+    last_search["nodes"] = done
+    if stats is not None:
+        stats.count("playouts", done)
+        stats.count("nodes", done)
+        stats.count("mcts_reused_visits", reused)
+    return mcts.best_move(totals)
+
+
+# Bot engines selectable from main_game / ui_game: name -> (search function, default settings).
+ENGINES = {
+    "beam": (dfs_beam_bot_move, {"depth": 4, "beam_width": 3}),
+    "alphabeta": (alphabeta_bot_move, {"depth": 5}),
+    # exact solver from the middle game on (strongest, slowest); alpha-beta before that
+    "solve": (solver_bot_move, {"min_pieces": 12, "max_nodes": 300_000}),
+    # Monte Carlo tree search: fixed time per move, strength grows with the budget
+    "mcts": (mcts_bot_move, {"time_limit": 1.0}),
+}
+if batch_eval.np is not None:
+    # separate piece-only engine: full-width minimax, all leaves scored in one vectorized
+    # call without the threat term (weaker than beam/alphabeta; needs numpy)
+    ENGINES["batched"] = (batch_eval.batched_bot_move, {"depth": 4})
+
+
+# Objective: Run the named bot engine with its default settings.
+# Explanation: Looks the engine up in ENGINES and forwards the board; extra keyword options override the defaults.
+# Complexity: That of the chosen engine. Extra space O(1) beyond the engine's own.
+def engine_bot_move(engine: str, player: str, opponent: str, heights: List[int], grid: List[List[str]], rows: int, columns: int, **options) -> Optional[int]:
+    if engine not in ENGINES:
+        raise ValueError("Unknown bot engine: {0}".format(engine))
+    search_fn, defaults = ENGINES[engine]
+    settings = dict(defaults)
+    settings.update(options)
+    return search_fn(player, opponent, heights, grid, rows, columns, **settings)
+
+
+# Objective: Run the named bot engine on a board.Board position.
+# Explanation: The engines make/unmake moves on their own grid, heights and bitboard, so this hands them a decoded grid and a heights list; the Board itself is never mutated. The board's `connect` applies.
+# Complexity: O(rows*columns) for the conversion plus that of the chosen engine. Extra space O(rows*columns).
+def board_bot_move(engine: str, board: Board, player: str, opponent: str, **options) -> Optional[int]:
+    options.setdefault("connect", board.connect)
+    return engine_bot_move(engine, player, opponent, list(board.heights), board.to_grid(), board.rows, board.columns, **options)
@@ -0,0 +1,192 @@
+"""Opening book: precomputed best moves for every position up to a fixed ply.
+
+File layout (little-endian):
+    header  : magic b"C4OB", version, rows, columns, connect, max_ply (5 x uint8), entry count (uint32)
+    entries : sorted by key; key (uint64), best column (int8), score for side to move (int32)
+
+The key is `side_to_move_mask + occupied + bottom_mask` on the BitBoard layout, which
+is unique per position and independent of the symbols used. Lookups binary-search the
+file through `mmap`, so only the touched pages are read.
+
+Generate a book offline with:
+    python opening_book.py --ply 6 --depth 6 --out opening_book.bin
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import time
+from typing import Dict, Optional, Tuple
+
+from bitboard import BitBoard
+from board import board_side, check_size
+
+
+MAGIC = b"C4OB"
+VERSION = 2
+HEADER = struct.Struct("<4sBBBBBI")
+RECORD = struct.Struct("<Qbi")
+
+DEFAULT_BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.bin")
+
+
+# Objective: Compute the symbol-independent book key of a position.
+# Explanation: Adds the side-to-move mask, the occupied mask and the bottom row; the carry leaves one marker bit above each column, so the sum is unique.
+# Complexity: Best O(1); Average O(1); Worst O(1). Extra space O(1).
+def position_key(board: BitBoard, to_move: str) -> int:
+    return board.masks.get(to_move, 0) + board.occupied + board.bottom_mask
+
+
+def _ply(board: BitBoard) -> int:
+    return bin(board.occupied).count("1")
+
+
+class OpeningBook:
+    """Read-only, mmap-backed view of an opening book file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = HEADER.unpack_from(self._mm, 0)[:2]
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("Not an opening book file (or an old version; regenerate it): {0}".format(path))
+        _, _, self.rows, self.columns, self.connect, self.max_ply, self.count = HEADER.unpack_from(self._mm, 0)
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._file.close()
+            self._mm = None
+
+    # Objective: Find the stored (best column, score) for a position.
+    # Explanation: Rejects other board sizes or run lengths and positions past max_ply, then binary-searches the sorted fixed-width records in the mapped file.
+    # Complexity: Best O(1); Average O(log entries); Worst O(log entries). Extra space O(1).
+    def lookup(self, board: BitBoard, to_move: str) -> Optional[Tuple[int, int]]:
+        if self._mm is None or (board.rows, board.columns, board.connect) != (self.rows, self.columns, self.connect):
+            return None
+        if _ply(board) > self.max_ply:
+            return None
+        key = position_key(board, to_move)
+        lo, hi = 0, self.count - 1
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            entry_key, col, score = RECORD.unpack_from(self._mm, HEADER.size + mid * RECORD.size)
+            if entry_key == key:
+                return col, score
+            if entry_key < key:
+                lo = mid + 1
+            else:
+                hi = mid - 1
+        return None
+
+
+_default_book: Optional[OpeningBook] = None
+_default_checked = False
+
+
+# Objective: Return the book at DEFAULT_BOOK_PATH, opening it on first use.
+# Explanation: Checks for the file once per process; returns None when no book has been generated.
+# Complexity: Best O(1); Average O(1); Worst O(1) (maps the file, does not read it). Extra space O(1).
+def default_book() -> Optional[OpeningBook]:
+    global _default_book, _default_checked
+    if not _default_checked:
+        _default_checked = True
+        if os.path.exists(DEFAULT_BOOK_PATH):
+            _default_book = OpeningBook(DEFAULT_BOOK_PATH)
+    return _default_book
+
+
+# Objective: Replace the process-wide book (None disables book lookups).
+# Explanation: Closes the current book and opens the one at path.
+# Complexity: Best O(1); Average O(1); Worst O(1). Extra space O(1).
+def set_default_book(path: Optional[str]) -> None:
+    global _default_book, _default_checked
+    if _default_book is not None:
+        _default_book.close()
+    _default_book = OpeningBook(path) if path else None
+    _default_checked = True
+
+
+# Objective: Enumerate every non-terminal position reachable within max_ply.
+# Explanation: DFS with make/unmake from the empty board; positions are deduplicated by book key and games that are already won are not extended.
+# Complexity: Best/Average/Worst O(columns^max_ply) before deduplication. Extra space O(positions).
+def enumerate_positions(
+    rows: int, columns: int, max_ply: int, symbols=("#", "O"), connect: int = 4
+) -> Dict[int, Tuple[Tuple[int, ...], str]]:
+    board = BitBoard(rows, columns, symbols, connect)
+    positions: Dict[int, Tuple[Tuple[int, ...], str]] = {}
+
+    def walk(ply: int) -> None:
+        to_move = symbols[ply % 2]
+        key = position_key(board, to_move)
+        if key in positions:
+            return
+        positions[key] = (tuple(col for col, _ in board.history), to_move)
+        if ply == max_ply:
+            return
+        for col in board.available_moves():
+            board.play(col, to_move)
+            if not board.is_win(to_move):
+                walk(ply + 1)
+            board.undo()
+
+    walk(0)
+    return positions
+
+
+# Objective: Build and write an opening book file.
+# Explanation: Evaluates each enumerated position with the alpha-beta engine at `depth`, then writes the records sorted by key.
+# Complexity: O(positions * search cost) time; O(positions) extra space.
+def generate_book(
+    path: str, max_ply: int = 4, depth: int = 6, rows: int = 6, columns: int = 7, verbose: bool = True, connect: int = 4
+) -> int:
+    from new_try import alphabeta_search
+
+    if (rows + 1) * columns > 64:
+        raise ValueError("Book keys need (rows + 1) * columns <= 64 bits")
+    symbols = ("#", "O")
+    positions = enumerate_positions(rows, columns, max_ply, symbols, connect)
+    records = []
+    started = time.perf_counter()
+    for idx, (key, (moves, to_move)) in enumerate(sorted(positions.items())):
+        board = BitBoard(rows, columns, symbols, connect)
+        for ply, col in enumerate(moves):
+            board.play(col, symbols[ply % 2])
+        other = symbols[1] if to_move == symbols[0] else symbols[0]
+        col, score = alphabeta_search(to_move, other, board.heights[:], board.to_grid(), rows, columns, depth, connect=connect)
+        if col is not None:
+            records.append((key, col, score))
+        if verbose and (idx + 1) % 100 == 0:
+            print("{0}/{1} positions ({2:.1f}s)".format(idx + 1, len(positions), time.perf_counter() - started))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(HEADER.pack(MAGIC, VERSION, rows, columns, connect, max_ply, len(records)))
+        for record in records:
+            out.write(RECORD.pack(*record))
+    os.replace(tmp_path, path)
+    return len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a Connect 4 opening book.")
+    parser.add_argument("--ply", type=int, default=4, help="deepest ply (pieces on board) to store")
+    parser.add_argument("--depth", type=int, default=6, help="alpha-beta depth used to evaluate each position")
+    parser.add_argument("--rows", type=board_side, default=6)
+    parser.add_argument("--columns", type=board_side, default=7)
+    parser.add_argument("--connect", type=int, default=4)
+    parser.add_argument("--out", default=DEFAULT_BOOK_PATH)
+    args = parser.parse_args()
+    try:
+        check_size(args.rows, args.columns, args.connect)
+    except ValueError as exc:
+        parser.error(str(exc))
+    count = generate_book(args.out, args.ply, args.depth, args.rows, args.columns, connect=args.connect)
+    print("Wrote {0} positions to {1}".format(count, args.out))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from greedy import score_move
+from hfunctions import SearchAborted, available_moves, check_game_over, make_move_on_grid
+from mcts import MCTS
+from new_try import engine_bot_move
+
+
+# Objective: Hashable key of a grid position.
+# Explanation: Joins each row into a string; the grid alone determines the position.
+# Complexity: Best/Average/Worst O(rows*columns). Extra space O(rows*columns).
+def position_key(grid: List[List[str]]) -> Tuple[str, ...]:
+    return tuple("".join(row) for row in grid)
+
+
+class Ponderer:
+    """Searches the bot's answers to likely human replies while the human is thinking.
+
+    `start` snapshots the position with the human to move and, on a daemon thread, plays
+    each legal human reply (most promising by `score_move` first) and runs the bot engine
+    on the result. The answers are kept per resulting position. The searches also fill
+    the shared evaluation/threat caches and the transposition table's best moves, so even
+    an unpredicted reply is searched faster.
+
+    `take` stops pondering and returns the stored answer for the actual position (or
+    None). If the search in progress is for that position it is allowed to finish;
+    any other search is abandoned through the engine's `stop` event, so the bot's own
+    search starts at once and never runs alongside a pondering search over the shared
+    caches. `discard` drops everything; call it on undo/redo or whenever the position
+    changes some other way.
+
+    With the "mcts" engine the ponderer searches its own tree, so the shared tree kept
+    for the game (mcts.get_tree) is not reset to a guessed position.
+    """
+
+    def __init__(self, engine: str, bot: str, human: str, rows: int, columns: int, connect: int = 4, **options):
+        self.engine = engine
+        self.bot = bot
+        self.human = human
+        self.rows = rows
+        self.columns = columns
+        self.connect = connect
+        self.options = dict(options, connect=connect)
+        if engine == "mcts":
+            self.options.setdefault("tree", MCTS(rows, columns, connect))
+        self.answers: Dict[Tuple[str, ...], Optional[int]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # position the thread is searching, and the one take() is waiting for
+        self._current: Optional[Tuple[str, ...]] = None
+        self._target: Optional[Tuple[str, ...]] = None
+
+    @property
+    def pondering(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # Objective: Begin pondering a position where the human is to move.
+    # Explanation: Discards previous work, copies the board and launches the background thread.
+    # Complexity: O(rows*columns) on the caller's thread. Extra space O(rows*columns).
+    def start(self, heights: List[int], grid: List[List[str]]) -> None:
+        self.discard()
+        self._stop = threading.Event()
+        self._target = None
+        snapshot = ([row[:] for row in grid], heights[:])
+        self._thread = threading.Thread(target=self._ponder, args=(snapshot, self._stop), name="ponder", daemon=True)
+        self._thread.start()
+
+    # Objective: Search the bot's answer to every human reply, most likely first.
+    # Explanation: Orders the replies by score_move for the human, then for each one plays it on the private copy, searches the bot's answer unless the reply ends the game, and undoes it; ends when the stop flag is set or take() has named the position it wants, and drops a search aborted by the stop flag.
+    # Complexity: O(columns * engine search). Extra space O(columns) answers.
+    def _ponder(self, snapshot, stop: threading.Event) -> None:
+        grid, heights = snapshot
+        replies = []
+        for col in available_moves(heights, self.rows):
+            r = self.rows - heights[col] - 1
+            grid[r][col] = self.human
+            replies.append((-score_move(self.human, self.bot, grid, (r, col), self.rows, self.columns, self.connect), col))
+            grid[r][col] = "*"
+        replies.sort()
+
+        for _, col in replies:
+            if stop.is_set() or self._target is not None:
+                return
+            r, c = make_move_on_grid(col, self.human, grid, heights, self.rows)
+            if not check_game_over((r, c), grid, self.rows, self.columns, self.connect) and available_moves(heights, self.rows):
+                key = position_key(grid)
+                self._current = key
+                try:
+                    self.answers[key] = engine_bot_move(
+                        self.engine, self.bot, self.human, heights, grid, self.rows, self.columns, stop=stop, **self.options
+                    )
+                except SearchAborted:
+                    return
+                finally:
+                    self._current = None
+            grid[r][c] = "*"
+            heights[c] -= 1
+
+    # Objective: Stop pondering and wait for the thread to end.
+    # Explanation: Sets the stop flag, which the engines check at every node (the solver every 1024, MCTS every 16 playouts), and joins the thread.
+    # Complexity: O(1) plus the time to the engine's next check. Extra space O(1).
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    # Objective: Return the pondered answer for the position the human actually reached.
+    # Explanation: Names the position for the thread, which then starts no further search; a search already running for this position is joined so its answer is kept, any other is stopped. Then looks the position up and clears the other answers.
+    # Complexity: O(rows*columns) plus at most the in-flight search of this position. Extra space O(1).
+    def take(self, heights: List[int], grid: List[List[str]]) -> Optional[int]:
+        key = position_key(grid)
+        self._target = key
+        if self._thread is not None and self._current == key:
+            self._thread.join()
+        self.stop()
+        answer = self.answers.get(key)
+        self.answers.clear()
+        if answer is None or heights[answer] >= self.rows:
+            return None
+        return answer
+
+    def discard(self) -> None:
+        self.stop()
+        self.answers.clear()
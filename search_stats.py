@@ -0,0 +1,151 @@
+import json
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class SearchStats:
+    """Optional counters and timings for bot searches.
+
+    Pass an instance as `stats=` to `dfs_beam_bot_move`, `alphabeta_bot_move`,
+    `greedy.greedy`, `evaluate_position` or `bfs_threat_solver`. With `stats=None`
+    (the default) the searches run their untraced code paths, so the only cost is one
+    `is not None` check per call site.
+
+    - Every bot call becomes one move record: engine, column, wall time, counters and
+      the depth reached. A call that raises (e.g. SearchAborted) is still closed, as a
+      record with column None and "aborted" set, so later work is not charged to it.
+    - `enter`/`leave` (or `traced`) time nested sections such as
+      search > ordered_moves or evaluate_board > bfs_threat_solver. Times are
+      aggregated per call path.
+    - `to_dict`/`write_json` export everything. `folded` writes the path times as
+      "a;b;c <microseconds>" lines for flamegraph.pl / speedscope.
+    """
+
+    def __init__(self):
+        self.moves: List[Dict[str, Any]] = []
+        self.in_move = False
+        self._move: Optional[Dict[str, Any]] = None
+        self._move_depth = 0
+        # counters recorded outside any move, e.g. a direct bfs_threat_solver call
+        self._loose: Dict[str, int] = defaultdict(int)
+        self._stack: List[Tuple[str, float]] = []
+        self._path_times: Dict[Tuple[str, ...], float] = defaultdict(float)
+
+    # Objective: Run one bot call as a recorded move.
+    # Explanation: Opens a move record, calls fn (which sees in_move=True and runs normally) and closes the record with the returned column; if fn raises, the record is closed as aborted before the exception propagates.
+    # Complexity: O(1) besides fn. Extra space O(counters) per move.
+    def run_move(self, engine: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        self.begin_move(engine)
+        column = None
+        aborted = True
+        try:
+            column = fn(*args, **kwargs)
+            aborted = False
+        finally:
+            self.end_move(column, aborted)
+        return column
+
+    def begin_move(self, engine: str) -> None:
+        self.in_move = True
+        self._move = {
+            "engine": engine,
+            "started": time.perf_counter(),
+            "counters": defaultdict(int),
+            "depth": None,
+        }
+        self._move_depth = len(self._stack)
+        self._stack.append(("move:" + engine, self._move["started"]))
+
+    # Objective: Close the current move record.
+    # Explanation: Also closes any section an exception left open inside the move, so the stack is back where begin_move found it.
+    # Complexity: O(open sections * stack depth). Extra space O(counters).
+    def end_move(self, column: Optional[int], aborted: bool = False) -> None:
+        move = self._move
+        if move is None:
+            return
+        while len(self._stack) > self._move_depth:
+            self.leave()
+        record = {
+            "engine": move["engine"],
+            "column": column,
+            "seconds": time.perf_counter() - move["started"],
+            "depth": move["depth"],
+            "counters": dict(move["counters"]),
+        }
+        if aborted:
+            record["aborted"] = True
+        self.moves.append(record)
+        self._move = None
+        self.in_move = False
+
+    def count(self, name: str, amount: int = 1) -> None:
+        if self._move is None:
+            self._loose[name] += amount
+        else:
+            self._move["counters"][name] += amount
+
+    def set_depth(self, depth: int) -> None:
+        if self._move is not None:
+            self._move["depth"] = depth
+
+    def enter(self, name: str) -> None:
+        self._stack.append((name, time.perf_counter()))
+
+    # Objective: Close the innermost timed section.
+    # Explanation: Adds the elapsed time to the section's full call path so nested calls stay separate.
+    # Complexity: O(stack depth) to build the path key. Extra space O(distinct paths).
+    def leave(self) -> None:
+        name, started = self._stack.pop()
+        path = tuple(entry[0] for entry in self._stack) + (name,)
+        self._path_times[path] += time.perf_counter() - started
+
+    # Objective: Wrap a function so every call is counted and timed as a section.
+    # Explanation: Only used when stats are enabled, so untraced searches never pay for the wrapper.
+    # Complexity: O(1) overhead per call plus leave(). Extra space O(1).
+    def traced(self, name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        def wrapper(*args, **kwargs):
+            self.count(name + "_calls")
+            self.enter(name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.leave()
+
+        return wrapper
+
+    def totals(self) -> Dict[str, int]:
+        totals: Dict[str, int] = defaultdict(int, self._loose)
+        for move in self.moves:
+            for name, value in move["counters"].items():
+                totals[name] += value
+        return dict(totals)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "moves": self.moves,
+            "totals": self.totals(),
+            "sections": {";".join(path): seconds for path, seconds in self._path_times.items()},
+        }
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w") as handle:
+            json.dump(self.to_dict(), handle, indent=2)
+
+    # Objective: Export section times in the folded-stack format used by flamegraph tools.
+    # Explanation: Converts inclusive path times to self times by subtracting each path's direct children, one line per path in microseconds.
+    # Complexity: O(paths). Extra space O(paths).
+    def folded(self) -> str:
+        child_time: Dict[Tuple[str, ...], float] = defaultdict(float)
+        for path, seconds in self._path_times.items():
+            if len(path) > 1:
+                child_time[path[:-1]] += seconds
+        lines = []
+        for path, seconds in sorted(self._path_times.items()):
+            self_time = max(0.0, seconds - child_time[path])
+            lines.append("{0} {1}".format(";".join(path), int(self_time * 1_000_000)))
+        return "\n".join(lines) + "\n"
+
+    def write_folded(self, path: str) -> None:
+        with open(path, "w") as handle:
+            handle.write(self.folded())
@@ -0,0 +1,297 @@
+"""Exact connect-4 solver: game-theoretic value, distance and best move of a position.
+
+Negamax with alpha-beta over two integers per position (the side to move's stones and
+all stones, on the BitBoard column layout), which makes play a copy-free XOR/OR and
+win checks a handful of shifts. A position scores (rows*columns + 2 - n) // 2 for the
+side to move if it wins with the n-th stone on the board, 0 for a draw, and the
+negation for a loss, so faster wins score higher.
+
+Speed comes from:
+    - only searching moves that do not hand the opponent an immediate win;
+    - a null-window search that bisects the score range;
+    - an array-backed transposition table of bounds that survives between solves
+      (values are absolute, not relative to a root);
+    - ordering moves by how many new winning cells they create, center first on ties.
+
+Positions from the middle of a 6x7 game solve in seconds; empty or near-empty boards
+take far longer in pure Python, so the bot engine only solves past a piece count and
+gives up after a node budget (see new_try.solver_bot_move).
+"""
+
+import threading
+from array import array
+from typing import List, Optional, Tuple
+
+from bitboard import BitBoard
+from hfunctions import center_order
+
+
+DEFAULT_TT_SIZE = 2097143  # prime, so key % size spreads the structured keys
+
+
+# Objective: Convert a solver score into (outcome, plies to the end) for the side to move.
+# Explanation: A win scored s ends with the stone that makes the total cells + 1 - 2s or cells + 2 - 2s, whichever the winner places (the side to move places stones moves + 1, moves + 3, ...); a loss is the same for the opponent; a draw ends when the board is full.
+# Complexity: Best/Average/Worst O(1). Extra space O(1).
+def score_outcome(score: int, moves: int, cells: int) -> Tuple[str, int]:
+    if score == 0:
+        return "draw", cells - moves
+    winner_parity = (moves + 1) % 2 if score > 0 else moves % 2
+    last = cells + 2 - 2 * abs(score)  # stones on the board after the winning stone
+    if last % 2 != winner_parity:
+        last -= 1
+    return ("win" if score > 0 else "loss"), last - moves
+
+
+class SolveAborted(Exception):
+    """Raised when a solve exceeds its node budget or its `stop` event is set."""
+
+
+class Solution:
+    """Result of solving a position for the side to move.
+
+    - ``outcome``: "win", "draw" or "loss" for the side to move.
+    - ``plies``: moves until the game ends under perfect play, counting the final one
+      (for a draw, until the board is full).
+    - ``best_move``: a column achieving the value (None on a full board).
+    - ``score``: the raw solver score (positive wins, faster wins higher).
+    """
+
+    __slots__ = ("outcome", "plies", "best_move", "score", "nodes")
+
+    def __init__(self, outcome: str, plies: int, best_move: Optional[int], score: int, nodes: int):
+        self.outcome = outcome
+        self.plies = plies
+        self.best_move = best_move
+        self.score = score
+        self.nodes = nodes
+
+    def __repr__(self) -> str:
+        return "Solution(outcome={0!r}, plies={1}, best_move={2}, score={3}, nodes={4})".format(
+            self.outcome, self.plies, self.best_move, self.score, self.nodes
+        )
+
+
+class Solver:
+    """Connect-4 solver for one board size; keep one instance to reuse its transposition table.
+
+    Needs ``(rows + 1) * columns <= 64`` so position keys fit the table's uint64 column.
+    """
+
+    def __init__(self, rows: int = 6, columns: int = 7, tt_size: int = DEFAULT_TT_SIZE):
+        if (rows + 1) * columns > 64:
+            raise ValueError("Solver supports boards with (rows + 1) * columns <= 64")
+        self.rows = rows
+        self.columns = columns
+        self.stride = rows + 1
+        self.cells = rows * columns
+        self.bottom_mask = sum(1 << (c * self.stride) for c in range(columns))
+        self.board_mask = self.bottom_mask * ((1 << rows) - 1)
+        self.column_masks = [((1 << rows) - 1) << (c * self.stride) for c in range(columns)]
+        self.order = center_order(columns)
+        # every score a node can return or bound, so upper and lower table entries never overlap
+        self.min_score = -(self.cells // 2)
+        self.max_score = (self.cells + 1) // 2
+        self.tt_size = tt_size
+        self.tt_keys = array("Q", bytes(8 * tt_size))
+        self.tt_values = array("B", bytes(tt_size))
+        self.nodes = 0
+
+    def clear(self) -> None:
+        self.tt_keys = array("Q", bytes(8 * self.tt_size))
+        self.tt_values = array("B", bytes(self.tt_size))
+
+    # Objective: Mark every empty cell that would complete four for the stones in `position`.
+    # Explanation: Vertical threats need three stones below; for the other three directions, combines shifted copies so each of the four window placements around a cell is covered. Off-board bits are masked out.
+    # Complexity: Best/Average/Worst O(1) (about 30 big-int ops on (rows+1)*columns bits). Extra space O(1).
+    def winning_cells(self, position: int, mask: int) -> int:
+        r = (position << 1) & (position << 2) & (position << 3)
+        for step in (self.stride, self.stride - 1, self.stride + 1):
+            pair = (position << step) & (position << (2 * step))
+            r |= pair & (position << (3 * step))
+            r |= pair & (position >> step)
+            pair = (position >> step) & (position >> (2 * step))
+            r |= pair & (position << step)
+            r |= pair & (position >> (3 * step))
+        return r & (self.board_mask ^ mask)
+
+    # Objective: Solve a position given as (stones of the side to move, all stones, stones played).
+    # Explanation: Returns the exact score: an immediate win is scored directly, otherwise null-window negamax probes bisect [min, max] (probing near 0 first, where most positions lie). Raises SolveAborted past max_nodes or soon after `stop` is set.
+    # Complexity: Exponential in the empty cells in the worst case; the table and pruning make mid-game positions tractable. Extra space O(empty cells) recursion plus the fixed table.
+    def solve_bits(self, position: int, mask: int, moves: int, max_nodes: Optional[int] = None, stop: Optional[threading.Event] = None) -> int:
+        if self.winning_cells(position, mask) & ((mask + self.bottom_mask) & self.board_mask):
+            return (self.cells + 1 - moves) // 2
+        negamax = self._negamax_fn(max_nodes, stop)
+        low = -((self.cells - moves) // 2)
+        high = (self.cells + 1 - moves) // 2
+        while low < high:
+            med = low + (high - low) // 2
+            if med <= 0 and int(low / 2) < med:
+                med = int(low / 2)
+            elif med >= 0 and int(high / 2) > med:
+                med = int(high / 2)
+            r = negamax(position, mask, moves, med, med + 1)
+            if r <= med:
+                high = r
+            else:
+                low = r
+        return low
+
+    # Objective: Build the recursive negamax over local copies of the solver's tables.
+    # Explanation: Each node prunes to moves that do not lose at once (none: lost next move; two forced blocks: lost), tightens alpha/beta from the score bounds and the table, then searches children ordered by the number of winning cells they create and stores a lower bound on cutoff or an upper bound otherwise. The `stop` event is read every 1024 nodes.
+    # Complexity: As solve_bits. Extra space O(1) per node besides the table.
+    def _negamax_fn(self, max_nodes: Optional[int], stop: Optional[threading.Event] = None):
+        cells = self.cells
+        board_mask = self.board_mask
+        bottom_mask = self.bottom_mask
+        column_masks = [self.column_masks[c] for c in self.order]
+        free_cells = board_mask  # winning_cells with the steps and masks bound to locals
+        s1, s2, s3 = self.stride, self.stride - 1, self.stride + 1
+        tt_keys, tt_values, tt_size = self.tt_keys, self.tt_values, self.tt_size
+
+        def winning_cells(position: int, mask: int) -> int:
+            r = (position << 1) & (position << 2) & (position << 3)
+            for step in (s1, s2, s3):
+                pair = (position << step) & (position << (2 * step))
+                r |= pair & (position << (3 * step)) | pair & (position >> step)
+                pair = (position >> step) & (position >> (2 * step))
+                r |= pair & (position << step) | pair & (position >> (3 * step))
+            return r & (free_cells ^ mask)
+
+        min_score, max_score = self.min_score, self.max_score
+        lower_offset = max_score - 2 * min_score + 2
+        limit = max_nodes if max_nodes is not None else -1
+        solver = self
+
+        def negamax(position: int, mask: int, moves: int, alpha: int, beta: int) -> int:
+            solver.nodes += 1
+            if solver.nodes == limit or (stop is not None and not solver.nodes & 1023 and stop.is_set()):
+                raise SolveAborted()
+            possible = (mask + bottom_mask) & board_mask
+            opponent_wins = winning_cells(position ^ mask, mask)
+            forced = possible & opponent_wins
+            if forced:
+                if forced & (forced - 1):
+                    return -((cells - moves) // 2)
+                possible = forced
+            possible &= ~(opponent_wins >> 1)
+            if not possible:
+                return -((cells - moves) // 2)
+            if moves >= cells - 2:
+                return 0
+
+            low = -((cells - 2 - moves) // 2)
+            if alpha < low:
+                alpha = low
+                if alpha >= beta:
+                    return alpha
+            high = (cells - 1 - moves) // 2
+            key = position + mask
+            slot = key % tt_size
+            value = tt_values[slot]
+            # stored values are at least 1, so 0 is an empty slot (the empty board's key is 0 too)
+            if value and tt_keys[slot] == key:
+                if value > max_score - min_score + 1:
+                    low = value - lower_offset
+                    if alpha < low:
+                        alpha = low
+                        if alpha >= beta:
+                            return alpha
+                else:
+                    high = value + min_score - 1
+            if beta > high:
+                beta = high
+                if alpha >= beta:
+                    return beta
+
+            children = []
+            for column_mask in column_masks:
+                move = possible & column_mask
+                if move:
+                    new_position = position | move
+                    children.append((-bin(winning_cells(new_position, mask | move)).count("1"), len(children), move))
+            children.sort()
+            for _, _, move in children:
+                new_mask = mask | move
+                score = -negamax(position ^ mask, new_mask, moves + 1, -beta, -alpha)
+                if score >= beta:
+                    tt_keys[slot] = key
+                    tt_values[slot] = score + lower_offset
+                    return score
+                if score > alpha:
+                    alpha = score
+            tt_keys[slot] = key
+            tt_values[slot] = alpha - min_score + 1
+            return alpha
+
+        return negamax
+
+    def outcome(self, score: int, moves: int) -> Tuple[str, int]:
+        return score_outcome(score, moves, self.cells)
+
+    # Objective: Solve a grid position for `player` (to move) and find a best move.
+    # Explanation: Builds the bit pair from a BitBoard, solves the score, then picks the first column (immediate wins first, then the move order) whose child proves the same score with one null-window probe; if every move loses at once, blocks one threat.
+    # Complexity: That of solve_bits plus at most one probe per column (cheap with the warm table). Extra space O(1) beyond the table.
+    def solve(
+        self,
+        player: str,
+        opponent: str,
+        heights: List[int],
+        grid: List[List[str]],
+        max_nodes: Optional[int] = None,
+        stop: Optional[threading.Event] = None,
+    ) -> Solution:
+        board = BitBoard.from_grid(grid, heights, self.rows, self.columns, (player, opponent))
+        if board.is_win(player) or board.is_win(opponent):
+            raise ValueError("Position is already decided")
+        position, mask = board.masks[player], board.occupied
+        moves = bin(mask).count("1")
+        self.nodes = 0
+        if moves == self.cells:
+            return Solution("draw", 0, None, 0, 0)
+
+        score = self.solve_bits(position, mask, moves, max_nodes, stop)
+        outcome, plies = self.outcome(score, moves)
+        possible = (mask + self.bottom_mask) & self.board_mask
+        best = None
+        wins_now = self.winning_cells(position, mask) & possible
+        if wins_now:
+            best = next(c for c in self.order if wins_now & self.column_masks[c])
+        else:
+            negamax = self._negamax_fn(max_nodes, stop)
+            opponent_wins = self.winning_cells(position ^ mask, mask)
+            safe = possible & ~(opponent_wins >> 1)
+            forced = possible & opponent_wins
+            if forced:
+                safe &= forced
+            for c in self.order:
+                move = safe & self.column_masks[c]
+                if move and -negamax(position ^ mask, mask | move, moves + 1, -score, -score + 1) >= score:
+                    best = c
+                    break
+            if best is None:
+                # every move loses at once: block a threat if there is one, else any legal column
+                block = forced or possible
+                best = next(c for c in self.order if block & self.column_masks[c])
+        return Solution(outcome, plies, best, score, self.nodes)
+
+
+_solvers = {}
+
+
+# Objective: Shared Solver per board size, so the transposition table is reused across calls.
+# Explanation: Creates the solver on first use for (rows, columns).
+# Complexity: Best O(1); Worst O(table size) on first use. Extra space O(table size) per size.
+def get_solver(rows: int = 6, columns: int = 7) -> Solver:
+    solver = _solvers.get((rows, columns))
+    if solver is None:
+        solver = _solvers[(rows, columns)] = Solver(rows, columns)
+    return solver
+
+
+# Objective: Solve a grid position with the shared solver for its size.
+# Explanation: Convenience wrapper around Solver.solve.
+# Complexity: That of Solver.solve. Extra space that of the shared table.
+def solve_position(
+    player: str, opponent: str, heights: List[int], grid: List[List[str]], rows: int = 6, columns: int = 7, max_nodes: Optional[int] = None
+) -> Solution:
+    return get_solver(rows, columns).solve(player, opponent, heights, grid, max_nodes)
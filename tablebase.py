@@ -0,0 +1,265 @@
+"""Endgame tablebase: exact values of near-full positions, looked up instead of searched.
+
+File layout (little-endian):
+    header  : magic b"C4TB", version, rows, columns, connect, max_empty (5 x uint8), entry count (uint32)
+    entries : sorted by key; key (uint64), score for side to move (int8)
+
+Keys are canonical_key: the smaller of opening_book.position_key for the position
+and for its left-right mirror (both have the same value), so each pair of mirrored
+positions is stored and solved once. Scores use the solver
+convention (solver.py): (rows*columns + 2 - n) // 2 for a win with the n-th stone on
+the board, 0 for a draw, negative for a loss.
+
+Every legal position with K empty cells is far too many to enumerate (6x7 has billions
+even for small K), so the generator enumerates the endgames that actually occur: each
+seed game (recorded games and/or random playouts) is replayed until at most
+`max_empty` cells are empty, and every position below that point is solved exactly
+by exhaustive negamax, deduplicated across seeds.
+
+Generate a tablebase offline with:
+    python tablebase.py --empty 8 --random 5000 --games games.bin --out tablebase.bin
+"""
+
+import argparse
+import mmap
+import os
+import random
+import struct
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from bitboard import BitBoard
+from board import board_side, check_size
+from opening_book import position_key
+from solver import score_outcome
+
+
+MAGIC = b"C4TB"
+VERSION = 2
+HEADER = struct.Struct("<4sBBBBBI")
+RECORD = struct.Struct("<Qb")
+
+DEFAULT_TABLEBASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tablebase.bin")
+
+
+# Objective: Key a position so that it and its left-right mirror map to the same record.
+# Explanation: Computes opening_book.position_key for the board and for its mirrored masks (the bottom row is symmetric) and keeps the smaller.
+# Complexity: Best/Average/Worst O(columns) big-int ops. Extra space O(1).
+def canonical_key(board: BitBoard, to_move: str) -> int:
+    key = position_key(board, to_move)
+    mirrored = board.mirror(board.masks.get(to_move, 0)) + board.mirror(board.occupied) + board.bottom_mask
+    return min(key, mirrored)
+
+
+class Tablebase:
+    """Read-only, mmap-backed view of a tablebase file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = HEADER.unpack_from(self._mm, 0)[:2]
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("Not a tablebase file (or an old version; regenerate it): {0}".format(path))
+        _, _, self.rows, self.columns, self.connect, self.max_empty, self.count = HEADER.unpack_from(self._mm, 0)
+        self.cells = self.rows * self.columns
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._file.close()
+            self._mm = None
+
+    # Objective: Find the exact score of a position for the side to move.
+    # Explanation: Rejects other board sizes or run lengths and positions with too many empty cells (a sum over the heights), then binary-searches for canonical_key in the sorted fixed-width records in the mapped file.
+    # Complexity: Best O(columns); Average O(columns + log entries); Worst O(columns + log entries). Extra space O(1).
+    def probe(self, board: BitBoard, to_move: str) -> Optional[int]:
+        if self._mm is None or (board.rows, board.columns, board.connect) != (self.rows, self.columns, self.connect):
+            return None
+        if self.cells - sum(board.heights) > self.max_empty:
+            return None
+        key = canonical_key(board, to_move)
+        lo, hi = 0, self.count - 1
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            entry_key, score = RECORD.unpack_from(self._mm, HEADER.size + mid * RECORD.size)
+            if entry_key == key:
+                return score
+            if entry_key < key:
+                lo = mid + 1
+            else:
+                hi = mid - 1
+        return None
+
+    # Objective: Probe and convert the score into (outcome, plies to the end).
+    # Explanation: Applies solver.score_outcome with the number of stones on the board.
+    # Complexity: That of probe. Extra space O(1).
+    def probe_outcome(self, board: BitBoard, to_move: str) -> Optional[Tuple[str, int]]:
+        score = self.probe(board, to_move)
+        if score is None:
+            return None
+        return score_outcome(score, sum(board.heights), self.cells)
+
+
+_default_tablebase: Optional[Tablebase] = None
+_default_checked = False
+
+
+# Objective: Return the tablebase at DEFAULT_TABLEBASE_PATH, opening it on first use.
+# Explanation: Checks for the file once per process; returns None when none has been generated.
+# Complexity: Best O(1); Average O(1); Worst O(1) (maps the file, does not read it). Extra space O(1).
+def default_tablebase() -> Optional[Tablebase]:
+    global _default_tablebase, _default_checked
+    if not _default_checked:
+        _default_checked = True
+        if os.path.exists(DEFAULT_TABLEBASE_PATH):
+            _default_tablebase = Tablebase(DEFAULT_TABLEBASE_PATH)
+    return _default_tablebase
+
+
+# Objective: Replace the process-wide tablebase (None disables probes).
+# Explanation: Closes the current tablebase and opens the one at path.
+# Complexity: Best O(1); Average O(1); Worst O(1). Extra space O(1).
+def set_default_tablebase(path: Optional[str]) -> None:
+    global _default_tablebase, _default_checked
+    if _default_tablebase is not None:
+        _default_tablebase.close()
+    _default_tablebase = Tablebase(path) if path else None
+    _default_checked = True
+
+
+# Objective: Solve every position below `board` exactly, recording each in `table`.
+# Explanation: Exhaustive negamax with make/unmake: an immediate win scores (cells + 1 - stones) // 2, a full board 0, otherwise the best negated child. Positions already in `table` (from this or earlier seeds), or their mirror images, are not searched again.
+# Complexity: O(distinct positions below board) * O(columns) win checks. Extra space O(empty cells) recursion plus the table.
+def solve_endgame(board: BitBoard, to_move: str, other: str, table: Dict[int, int]) -> int:
+    key = canonical_key(board, to_move)
+    score = table.get(key)
+    if score is not None:
+        return score
+    cells = board.rows * board.columns
+    stones = sum(board.heights)
+    cols = board.available_moves()
+    if not cols:
+        score = 0
+    elif any(board.wins_after(col, to_move) for col in cols):
+        score = (cells + 1 - stones) // 2
+    else:
+        score = None
+        for col in cols:
+            board.play(col, to_move)
+            child = -solve_endgame(board, other, to_move, table)
+            board.undo()
+            if score is None or child > score:
+                score = child
+    table[key] = score
+    return score
+
+
+# Objective: Yield move sequences of random games that tend to reach a near-full board.
+# Explanation: Uniformly random play mostly ends in an early win, which seeds nothing, so each move is drawn from the columns that neither win nor let the opponent win on top of them (any column when there is none); the game stops at a win or a full board.
+# Complexity: O(games * rows*columns*columns). Extra space O(rows*columns) per game.
+def random_games(count: int, rows: int = 6, columns: int = 7, connect: int = 4, seed: int = 0) -> Iterable[List[int]]:
+    rng = random.Random(seed)
+    symbols = ("#", "O")
+    for _ in range(count):
+        board = BitBoard(rows, columns, symbols, connect)
+        moves = []
+        while True:
+            cols = board.available_moves()
+            if not cols:
+                break
+            symbol = symbols[len(moves) % 2]
+            other = symbols[1 - len(moves) % 2]
+            quiet = []
+            for col in cols:
+                if board.wins_after(col, symbol):
+                    continue
+                board.play(col, symbol)
+                if not board.wins_after(col, other):
+                    quiet.append(col)
+                board.undo()
+            col = rng.choice(quiet or cols)
+            win = board.wins_after(col, symbol)
+            board.play(col, symbol)
+            moves.append(col)
+            if win:
+                break
+        yield moves
+
+
+# Objective: Build and write a tablebase from seed games.
+# Explanation: Replays each seed until at most max_empty cells are empty (skipping games decided earlier), solves everything below with solve_endgame into one shared table, then writes the records sorted by key.
+# Complexity: O(seeds * rows*columns) replay plus O(distinct endgame positions * columns). Extra space O(distinct positions).
+def generate_tablebase(
+    path: str,
+    seeds: Iterable[Sequence[int]],
+    max_empty: int = 8,
+    rows: int = 6,
+    columns: int = 7,
+    connect: int = 4,
+    verbose: bool = True,
+) -> int:
+    if (rows + 1) * columns > 64:
+        raise ValueError("Tablebase keys need (rows + 1) * columns <= 64 bits")
+    symbols = ("#", "O")
+    table: Dict[int, int] = {}
+    started = time.perf_counter()
+    cells = rows * columns
+    for idx, moves in enumerate(seeds):
+        board = BitBoard(rows, columns, symbols, connect)
+        decided = False
+        for ply, col in enumerate(moves):
+            if cells - ply <= max_empty:
+                break
+            board.play(col, symbols[ply % 2])
+            if board.is_win(symbols[ply % 2]):
+                decided = True
+                break
+        if decided or cells - sum(board.heights) > max_empty:
+            continue
+        ply = sum(board.heights)
+        solve_endgame(board, symbols[ply % 2], symbols[1 - ply % 2], table)
+        if verbose and (idx + 1) % 100 == 0:
+            print("{0} seeds, {1} positions ({2:.1f}s)".format(idx + 1, len(table), time.perf_counter() - started))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(HEADER.pack(MAGIC, VERSION, rows, columns, connect, max_empty, len(table)))
+        for key in sorted(table):
+            out.write(RECORD.pack(key, table[key]))
+    os.replace(tmp_path, path)
+    return len(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a Connect 4 endgame tablebase.")
+    parser.add_argument("--empty", type=int, default=8, help="largest number of empty cells to store")
+    parser.add_argument("--random", type=int, default=1000, help="random seed games to replay")
+    parser.add_argument("--games", help="game record file (game_record.py) whose games are also replayed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rows", type=board_side, default=6)
+    parser.add_argument("--columns", type=board_side, default=7)
+    parser.add_argument("--connect", type=int, default=4)
+    parser.add_argument("--out", default=DEFAULT_TABLEBASE_PATH)
+    args = parser.parse_args()
+    try:
+        check_size(args.rows, args.columns, args.connect)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    def seeds():
+        yield from random_games(args.random, args.rows, args.columns, args.connect, args.seed)
+        if args.games:
+            from game_record import read_games
+
+            for game in read_games(args.games):
+                if (game.rows, game.columns, game.connect) == (args.rows, args.columns, args.connect):
+                    yield game.moves
+
+    count = generate_tablebase(args.out, seeds(), args.empty, args.rows, args.columns, args.connect)
+    print("Wrote {0} positions to {1}".format(count, args.out))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import argparse
+
+import pytest
+
+from board import MAX_SIDE, Board, board_side
+
+
+@pytest.mark.parametrize("rows, columns, connect", [(0, 7, 4), (6, 0, 4), (MAX_SIDE + 1, 7, 4), (6, MAX_SIDE + 1, 4), (6, 7, 1), (6, 7, 8)])
+def test_board_rejects_bad_sizes(rows, columns, connect):
+    with pytest.raises(ValueError):
+        Board(rows, columns, connect)
+
+
+def test_board_accepts_the_limits():
+    board = Board(MAX_SIDE, 1, 2)
+    for _ in range(MAX_SIDE):
+        board.play(0, "#")
+    assert board.heights[0] == MAX_SIDE
+    assert Board(1, 2, 2).columns == 2
+
+
+def test_board_side_argument():
+    assert board_side("12") == 12
+    for text in ("0", "256", "six"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            board_side(text)
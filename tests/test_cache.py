@@ -0,0 +1,26 @@
+import pytest
+
+from cache import DEPTH_PREFERRED, LRU, BoundedCache, configure_cache
+
+
+def test_depth_preferred_evicts_the_shallowest_entry():
+    cache = BoundedCache("test-depth", max_entries=3, policy=DEPTH_PREFERRED, has_depth=True)
+    cache.put("a", 1, depth=6)
+    cache.put("b", 2, depth=2)
+    cache.put("c", 3, depth=4)
+    cache.put("d", 4, depth=5)
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache and "d" in cache
+
+
+def test_depth_preferred_needs_depths():
+    with pytest.raises(ValueError):
+        BoundedCache("test-no-depth", policy=DEPTH_PREFERRED)
+
+    import hfunctions  # registers "bfs"
+    import new_try  # registers "eval"
+
+    with pytest.raises(ValueError):
+        configure_cache("eval", policy=DEPTH_PREFERRED)
+    configure_cache("bfs", policy=DEPTH_PREFERRED)
+    configure_cache("bfs", policy=LRU)
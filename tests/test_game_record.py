@@ -0,0 +1,114 @@
+import random
+
+import pytest
+
+from board import Board
+from game_record import DRAW, FIRST_WINS, MAGIC, SECOND_WINS, UNFINISHED, GameRecord, GameWriter, read_games
+
+
+SYMBOLS = ("#", "O")
+
+
+def random_records(rng: random.Random):
+    records = []
+    for rows, columns, connect in ((6, 7, 4), (4, 5, 3), (9, 16, 5), (8, 17, 5), (3, 35, 4)):
+        for count in (0, 1, 2, 7, rows * columns):
+            heights = [0] * columns
+            moves = []
+            while len(moves) < count:
+                col = rng.choice([col for col in range(columns) if heights[col] < rows])
+                heights[col] += 1
+                moves.append(col)
+            records.append(GameRecord(moves, rows, columns, connect, rng.choice((UNFINISHED, FIRST_WINS, SECOND_WINS, DRAW))))
+    return records
+
+
+@pytest.mark.parametrize("name", ["games.txt", "games.bin"])
+def test_writer_and_reader_round_trip(tmp_path, name):
+    records = random_records(random.Random(5))
+    path = str(tmp_path / name)
+    with GameWriter(path) as writer:
+        for record in records[:10]:
+            writer.write(record)
+    # reopening appends to the same file
+    with GameWriter(path) as writer:
+        for record in records[10:]:
+            writer.write(record)
+    games = list(read_games(path))
+    assert games == records
+    assert [game.moves for game in games] == [record.moves for record in records]
+
+
+def test_text_and_bytes_encodings():
+    record = GameRecord([3, 3, 4, 10, 0], 6, 11, 4, SECOND_WINS)
+    assert record.to_text() == "6x11x4 2 445B1"
+    assert GameRecord.from_text(record.to_text()) == record
+    assert GameRecord([], 6, 7, 4).to_text() == "6x7x4 -"
+    assert GameRecord.from_text("6x7x4 -").moves == []
+    # odd move count: the last low nibble is padding
+    assert record.to_bytes()[6:] == bytes([0x33, 0x4A, 0x00])
+
+
+def test_from_board_result():
+    board = Board(6, 7, 4, SYMBOLS)
+    for ply, col in enumerate([0, 1, 0, 1, 0, 1]):
+        board.play(col, SYMBOLS[ply % 2])
+    assert GameRecord.from_board(board).result == UNFINISHED
+    board.play(0, SYMBOLS[0])
+    record = GameRecord.from_board(board)
+    assert (record.result, record.moves) == (FIRST_WINS, [0, 1, 0, 1, 0, 1, 0])
+    assert record.replay(SYMBOLS).to_grid() == board.to_grid()
+
+    board = Board(6, 7, 4, SYMBOLS)
+    for ply, col in enumerate([6, 0, 1, 0, 1, 0, 1, 0]):
+        board.play(col, SYMBOLS[ply % 2])
+    assert GameRecord.from_board(board).result == SECOND_WINS
+
+    board = Board(1, 2, 2, SYMBOLS)
+    board.play(0, SYMBOLS[0])
+    board.play(1, SYMBOLS[1])
+    assert GameRecord.from_board(board).result == DRAW
+
+
+@pytest.mark.parametrize("cut", [1, 3, 6, 7])
+def test_truncated_binary_raises(tmp_path, cut):
+    path = str(tmp_path / "games.bin")
+    with GameWriter(path) as writer:
+        writer.write(GameRecord([0, 1, 2, 3], 6, 7, 4, UNFINISHED))
+        writer.write(GameRecord([3, 3, 3], 6, 7, 4, UNFINISHED))
+    with open(path, "rb") as stream:
+        data = stream.read()
+    # keep the whole first game, cut into the second one's header (cut < 6) or moves
+    first = len(MAGIC) + 1 + 6 + 2
+    with open(path, "wb") as stream:
+        stream.write(data[:first + cut])
+    games = read_games(path)
+    assert next(games).moves == [0, 1, 2, 3]
+    with pytest.raises(ValueError):
+        list(games)
+
+
+@pytest.mark.parametrize("size", [1, len(MAGIC)])
+def test_truncated_file_header_raises(tmp_path, size):
+    path = tmp_path / "games.bin"
+    path.write_bytes(MAGIC[:size] if size < len(MAGIC) else MAGIC)
+    with pytest.raises(ValueError):
+        list(read_games(str(path)))
+
+
+@pytest.mark.parametrize("line", ["6x7x4", "6x7 1 44", "6x7x4 x 44", "6x7x4 1 4!", "6x7x4 1 44 55", "300x7x4 1 44", "6x7x1 1 44", "0x7x4 -"])
+def test_bad_text_line_raises(line):
+    with pytest.raises(ValueError):
+        GameRecord.from_text(line)
+
+
+def test_binary_writer_rejects_text_file(tmp_path):
+    path = tmp_path / "games.bin"
+    path.write_bytes(b"6x7x4 1 4455667\n")
+    with pytest.raises(ValueError):
+        GameWriter(str(path))
+
+
+def test_binary_rejects_sizes_over_one_byte():
+    with pytest.raises(ValueError):
+        GameRecord([0], 300, 7, 4).to_bytes()
@@ -0,0 +1,44 @@
+import threading
+
+import pytest
+
+from hfunctions import SearchAborted
+from new_try import dfs_beam_bot_move
+from search_stats import SearchStats
+
+
+ROWS, COLUMNS = 6, 7
+
+
+def empty_position():
+    return [["*"] * COLUMNS for _ in range(ROWS)], [0] * COLUMNS
+
+
+def test_aborted_move_is_closed():
+    stats = SearchStats()
+    stop = threading.Event()
+    stop.set()
+    grid, heights = empty_position()
+    with pytest.raises(SearchAborted):
+        dfs_beam_bot_move("#", "O", heights, grid, ROWS, COLUMNS, depth=3, beam_width=3, use_book=False, stats=stats, stop=stop)
+    assert not stats.in_move
+    assert stats.moves[-1]["aborted"] and stats.moves[-1]["column"] is None
+
+    grid, heights = empty_position()
+    column = dfs_beam_bot_move("#", "O", heights, grid, ROWS, COLUMNS, depth=2, beam_width=2, use_book=False, stats=stats)
+    assert stats.moves[-1]["column"] == column and "aborted" not in stats.moves[-1]
+    # the second move's sections hang off its own frame, not the aborted one's
+    assert all(path[0] == "move:beam" and len([name for name in path if name.startswith("move:")]) == 1 for path in stats._path_times)
+
+
+def test_sections_left_open_by_an_exception_are_closed():
+    stats = SearchStats()
+
+    def failing():
+        stats.enter("inner")
+        raise RuntimeError("engine failed")
+
+    with pytest.raises(RuntimeError):
+        stats.run_move("test", failing)
+    assert stats._stack == []
+    assert set(stats._path_times) == {("move:test",), ("move:test", "inner")}
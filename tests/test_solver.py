@@ -0,0 +1,93 @@
+import random
+from functools import lru_cache
+
+import pytest
+
+from board import Board
+from solver import Solver, score_outcome
+
+
+SYMBOLS = ("#", "O")
+
+
+# Objective: Exact (outcome, plies) for the side to move by plain minimax, as the reference.
+# Explanation: Wins prefer the fewest plies, losses the most; memoized on the board bytes and side to move.
+# Complexity: O(distinct positions below the board * columns). Extra space O(distinct positions).
+def brute_force(board: Board, to_move: str, other: str):
+    @lru_cache(maxsize=None)
+    def value(key, to_move, other):
+        cols = board.available_moves()
+        if not cols:
+            return 0, 0
+        for col in cols:
+            if board.wins_after(col, to_move):
+                return 1, 1
+        best = None
+        for col in cols:
+            board.play(col, to_move)
+            sign, plies = value(board.key(), other, to_move)
+            board.undo()
+            # the child's result seen from this side, one ply later; rank wins fast, losses slow
+            result = (-sign, plies + 1)
+            rank = (result[0], -result[1] if result[0] > 0 else result[1])
+            if best is None or rank > best[0]:
+                best = (rank, result)
+        return best[1]
+
+    sign, plies = value(board.key(), to_move, other)
+    return {1: "win", 0: "draw", -1: "loss"}[sign], plies
+
+
+def random_position(rows: int, columns: int, stones: int, rng: random.Random) -> Board:
+    while True:
+        board = Board(rows, columns, 4, SYMBOLS)
+        for ply in range(stones):
+            symbol = SYMBOLS[ply % 2]
+            cols = [col for col in board.available_moves() if not board.wins_after(col, symbol)]
+            if not cols:
+                break
+            board.play(rng.choice(cols), symbol)
+        else:
+            return board
+
+
+@pytest.mark.parametrize("rows, columns, stones, count", [(4, 4, 0, 1), (4, 4, 3, 20), (4, 5, 8, 20), (5, 5, 13, 20), (6, 7, 31, 40)])
+def test_solver_matches_minimax(rows, columns, stones, count):
+    rng = random.Random(rows * 100 + columns * 10 + stones)
+    solver = Solver(rows, columns, tt_size=100003)
+    for _ in range(count):
+        board = random_position(rows, columns, stones, rng)
+        to_move, other = SYMBOLS[stones % 2], SYMBOLS[1 - stones % 2]
+        expected = brute_force(board, to_move, other)
+        solution = solver.solve(to_move, other, list(board.heights), board.to_grid())
+        assert (solution.outcome, solution.plies) == expected
+
+        # the best move keeps the value: the reply position is worth the same one ply later
+        if solution.best_move is not None:
+            win = board.wins_after(solution.best_move, to_move)
+            board.play(solution.best_move, to_move)
+            reply = ("win", 1) if win else brute_force(board, other, to_move)
+            board.undo()
+            if win:
+                assert expected == ("win", 1)
+            else:
+                flipped = {"win": "loss", "loss": "win", "draw": "draw"}[reply[0]]
+                assert (flipped, reply[1] + 1) == expected or (expected[0] == "draw" and reply[0] == "draw")
+
+
+def test_score_outcome_second_player_win():
+    # 3 empty cells, side to move wins with its next stone
+    assert score_outcome(2, 39, 42) == ("win", 1)
+    assert score_outcome(-1, 40, 42) == ("loss", 2)
+    assert score_outcome(0, 40, 42) == ("draw", 2)
+
+
+def test_score_outcome_round_trips_every_ending():
+    cells = 42
+    for moves in range(cells):
+        for last in range(moves + 1, cells + 1):
+            score = (cells + 2 - last) // 2
+            if (last - moves) % 2 == 1:
+                assert score_outcome(score, moves, cells) == ("win", last - moves)
+            else:
+                assert score_outcome(-score, moves, cells) == ("loss", last - moves)
@@ -0,0 +1,75 @@
+from bitboard import BitBoard
+from solver import Solver
+from tablebase import Tablebase, generate_tablebase, random_games
+
+
+SYMBOLS = ("#", "O")
+ROWS, COLUMNS, MAX_EMPTY = 4, 5, 8
+
+
+def replay(moves):
+    board = BitBoard(ROWS, COLUMNS, SYMBOLS, 4)
+    for ply, col in enumerate(moves):
+        board.play(col, SYMBOLS[ply % 2])
+    return board
+
+
+# Objective: The endgame positions of the seed games, as (move list, generator root?) pairs.
+# Explanation: Stops each game at its first win. The first position with at most MAX_EMPTY empty cells is where the generator starts, so it must be stored; later ones are missing when an earlier position already had an immediate win (the generator does not search past it).
+# Complexity: O(seeds * rows*columns). Extra space O(positions).
+def endgame_positions(seeds):
+    positions = []
+    for moves in seeds:
+        board = BitBoard(ROWS, COLUMNS, SYMBOLS, 4)
+        for ply, col in enumerate(moves):
+            if ROWS * COLUMNS - ply <= MAX_EMPTY:
+                positions.append((moves[:ply], ROWS * COLUMNS - ply == MAX_EMPTY))
+            board.play(col, SYMBOLS[ply % 2])
+            if board.is_win(SYMBOLS[ply % 2]):
+                break
+    return positions
+
+
+def build(tmp_path):
+    seeds = list(random_games(30, ROWS, COLUMNS, 4, seed=7))
+    path = str(tmp_path / "tb.bin")
+    count = generate_tablebase(path, seeds, MAX_EMPTY, ROWS, COLUMNS, verbose=False)
+    assert count > 0
+    return Tablebase(path), seeds
+
+
+def test_probe_matches_solver(tmp_path):
+    table, seeds = build(tmp_path)
+    solver = Solver(ROWS, COLUMNS, tt_size=100003)
+    positions = endgame_positions(seeds)
+    hits = 0
+    try:
+        for moves, root in positions:
+            board = replay(moves)
+            to_move, other = SYMBOLS[len(moves) % 2], SYMBOLS[1 - len(moves) % 2]
+            score = table.probe(board, to_move)
+            if score is None:
+                assert not root, moves
+                continue
+            hits += 1
+            solution = solver.solve(to_move, other, list(board.heights), board.to_grid())
+            assert score == solution.score, moves
+            assert table.probe_outcome(board, to_move) == (solution.outcome, solution.plies), moves
+
+            # the mirror image shares the record
+            mirrored = replay([COLUMNS - 1 - col for col in moves])
+            assert table.probe(mirrored, to_move) == solution.score, moves
+    finally:
+        table.close()
+    assert hits > len(seeds)
+
+
+def test_probe_skips_uncovered_positions(tmp_path):
+    table, seeds = build(tmp_path)
+    try:
+        # too many empty cells
+        assert table.probe(replay(seeds[0][:2]), SYMBOLS[0]) is None
+        # another board size
+        assert table.probe(BitBoard(ROWS, COLUMNS + 1, SYMBOLS, 4), SYMBOLS[0]) is None
+    finally:
+        table.close()
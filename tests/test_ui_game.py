@@ -0,0 +1,46 @@
+import os
+import time
+
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+pygame = pytest.importorskip("pygame")
+
+import new_try  # noqa: E402
+import ui_game  # noqa: E402
+
+
+def failing_engine(*args, **kwargs):
+    raise RuntimeError("engine failed")
+
+
+def wait_for_column(worker, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        done, col = worker.poll()
+        if done:
+            return col
+        time.sleep(0.01)
+    raise AssertionError("bot search did not finish")
+
+
+def test_bot_plays_greedy_when_the_engine_raises(monkeypatch, capsys):
+    monkeypatch.setitem(new_try.ENGINES, "failing", (failing_engine, {}))
+    game = ui_game.Connect4Pygame(vs_bot=True, engine="failing", ponder=False)
+    try:
+        # the human threatens three in a row at the bottom; greedy blocks it
+        for col, symbol in ((1, ui_game.PLAYER_1), (6, ui_game.PLAYER_2), (2, ui_game.PLAYER_1), (6, ui_game.PLAYER_2), (3, ui_game.PLAYER_1)):
+            game.handle_move(col, symbol)
+        game.start_bot_move()
+        col = wait_for_column(game.worker)
+    finally:
+        pygame.quit()
+    assert col in (0, 4)
+    assert "engine failed" in capsys.readouterr().err
+
+
+def test_worker_without_fallback_reports_none(capsys):
+    worker = ui_game.BotWorker()
+    worker.start(lambda: failing_engine())
+    assert wait_for_column(worker) is None
+    assert "RuntimeError" in capsys.readouterr().err
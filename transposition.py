@@ -0,0 +1,103 @@
+from array import array
+from typing import List, Optional, Tuple
+
+
+EXACT = 0
+LOWER = 1  # stored score is a lower bound (search failed high)
+UPPER = 2  # stored score is an upper bound (search failed low)
+
+NO_MOVE = -1
+
+
+class TranspositionTable:
+    """Fixed-size transposition table backed by parallel `array` columns.
+
+    Entries are addressed by the low bits of a 64-bit Zobrist key and verified
+    against the full key. Each slot stores search depth, bound type, score, best
+    move and the generation (search id) that wrote it. Scores are only trusted
+    within the generation that produced them, because they are measured relative to
+    that search's root; best moves are reused across generations for ordering.
+    """
+
+    def __init__(self, size_bits: int = 16):
+        self.size = 1 << size_bits
+        self.mask = self.size - 1
+        self.keys = array("Q", bytes(8 * self.size))
+        self.depths = array("b", [-1]) * self.size
+        self.flags = array("b", bytes(self.size))
+        self.scores = array("q", bytes(8 * self.size))
+        self.moves = array("b", [NO_MOVE]) * self.size
+        self.generations = array("H", bytes(2 * self.size))
+        self.generation = 0
+        self._journal: Optional[List[Tuple[int, int, int, int, int]]] = None
+
+    # Objective: Start a new search so stale scores are no longer used for cutoffs.
+    # Explanation: Bumps the generation counter instead of clearing the arrays.
+    # Complexity: Best O(1); Average O(1); Worst O(1). Extra space O(1).
+    def new_search(self) -> None:
+        self.generation = (self.generation + 1) & 0xFFFF
+
+    # Objective: Drop every entry.
+    # Explanation: Resets the depth column so all slots read as empty.
+    # Complexity: Best O(size); Average O(size); Worst O(size). Extra space O(1).
+    def clear(self) -> None:
+        for idx in range(self.size):
+            self.depths[idx] = -1
+            self.moves[idx] = NO_MOVE
+
+    # Objective: Store a search result for a position.
+    # Explanation: Overwrites the slot when it holds another position, an older search, or a shallower result of the same position.
+    # Complexity: Best O(1); Average O(1); Worst O(1). Extra space O(1).
+    def store(self, key: int, depth: int, flag: int, score: int, best_move: int) -> None:
+        if self._journal is not None:
+            self._journal.append((key, depth, flag, score, best_move))
+        idx = key & self.mask
+        if (
+            self.keys[idx] == key
+            and self.generations[idx] == self.generation
+            and self.depths[idx] > depth
+        ):
+            return
+        self.keys[idx] = key
+        self.depths[idx] = depth
+        self.flags[idx] = flag
+        self.scores[idx] = score
+        self.moves[idx] = best_move
+        self.generations[idx] = self.generation
+
+    # Objective: Record every store from now on so another process can merge them.
+    # Explanation: Same protocol as BoundedCache journals: take_journal returns the (key, depth, flag, score, best move) list and stops recording; `merge` stores each entry into the current generation.
+    # Complexity: Best/Average/Worst O(1) to start; O(entries) to merge. Extra space O(stores while recording).
+    def start_journal(self) -> None:
+        self._journal = []
+
+    def take_journal(self) -> List[Tuple[int, int, int, int, int]]:
+        journal = self._journal or []
+        self._journal = None
+        return journal
+
+    def merge(self, journal: List[Tuple[int, int, int, int, int]]) -> None:
+        for entry in journal:
+            self.store(*entry)
+
+    # Objective: Look up a usable score for a position at the given remaining depth.
+    # Explanation: Returns (flag, score) when the slot matches the key, was written by the current search and searched at least as deep; otherwise None.
+    # Complexity: Best O(1); Average O(1); Worst O(1). Extra space O(1).
+    def probe(self, key: int, depth: int) -> Optional[Tuple[int, int]]:
+        idx = key & self.mask
+        if (
+            self.keys[idx] != key
+            or self.depths[idx] < depth
+            or self.generations[idx] != self.generation
+        ):
+            return None
+        return self.flags[idx], self.scores[idx]
+
+    # Objective: Fetch the best move recorded for a position for move ordering.
+    # Explanation: Any generation is accepted since a previous best move is still a good first guess.
+    # Complexity: Best O(1); Average O(1); Worst O(1). Extra space O(1).
+    def best_move(self, key: int) -> int:
+        idx = key & self.mask
+        if self.keys[idx] != key or self.depths[idx] < 0:
+            return NO_MOVE
+        return self.moves[idx]
@@ -1,4 +1,8 @@
+import queue
 import sys
+import threading
+import time
+import traceback
 
 try:
     import pygame
@@ -8,85 +12,274 @@ except ImportError as exc:
         "`conda env update -f environment.yml` or `conda install -c conda-forge pygame`"
     ) from exc
 
-from hfunctions import available_moves, check_game_over, check_legal_move, make_move_on_grid
-from greedy import greedy
-from new_try import dfs_beam_bot_move
+from board import Board, board_side, check_size
+from greedy import greedy_on_board
+from new_try import ENGINES, board_bot_move
+from cache import reset_caches
+from game_record import append_game
+from ponder import Ponderer
 
 
 PLAYER_1 = "#"
 PLAYER_2 = "O"
 
+BACKGROUND_COLOR = (20, 26, 48)
+BOARD_COLOR = (30, 90, 180)
+EMPTY_COLOR = (220, 220, 220)
+PIECE_COLORS = {PLAYER_1: (255, 76, 76), PLAYER_2: (255, 214, 10)}
+TEXT_COLOR = (255, 255, 255)
+TEXT_POS = (20, 5)
+
+# posted by the bot worker when a search finishes, so an idle loop wakes up for it
+BOT_DONE = pygame.USEREVENT + 1
+# while the bot thinks the loop wakes this often (ms) to animate the status line
+THINKING_REFRESH_MS = 100
+
+
+class BotWorker:
+    """Runs one bot search at a time on a daemon thread; the UI polls for the column.
+
+    Each search gets a token; cancelling (or starting a new search) bumps the token so a
+    late result from an abandoned search is dropped. The thread is a daemon, so closing
+    the window never waits for a search to finish.
+    """
+
+    def __init__(self):
+        self._results: "queue.Queue" = queue.Queue()
+        self._token = 0
+        self._thread = None
+        self._started = 0.0
+
+    @property
+    def thinking(self) -> bool:
+        return self._thread is not None
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started if self._thread is not None else 0.0
+
+    # Objective: Start a search in the background.
+    # Explanation: Runs `search` (which must only touch its own copies of the board) on a new daemon thread and queues its column tagged with the current token. If it raises, the traceback goes to stderr and `fallback` (same rule) supplies the column instead, so a failing engine never costs the bot its turn. `notify`, if given, is called on the worker thread once the column is queued.
+    # Complexity: O(1) on the UI thread. Extra space O(1).
+    def start(self, search, notify=None, fallback=None) -> None:
+        self.cancel()
+        token = self._token
+
+        def work():
+            try:
+                col = search()
+            except Exception:
+                traceback.print_exc()
+                col = fallback() if fallback is not None else None
+            self._results.put((token, col))
+            if notify is not None:
+                notify()
+
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=work, name="bot-search", daemon=True)
+        self._thread.start()
+
+    # Objective: Non-blocking check for the running search's column.
+    # Explanation: Drains the result queue, discarding results from cancelled searches.
+    # Complexity: O(stale results). Extra space O(1).
+    def poll(self):
+        while True:
+            try:
+                token, col = self._results.get_nowait()
+            except queue.Empty:
+                return False, None
+            if token == self._token and self._thread is not None:
+                self._thread = None
+                return True, col
+
+    def cancel(self) -> None:
+        self._token += 1
+        self._thread = None
+
 
 class Connect4Pygame:
-    def __init__(self, vs_bot: bool):
-        self.rows = 6
-        self.cols = 7
-        self.grid = [["*" for _ in range(self.cols)] for _ in range(self.rows)]
-        self.heights = [0 for _ in range(self.cols)]
+    def __init__(self, vs_bot: bool, engine: str = "beam", ponder: bool = True, rows: int = 6, columns: int = 7, connect: int = 4, record=None):
+        self.rows = rows
+        self.cols = columns
+        self.connect = connect
+        self.board = Board(self.rows, self.cols, connect, (PLAYER_1, PLAYER_2))
         self.current = PLAYER_1
         self.vs_bot = vs_bot
+        self.engine = engine
         self.game_over = False
         self.winner = None
+        self.worker = BotWorker()
+        # searches the bot's answers to likely human moves while the human is choosing
+        self.ponderer = Ponderer(engine, PLAYER_2, PLAYER_1, self.rows, self.cols, connect) if vs_bot and ponder else None
+        # appends the game to a record file (path or open GameWriter) when it ends or the window closes
+        self.record = record
+        # start each game with empty evaluation/threat caches
+        reset_caches("game")
 
         pygame.init()
-        self.cell = 90
+        # shrink cells on large boards so the window stays about 720px on its longer side
+        self.cell = max(24, min(90, 720 // max(self.rows, self.cols)))
         self.margin = 30
         self.width = self.cols * self.cell
         self.height = self.rows * self.cell + 2 * self.margin
         self.screen = pygame.display.set_mode((self.width, self.height))
-        pygame.display.set_caption("Connect 4")
+        pygame.display.set_caption("Connect {0}".format(connect))
         self.font = pygame.font.SysFont("arial", 28, bold=True)
         self.small_font = pygame.font.SysFont("arial", 22)
+        self.radius = self.cell // 2 - max(2, self.cell // 11)
+        # empty board drawn once; repaints copy from it instead of redrawing the frame
+        self.background = self.build_background()
+        # board cells and status text currently on screen (None forces a full redraw)
+        self._shown = None
+        self._message = None
+        self._text = None
+        self._text_rect = None
 
-    def draw_board(self, message: str = ""):
-        self.screen.fill((20, 26, 48))
-        # Board background
-        board_rect = pygame.Rect(0, self.margin, self.width, self.rows * self.cell)
-        pygame.draw.rect(self.screen, (30, 90, 180), board_rect)
+    def cell_rect(self, r: int, c: int):
+        return pygame.Rect(c * self.cell, self.margin + r * self.cell, self.cell, self.cell)
 
+    def build_background(self):
+        surface = pygame.Surface((self.width, self.height))
+        surface.fill(BACKGROUND_COLOR)
+        pygame.draw.rect(surface, BOARD_COLOR, pygame.Rect(0, self.margin, self.width, self.rows * self.cell))
         for r in range(self.rows):
             for c in range(self.cols):
-                center = (c * self.cell + self.cell // 2, self.margin + r * self.cell + self.cell // 2)
-                color = (220, 220, 220)
-                if self.grid[r][c] == PLAYER_1:
-                    color = (255, 76, 76)
-                elif self.grid[r][c] == PLAYER_2:
-                    color = (255, 214, 10)
-                pygame.draw.circle(self.screen, color, center, self.cell // 2 - 8)
-        if message:
-            text_surf = self.font.render(message, True, (255, 255, 255))
-            self.screen.blit(text_surf, (20, 5))
-        pygame.display.flip()
+                pygame.draw.circle(surface, EMPTY_COLOR, self.cell_rect(r, c).center, self.radius)
+        return surface
+
+    # Objective: Redraw one screen area from the cached layers.
+    # Explanation: Copies the background, draws the pieces of the cells overlapping the area (only those rows and columns are visited) and puts the status text back on top if it overlaps.
+    # Complexity: Best O(1); Average O(cells in area); Worst O(rows*columns). Extra space O(1).
+    def repaint(self, area) -> None:
+        self.screen.blit(self.background, area, area)
+        first_row = max(0, (area.top - self.margin) // self.cell)
+        last_row = min(self.rows - 1, (area.bottom - 1 - self.margin) // self.cell)
+        first_col = max(0, area.left // self.cell)
+        last_col = min(self.cols - 1, (area.right - 1) // self.cell)
+        for r in range(first_row, last_row + 1):
+            for c in range(first_col, last_col + 1):
+                color = PIECE_COLORS.get(self.board.cell(r, c))
+                if color is not None:
+                    pygame.draw.circle(self.screen, color, self.cell_rect(r, c).center, self.radius)
+        if self._text is not None and self._text_rect.colliderect(area):
+            self.screen.blit(self._text, self._text_rect)
+
+    # Objective: Bring the window up to date, touching only what changed.
+    # Explanation: Renders the status text only when it differs from the one shown, compares the board cells with the last drawn copy, repaints the changed cell rectangles plus the old and new text areas, and pushes just those rectangles to the display. Nothing changed means no drawing at all.
+    # Complexity: Best O(rows*columns) byte compare; Average/Worst O(changed cells) drawing. Extra space O(rows*columns) for the drawn copy.
+    def refresh(self, message: str = "") -> None:
+        dirty = []
+        if message != self._message:
+            if self._text_rect is not None:
+                dirty.append(self._text_rect)
+            self._text = self.font.render(message, True, TEXT_COLOR) if message else None
+            self._text_rect = self._text.get_rect(topleft=TEXT_POS) if self._text is not None else None
+            if self._text_rect is not None:
+                dirty.append(self._text_rect)
+            self._message = message
+
+        cells = self.board.cells
+        if self._shown is None:
+            self.repaint(self.screen.get_rect())
+            pygame.display.flip()
+            self._shown = bytearray(cells)
+            return
+        if cells != self._shown:
+            for idx in range(len(cells)):
+                if cells[idx] != self._shown[idx]:
+                    dirty.append(self.cell_rect(idx // self.cols, idx % self.cols))
+            self._shown[:] = cells
+        if dirty:
+            for area in dirty:
+                self.repaint(area)
+            pygame.display.update(dirty)
+
+    def draw_board(self, message: str = ""):
+        """Redraw the whole window (e.g. after it was uncovered)."""
+        self._shown = None
+        self.refresh(message)
 
     def handle_move(self, col: int, symbol: str):
-        if not check_legal_move(col, self.heights, self.rows, self.cols):
+        if not self.board.can_play(col):
             return None
-        r, c = make_move_on_grid(col, symbol, self.grid, self.heights, self.rows)
-        if check_game_over((r, c), self.grid, self.rows, self.cols):
+        r, c = self.board.play(col, symbol)
+        if self.board.wins_at(r, c):
             self.game_over = True
             self.winner = symbol
-        elif all(h == self.rows for h in self.heights):
+        elif self.board.is_full():
             self.game_over = True
             self.winner = "Draw"
+        if self.game_over:
+            self.save_record()
         return r, c
 
-    def bot_move(self):
-        col = dfs_beam_bot_move(PLAYER_2, PLAYER_1, self.heights, self.grid, self.rows, self.cols, depth=4, beam_width=3)
+    def save_record(self):
+        """Write the game once to the record file, if recording."""
+        if self.record is not None and self.board.history:
+            append_game(self.record, self.board)
+            self.record = None
+
+    # Objective: Compute the bot's column for a position without touching the live board.
+    # Explanation: The engine searches its own decoded grid; greedy (the fallback) makes/unmakes moves on the Board it is given, so it gets a private copy.
+    # Complexity: That of the engine. Extra space O(rows*columns) for the copies.
+    def search_bot_column(self, board):
+        col = board_bot_move(self.engine, board, PLAYER_2, PLAYER_1)
         if col is None:
-            col = greedy(PLAYER_2, PLAYER_1, self.heights, self.grid, self.rows, self.cols)
+            col = greedy_on_board(PLAYER_2, PLAYER_1, board.copy())
+        return col
+
+    def bot_move(self):
+        """Blocking bot turn (the event loop uses the background worker instead)."""
+        col = self.search_bot_column(self.board)
         if col is not None:
             self.handle_move(col, PLAYER_2)
 
+    def start_bot_move(self):
+        board = self.board.copy()
+
+        def search():
+            # take() may wait for an in-flight pondering search, so it runs on the worker too
+            col = self.ponderer.take(list(board.heights), board.to_grid()) if self.ponderer is not None else None
+            return col if col is not None else self.search_bot_column(board)
+
+        def fallback():
+            # the engine raised: answer with greedy on the same snapshot rather than skip the turn
+            return greedy_on_board(PLAYER_2, PLAYER_1, board.copy())
+
+        self.worker.start(search, lambda: pygame.event.post(pygame.event.Event(BOT_DONE)), fallback)
+
+    def start_pondering(self):
+        if self.ponderer is not None and not self.game_over:
+            self.ponderer.start(list(self.board.heights), self.board.to_grid())
+
+    def thinking_message(self) -> str:
+        dots = "." * (1 + int(self.worker.elapsed() * 3) % 3)
+        return "Bot is thinking{0} ({1:.1f}s)".format(dots, self.worker.elapsed())
+
+    # Objective: Event loop that only works when something happens.
+    # Explanation: Blocks in pygame.event.wait while the human is choosing or the game is over; while the bot thinks it wakes every THINKING_REFRESH_MS for the status line, and the worker posts BOT_DONE so the answer is played at once. Each wake-up handles the queued events and calls refresh, which redraws only changed cells and text; an expose event forces a full redraw.
+    # Complexity: O(events + changed cells) per wake-up; no work while idle. Extra space O(rows*columns).
     def run(self):
-        clock = pygame.time.Clock()
         msg = "Player 1's turn"
         self.draw_board(msg)
+        self.start_pondering()
 
         while True:
-            for event in pygame.event.get():
+            if self.worker.thinking:
+                first = pygame.event.wait(THINKING_REFRESH_MS)
+            else:
+                first = pygame.event.wait()
+            for event in [first] + pygame.event.get():
+                if event.type == pygame.VIDEOEXPOSE:
+                    self._shown = None
+                    continue
                 if event.type == pygame.QUIT:
+                    # abandon any running search; worker and pondering threads are daemons and do not block exit
+                    self.worker.cancel()
+                    self.save_record()
                     pygame.quit()
                     sys.exit()
+                if self.vs_bot and self.current == PLAYER_2:
+                    continue  # ignore clicks while the bot is on move
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and not self.game_over:
                     x, _ = event.pos
                     col = x // self.cell
@@ -111,26 +304,55 @@ class Connect4Pygame:
                                 self.current = PLAYER_1
                                 msg = "Player 1's turn"
 
-            # Bot turn outside events to allow immediate response
+            # Bot turn runs on the worker thread; the loop keeps handling events meanwhile
             if self.vs_bot and not self.game_over and self.current == PLAYER_2:
-                self.bot_move()
-                if self.game_over:
-                    msg = "Bot wins!" if self.winner == PLAYER_2 else "It's a draw!"
+                if not self.worker.thinking:
+                    self.start_bot_move()
+                done, col = self.worker.poll()
+                if not done:
+                    msg = self.thinking_message()
                 else:
-                    self.current = PLAYER_1
-                    msg = "Player 1's turn"
+                    if col is not None:
+                        self.handle_move(col, PLAYER_2)
+                    if self.game_over:
+                        msg = "Bot wins!" if self.winner == PLAYER_2 else "It's a draw!"
+                    else:
+                        self.current = PLAYER_1
+                        msg = "Player 1's turn"
+                        self.start_pondering()
 
-            self.draw_board(msg)
-            clock.tick(60)
+            self.refresh(msg)
 
 
 def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Play Connect N in a pygame window.")
+    parser.add_argument("--rows", type=board_side, default=6)
+    parser.add_argument("--columns", type=board_side, default=7)
+    parser.add_argument("--connect", type=int, default=4, help="pieces in a row needed to win")
+    parser.add_argument("--record", help="append the game to this record file (.bin for the binary format)")
+    parser.add_argument("--cache-db", help="keep evaluation and threat caches in this SQLite file across runs")
+    args = parser.parse_args()
+    try:
+        check_size(args.rows, args.columns, args.connect)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if args.cache_db:
+        from cache_store import attach_store
+
+        attach_store(args.cache_db)
     try:
         mode = int(input("VS Player: 1 or VS Bot: 2 : "))
     except ValueError:
         mode = 2
     vs_bot = (mode != 1)
-    game = Connect4Pygame(vs_bot)
+    engine = "beam"
+    if vs_bot:
+        choice = input("Bot engine ({0}) [beam]: ".format(", ".join(ENGINES))).strip().lower()
+        if choice in ENGINES:
+            engine = choice
+    game = Connect4Pygame(vs_bot, engine, rows=args.rows, columns=args.columns, connect=args.connect, record=args.record)
     game.run()
 
 